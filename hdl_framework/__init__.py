@@ -4,12 +4,16 @@ Final Project for Nand to Tetris Course
 """
 
 from .core.gate import Gate
-from .core.builtin_gates import NandGate, NotGate, AndGate, OrGate, BUILTIN_GATES
+from .core.builtin_gates import (NandGate, NotGate, AndGate, OrGate,
+                                 Nand16Gate, Not16Gate, And16Gate, Or16Gate, DFFGate, BUILTIN_GATES,
+                                 RAM8Gate, RAM64Gate, RAM512Gate, RAM4KGate, RAM16KGate, ROM32KGate, MEMORY_GATES)
 from .core.composite_chip import CompositeChip
 from .parser.hdl_parser import HDLParser
 from .testing.test_vector import TestVector
 from .testing.test_runner import TestRunner, TestResult
 from .utils.connections import Connection, ChipInstance
+from .simulation.netlist import Netlist, flatten_chip
+from .simulation.codegen import CompiledChip, compile_chip
 
 __version__ = "1.0.0"
 __author__ = "Badri Losaberidze"
@@ -17,9 +21,13 @@ __author__ = "Badri Losaberidze"
 __all__ = [
     "Gate",
     "NandGate", "NotGate", "AndGate", "OrGate",
+    "Nand16Gate", "Not16Gate", "And16Gate", "Or16Gate", "DFFGate",
+    "RAM8Gate", "RAM64Gate", "RAM512Gate", "RAM4KGate", "RAM16KGate", "ROM32KGate",
     "CompositeChip",
     "HDLParser",
     "TestVector", "TestRunner", "TestResult",
     "Connection", "ChipInstance",
-    "BUILTIN_GATES"
+    "Netlist", "flatten_chip",
+    "CompiledChip", "compile_chip",
+    "BUILTIN_GATES", "MEMORY_GATES"
 ]
\ No newline at end of file
@@ -3,11 +3,16 @@ Core components of the HDL framework.
 """
 
 from .gate import Gate
-from .builtin_gates import NandGate, NotGate, AndGate, OrGate, BUILTIN_GATES
+from .builtin_gates import (NandGate, NotGate, AndGate, OrGate,
+                            Nand16Gate, Not16Gate, And16Gate, Or16Gate, DFFGate, BUILTIN_GATES,
+                            RAM8Gate, RAM64Gate, RAM512Gate, RAM4KGate, RAM16KGate, ROM32KGate, MEMORY_GATES)
 from .composite_chip import CompositeChip
+from .memo import ChipMemo
 
 __all__ = [
     "Gate",
-    "NandGate", "NotGate", "AndGate", "OrGate", "BUILTIN_GATES",
-    "CompositeChip"
+    "NandGate", "NotGate", "AndGate", "OrGate",
+    "Nand16Gate", "Not16Gate", "And16Gate", "Or16Gate", "DFFGate", "BUILTIN_GATES",
+    "RAM8Gate", "RAM64Gate", "RAM512Gate", "RAM4KGate", "RAM16KGate", "ROM32KGate", "MEMORY_GATES",
+    "CompositeChip", "ChipMemo"
 ]
\ No newline at end of file
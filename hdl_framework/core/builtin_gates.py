@@ -3,75 +3,355 @@ Built-in gate implementations for the HDL framework.
 These are primitive gates that don't require HDL parsing.
 """
 
-from typing import Dict, Callable
+from array import array
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
 from .gate import Gate
+from ..utils.memory_image import blank_memory, load_memory_image
 
 
-class NandGate(Gate):
+# Pin lists and bus widths are shared by every instance of a built-in gate.
+_BINARY_PINS = ["a", "b"]
+_UNARY_PINS = ["in"]
+_OUT_PINS = ["out"]
+_BINARY_BUS16 = {"a": 16, "b": 16, "out": 16}
+_UNARY_BUS16 = {"in": 16, "out": 16}
+_NO_DEPENDENCIES: Dict[str, FrozenSet[str]] = {"out": frozenset()}
+_RAM_PINS = ["in", "load", "address"]
+_ROM_PINS = ["address"]
+_ADDRESS_DEPENDENCIES: Dict[str, FrozenSet[str]] = {"out": frozenset(["address"])}
+
+
+class BuiltinGate(Gate):
+
+    __slots__ = ()
+
+    bus_width = 1
+
+    def instantiate(self) -> Gate:
+        return type(self)()
+
+
+# Gates compute on whole bus values, so each 16-bit variant is the same
+# single bitwise operation under a wider mask.
+
+class NandGate(BuiltinGate):
+
+    __slots__ = ()
 
     def __init__(self):
-        super().__init__("Nand", ["a", "b"], ["out"])
+        super().__init__("Nand", _BINARY_PINS, _OUT_PINS)
 
     def compute(self) -> Dict[str, int]:
-        a = self.input_values.get("a", 0)
-        b = self.input_values.get("b", 0)
-        result = 1 if not (a and b) else 0
+        mask = (1 << self.bus_width) - 1
+        result = mask ^ (self.input_values.get("a", 0) & self.input_values.get("b", 0) & mask)
         self.output_values["out"] = result
         return {"out": result}
 
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        mask = (1 << self.bus_width * width) - 1
+        return {"out": mask ^ (inputs.get("a", 0) & inputs.get("b", 0) & mask)}
+
+
+class NotGate(BuiltinGate):
 
-class NotGate(Gate):
+    __slots__ = ()
 
     def __init__(self):
-        super().__init__("Not", ["in"], ["out"])
+        super().__init__("Not", _UNARY_PINS, _OUT_PINS)
 
     def compute(self) -> Dict[str, int]:
-        in_val = self.input_values.get("in", 0)
-        result = 1 if not in_val else 0
+        mask = (1 << self.bus_width) - 1
+        result = mask ^ (self.input_values.get("in", 0) & mask)
         self.output_values["out"] = result
         return {"out": result}
 
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        mask = (1 << self.bus_width * width) - 1
+        return {"out": mask ^ (inputs.get("in", 0) & mask)}
 
-class AndGate(Gate):
+
+class AndGate(BuiltinGate):
+
+    __slots__ = ()
 
     def __init__(self):
-        super().__init__("And", ["a", "b"], ["out"])
+        super().__init__("And", _BINARY_PINS, _OUT_PINS)
 
     def compute(self) -> Dict[str, int]:
-        a = self.input_values.get("a", 0)
-        b = self.input_values.get("b", 0)
-        result = 1 if (a and b) else 0
+        mask = (1 << self.bus_width) - 1
+        result = self.input_values.get("a", 0) & self.input_values.get("b", 0) & mask
         self.output_values["out"] = result
         return {"out": result}
 
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        mask = (1 << self.bus_width * width) - 1
+        return {"out": inputs.get("a", 0) & inputs.get("b", 0) & mask}
+
 
-class OrGate(Gate):
+class OrGate(BuiltinGate):
+
+    __slots__ = ()
 
     def __init__(self):
-        super().__init__("Or", ["a", "b"], ["out"])
+        super().__init__("Or", _BINARY_PINS, _OUT_PINS)
 
     def compute(self) -> Dict[str, int]:
-        a = self.input_values.get("a", 0)
-        b = self.input_values.get("b", 0)
-        result = 1 if (a or b) else 0
+        mask = (1 << self.bus_width) - 1
+        result = (self.input_values.get("a", 0) | self.input_values.get("b", 0)) & mask
         self.output_values["out"] = result
         return {"out": result}
 
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        mask = (1 << self.bus_width * width) - 1
+        return {"out": (inputs.get("a", 0) | inputs.get("b", 0)) & mask}
+
+
+class Nand16Gate(NandGate):
+
+    __slots__ = ()
+
+    bus_width = 16
+
+    def __init__(self):
+        BuiltinGate.__init__(self, "Nand16", _BINARY_PINS, _OUT_PINS, _BINARY_BUS16)
+
+
+class Not16Gate(NotGate):
+
+    __slots__ = ()
+
+    bus_width = 16
+
+    def __init__(self):
+        BuiltinGate.__init__(self, "Not16", _UNARY_PINS, _OUT_PINS, _UNARY_BUS16)
+
+
+class And16Gate(AndGate):
+
+    __slots__ = ()
+
+    bus_width = 16
+
+    def __init__(self):
+        BuiltinGate.__init__(self, "And16", _BINARY_PINS, _OUT_PINS, _BINARY_BUS16)
+
+
+class Or16Gate(OrGate):
+
+    __slots__ = ()
+
+    bus_width = 16
+
+    def __init__(self):
+        BuiltinGate.__init__(self, "Or16", _BINARY_PINS, _OUT_PINS, _BINARY_BUS16)
+
+
+class DFFGate(BuiltinGate):
+
+    # out(t) = in(t - 1): the input is sampled on tick and becomes the
+    # output on tock, so out never depends combinationally on in.
+    __slots__ = ("state", "sampled")
+
+    def __init__(self):
+        super().__init__("DFF", _UNARY_PINS, _OUT_PINS)
+        self.state = 0
+        self.sampled = 0
+        self.output_values["out"] = 0
+
+    def is_sequential(self) -> bool:
+        return True
+
+    def combinational_dependencies(self) -> Dict[str, FrozenSet[str]]:
+        return _NO_DEPENDENCIES
+
+    def compute(self) -> Dict[str, int]:
+        self.output_values["out"] = self.state
+        return {"out": self.state}
+
+    def tick(self):
+        self.sampled = self.input_values.get("in", 0) & 1
+
+    def tock(self):
+        self.state = self.sampled
+        self.output_values["out"] = self.state
+
+    def reset(self):
+        super().reset()
+        self.state = 0
+        self.sampled = 0
+        self.output_values["out"] = 0
+
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        # Every vector sees the current state.
+        return {"out": (1 << width) - 1 if self.state else 0}
+
+
+class MemoryGate(BuiltinGate):
+
+    # 16-bit words held in one flat array('H'); out reads the word at
+    # address with no per-word objects, so even RAM16K is a single array.
+    __slots__ = ("contents",)
+
+    def __init__(self, name: str, inputs: List[str], address_width: int):
+        widths = {"address": address_width, "out": 16}
+        if "in" in inputs:
+            widths["in"] = 16
+        super().__init__(name, inputs, _OUT_PINS, widths)
+        self.contents: Sequence[int] = blank_memory(self.size)
+
+    @property
+    def size(self) -> int:
+        return 1 << self.widths["address"]
+
+    def combinational_dependencies(self) -> Dict[str, FrozenSet[str]]:
+        return _ADDRESS_DEPENDENCIES
+
+    def load(self, filename: str):
+        self.contents = load_memory_image(filename, self.size)
+        self.compute()
+
+    def compute(self) -> Dict[str, int]:
+        result = self.contents[self.input_values.get("address", 0) & (self.size - 1)]
+        self.output_values["out"] = result
+        return {"out": result}
+
+
+class RAMGate(MemoryGate):
+
+    # out(t) = RAM[address(t)](t); if load(t) then RAM[address(t)](t+1) = in(t).
+    # tick samples the write and tock performs it. reset() restores the
+    # image given to load(), or zeros, like ClockedSimulator.reset.
+    __slots__ = ("sampled", "initial")
+
+    def __init__(self, name: str, address_width: int):
+        super().__init__(name, _RAM_PINS, address_width)
+        self.sampled: Optional[Tuple[int, int]] = None
+        self.initial: Optional[array] = None
+        self.output_values["out"] = 0
+
+    def is_sequential(self) -> bool:
+        return True
+
+    def load(self, filename: str):
+        # A full-size raw image comes back as a read-only view of the file.
+        self.initial = array('H', load_memory_image(filename, self.size))
+        self.contents = array('H', self.initial)
+        self.compute()
+
+    def tick(self):
+        if self.input_values.get("load", 0) & 1:
+            address = self.input_values.get("address", 0) & (self.size - 1)
+            self.sampled = (address, self.input_values.get("in", 0) & 0xFFFF)
+        else:
+            self.sampled = None
+
+    def tock(self):
+        if self.sampled is not None:
+            address, value = self.sampled
+            self.contents[address] = value
+            self.sampled = None
+        self.compute()
+
+    def reset(self):
+        super().reset()
+        self.contents = blank_memory(self.size) if self.initial is None else array('H', self.initial)
+        self.sampled = None
+        self.output_values["out"] = self.contents[0]
+
+
+class RAM8Gate(RAMGate):
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("RAM8", 3)
+
+
+class RAM64Gate(RAMGate):
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("RAM64", 6)
+
+
+class RAM512Gate(RAMGate):
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("RAM512", 9)
+
+
+class RAM4KGate(RAMGate):
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("RAM4K", 12)
+
+
+class RAM16KGate(RAMGate):
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("RAM16K", 14)
+
+
+class ROM32KGate(MemoryGate):
+
+    # Read-only and combinational: out = ROM[address]. Contents come from
+    # load() and survive reset.
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("ROM32K", _ROM_PINS, 15)
+        self.output_values["out"] = 0
+
+    def instantiate(self) -> Gate:
+        # Instances share the read-only image.
+        rom = ROM32KGate()
+        rom.contents = self.contents
+        return rom
+
+    def reset(self):
+        super().reset()
+        self.output_values["out"] = self.contents[0]
+
 
 BUILTIN_GATES: Dict[str, Callable[[], Gate]] = {
     "Nand": NandGate,
     "Not": NotGate,
     "And": AndGate,
-    "Or": OrGate
+    "Or": OrGate,
+    "Nand16": Nand16Gate,
+    "Not16": Not16Gate,
+    "And16": And16Gate,
+    "Or16": Or16Gate,
+    "DFF": DFFGate
+}
+
+# Native memories, registered next to BUILTIN_GATES. HDLParser uses them in
+# place of RAM*.hdl / ROM32K.hdl unless native_memory=False.
+MEMORY_GATES: Dict[str, Callable[[], Gate]] = {
+    "RAM8": RAM8Gate,
+    "RAM64": RAM64Gate,
+    "RAM512": RAM512Gate,
+    "RAM4K": RAM4KGate,
+    "RAM16K": RAM16KGate,
+    "ROM32K": ROM32KGate
 }
 
 
 def create_builtin_gate(gate_type: str) -> Gate:
     if gate_type in BUILTIN_GATES:
         return BUILTIN_GATES[gate_type]()
+    elif gate_type in MEMORY_GATES:
+        return MEMORY_GATES[gate_type]()
     else:
         raise ValueError(f"Unknown built-in gate type: {gate_type}")
 
 
 def is_builtin_gate(gate_type: str) -> bool:
-    return gate_type in BUILTIN_GATES
\ No newline at end of file
+    return gate_type in BUILTIN_GATES or gate_type in MEMORY_GATES
\ No newline at end of file
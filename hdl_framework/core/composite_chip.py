@@ -2,87 +2,404 @@
 Composite chip implementation for chips built from other chips and gates.
 """
 
-from typing import Dict, List, Tuple, Optional
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 from .gate import Gate
+from .memo import ChipMemo, TRUTH_TABLE_BITS
+from ..utils.bus import BitRange, CONSTANT_VALUES, pack_words, unpack_words
 from ..utils.connections import Connection
 
 
 class CompositeChip(Gate):
 
-    def __init__(self, name: str, inputs: List[str], outputs: List[str]):
-        super().__init__(name, inputs, outputs)
-        self.sub_chips: Dict[str, Gate] = {}
+    __slots__ = ("template", "_sub_chips", "internal_connections", "input_connections",
+                 "output_connections", "evaluation_order", "incoming_connections",
+                 "pin_dependencies", "sequential", "memo")
+
+    def __init__(self, name: str, inputs: List[str], outputs: List[str],
+                 widths: Optional[Dict[str, int]] = None):
+        super().__init__(name, inputs, outputs, widths)
+        self.template: Optional[CompositeChip] = None  # set on instances that share a parsed definition
+        self._sub_chips: Optional[Dict[str, Gate]] = {}
         self.internal_connections: List[Connection] = []
-        self.input_connections: Dict[str, List[Tuple[str, str]]] = {}  # input_pin -> [(chip_name, pin_name)]
-        self.output_connections: Dict[str, Tuple[str, str]] = {}  # output_pin -> (chip_name, pin_name)
+        # input pin or constant ("true"/"false") -> connections into sub-chips
+        self.input_connections: Dict[str, List[Connection]] = {}
+        self.output_connections: Dict[str, List[Connection]] = {}  # output_pin -> pieces driving it
+        self.evaluation_order: Optional[List[str]] = None  # topological order of sub-chips, set by levelize()
+        self.incoming_connections: Dict[str, List[Connection]] = {}  # target chip -> connections feeding it
+        self.pin_dependencies: Optional[Dict[str, FrozenSet[str]]] = None  # set by levelize()
+        self.sequential = False  # contains a clocked element, set by levelize()
+        self.memo: Optional[ChipMemo] = None  # shared by all instances; see enable_memo()
+
+    @classmethod
+    def instance_of(cls, template: "CompositeChip") -> "CompositeChip":
+        # Instances share the template's pins, wiring and evaluation order by
+        # reference; only values and (lazily) sub-chip state are per instance.
+        chip = cls.__new__(cls)
+        Gate.__init__(chip, template.name, template.inputs, template.outputs, template.widths)
+        chip.template = template
+        chip._sub_chips = None
+        chip.internal_connections = template.internal_connections
+        chip.input_connections = template.input_connections
+        chip.output_connections = template.output_connections
+        chip.evaluation_order = template.evaluation_order
+        chip.incoming_connections = template.incoming_connections
+        chip.pin_dependencies = template.pin_dependencies
+        chip.sequential = template.sequential
+        chip.memo = None  # instances use the template's memo
+        return chip
+
+    def instantiate(self) -> "CompositeChip":
+        return CompositeChip.instance_of(self.template if self.template is not None else self)
+
+    @property
+    def sub_chips(self) -> Dict[str, Gate]:
+        if self._sub_chips is None:
+            self._sub_chips = {name: part.instantiate() for name, part in self.template.sub_chips.items()}
+            self._settle_sub_chips()
+        return self._sub_chips
+
+    def _settle_sub_chips(self):
+        # Settles outputs that depend only on state.
+        for chip in self._sub_chips.values():
+            if chip.is_sequential():
+                chip.reset()
+
+    @property
+    def parts(self) -> Dict[str, Gate]:
+        # Structural view of the sub-chips that never materializes instance state.
+        return self.template.sub_chips if self.template is not None else self._sub_chips
+
+    def _check_mutable(self):
+        if self.template is not None:
+            raise ValueError(f"Cannot modify an instance of {self.name}; modify its template instead")
 
     def add_sub_chip(self, instance_name: str, chip: Gate):
-        self.sub_chips[instance_name] = chip
+        self._check_mutable()
+        self._sub_chips[instance_name] = chip
 
-    def add_input_connection(self, input_pin: str, target_chip: str, target_pin: str):
+    def add_input_connection(self, input_pin: str, target_chip: str, target_pin: str,
+                             source_bits: Optional[BitRange] = None, target_bits: Optional[BitRange] = None):
+        self._check_mutable()
         if input_pin not in self.input_connections:
             self.input_connections[input_pin] = []
-        self.input_connections[input_pin].append((target_chip, target_pin))
+        connection = Connection("", input_pin, target_chip, target_pin, source_bits, target_bits)
+        self.input_connections[input_pin].append(connection)
 
-    def add_output_connection(self, output_pin: str, source_chip: str, source_pin: str):
-        self.output_connections[output_pin] = (source_chip, source_pin)
+    def add_output_connection(self, output_pin: str, source_chip: str, source_pin: str,
+                              source_bits: Optional[BitRange] = None, target_bits: Optional[BitRange] = None):
+        self._check_mutable()
+        if output_pin not in self.output_connections:
+            self.output_connections[output_pin] = []
+        connection = Connection(source_chip, source_pin, "", output_pin, source_bits, target_bits)
+        self.output_connections[output_pin].append(connection)
 
-    def add_internal_connection(self, source_chip: str, source_pin: str, target_chip: str, target_pin: str):
-        connection = Connection(source_chip, source_pin, target_chip, target_pin)
+    def add_internal_connection(self, source_chip: str, source_pin: str, target_chip: str, target_pin: str,
+                                source_bits: Optional[BitRange] = None, target_bits: Optional[BitRange] = None):
+        self._check_mutable()
+        connection = Connection(source_chip, source_pin, target_chip, target_pin, source_bits, target_bits)
         self.internal_connections.append(connection)
 
+    def levelize(self) -> Optional[List[str]]:
+        # Orders sub-chips so each runs after the parts feeding it. Outputs
+        # that only depend on clocked state (a DFF's out) impose no order. If
+        # sub-chips still form a cycle without any pin-level combinational
+        # loop, compute() falls back to iterating to a fixed point.
+        parts = self.parts
+        dependencies = {name: part.combinational_dependencies() for name, part in parts.items()}
+        incoming: Dict[str, List[Connection]] = {name: [] for name in parts}
+        dependents: Dict[str, List[str]] = {name: [] for name in parts}
+        pending: Dict[str, int] = {name: 0 for name in parts}
+
+        for conn in self.internal_connections:
+            if conn.source_chip not in parts or conn.target_chip not in parts:
+                continue
+            if conn.source_pin not in parts[conn.source_chip].outputs:
+                continue
+            incoming[conn.target_chip].append(conn)
+            if not dependencies[conn.source_chip].get(conn.source_pin):
+                continue
+            if conn.target_chip not in dependents[conn.source_chip]:
+                dependents[conn.source_chip].append(conn.target_chip)
+                pending[conn.target_chip] += 1
+
+        ready = deque(name for name, count in pending.items() if count == 0)
+        order: Optional[List[str]] = []
+        while ready:
+            name = ready.popleft()
+            order.append(name)
+            for dependent in dependents[name]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(parts):
+            cycle = self._combinational_cycle(dependencies)
+            if cycle:
+                raise ValueError(f"Combinational cycle detected in {self.name}: {' -> '.join(cycle)}")
+            order = None
+
+        self.evaluation_order = order
+        self.incoming_connections = incoming
+        self.pin_dependencies = self._compute_pin_dependencies(dependencies)
+        self.sequential = any(part.is_sequential() for part in parts.values())
+        return order
+
+    def _pin_graph(self, dependencies: Dict[str, Dict[str, FrozenSet[str]]]) -> Dict[Tuple[str, str], List[Tuple[str, str]]]:
+        # Nodes are (sub-chip, pin); the enclosing chip's pins use chip "".
+        graph: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for name, outputs in dependencies.items():
+            for output_pin, input_pins in outputs.items():
+                for input_pin in input_pins:
+                    graph.setdefault((name, input_pin), []).append((name, output_pin))
+        for connections in self.input_connections.values():
+            for conn in connections:
+                graph.setdefault(("", conn.source_pin), []).append((conn.target_chip, conn.target_pin))
+        for conn in self.internal_connections:
+            graph.setdefault((conn.source_chip, conn.source_pin), []).append((conn.target_chip, conn.target_pin))
+        for connections in self.output_connections.values():
+            for conn in connections:
+                graph.setdefault((conn.source_chip, conn.source_pin), []).append(("", conn.target_pin))
+        return graph
+
+    def _combinational_cycle(self, dependencies: Dict[str, Dict[str, FrozenSet[str]]]) -> List[str]:
+        graph = self._pin_graph(dependencies)
+        state: Dict[Tuple[str, str], int] = {}  # 1 = on the current path, 2 = finished
+        for start in list(graph):
+            if start in state:
+                continue
+            path = [start]
+            stack = [iter(graph.get(start, ()))]
+            state[start] = 1
+            while stack:
+                node = next(stack[-1], None)
+                if node is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(node) == 1:
+                    cycle = path[path.index(node):] + [node]
+                    return [f"{chip}.{pin}" for chip, pin in cycle]
+                elif node not in state:
+                    state[node] = 1
+                    path.append(node)
+                    stack.append(iter(graph.get(node, ())))
+        return []
+
+    def _compute_pin_dependencies(self, dependencies: Dict[str, Dict[str, FrozenSet[str]]]) -> Dict[str, FrozenSet[str]]:
+        graph = self._pin_graph(dependencies)
+        reached: Dict[str, Set[str]] = {pin: set() for pin in self.outputs}
+        for input_pin in self.inputs:
+            seen = {("", input_pin)}
+            stack = [("", input_pin)]
+            while stack:
+                for node in graph.get(stack.pop(), ()):
+                    if node not in seen:
+                        seen.add(node)
+                        stack.append(node)
+                        if node[0] == "" and node[1] in reached:
+                            reached[node[1]].add(input_pin)
+        return {pin: frozenset(inputs) for pin, inputs in reached.items()}
+
+    def combinational_dependencies(self) -> Dict[str, FrozenSet[str]]:
+        if self.pin_dependencies is None:
+            self.levelize()
+        return self.pin_dependencies
+
+    def is_sequential(self) -> bool:
+        return self.sequential
+
+    def _pin_inputs(self, values: Dict[str, int], width: int = 1) -> Dict[str, Dict[str, int]]:
+        # Sub-chip input values fed from this chip's own pins and constants.
+        # Pieces of a sub-bus are OR-ed into the pin they target.
+        sub_inputs: Dict[str, Dict[str, int]] = {name: {} for name in self.parts}
+        for input_pin, connections in self.input_connections.items():
+            value = values.get(input_pin, CONSTANT_VALUES.get(input_pin, 0))
+            for conn in connections:
+                pins = sub_inputs.get(conn.target_chip)
+                if pins is not None:
+                    pins[conn.target_pin] = pins.get(conn.target_pin, 0) | conn.transfer(value, width)
+        return sub_inputs
+
+    def enable_memo(self, max_entries: int = 4096, truth_table_bits: int = TRUTH_TABLE_BITS) -> ChipMemo:
+        # Opt-in output cache for every instance of this chip type. Sub-chip
+        # values are not updated on a hit, only this chip's outputs.
+        definition = self.template if self.template is not None else self
+        if definition.evaluation_order is None:
+            definition.levelize()
+        if definition.sequential:
+            raise ValueError(f"Cannot memoize {self.name}: it contains clocked elements")
+        definition.memo = ChipMemo(definition, max_entries, truth_table_bits)
+        return definition.memo
+
+    def disable_memo(self):
+        definition = self.template if self.template is not None else self
+        definition.memo = None
+
+    def get_memo(self) -> Optional[ChipMemo]:
+        return self.template.memo if self.template is not None else self.memo
+
     def compute(self) -> Dict[str, int]:
-        for input_pin, value in self.input_values.items():
-            if input_pin in self.input_connections:
-                for chip_name, pin_name in self.input_connections[input_pin]:
-                    if chip_name in self.sub_chips:
-                        self.sub_chips[chip_name].set_input(pin_name, value)
+        memo = self.template.memo if self.template is not None else self.memo
+        if memo is None:
+            return self._evaluate()
 
-        max_iterations = 10
+        key = memo.key(self.input_values)
+        outputs = memo.lookup(key)
+        if outputs is None:
+            self._evaluate()
+            memo.store(key, tuple(self.output_values.get(pin, 0) for pin in self.outputs))
+        else:
+            self.output_values.update(zip(self.outputs, outputs))
+        return self.output_values
+
+    def _evaluate(self) -> Dict[str, int]:
+        sub_inputs = self._pin_inputs(self.input_values)
+
+        if self.evaluation_order is not None:
+            self._compute_levelized(sub_inputs)
+        else:
+            self._compute_fixed_point(sub_inputs)
+
+        sub_chips = self.sub_chips
+        for output_pin, connections in self.output_connections.items():
+            value = 0
+            for conn in connections:
+                if conn.source_chip in sub_chips:
+                    value |= conn.transfer(sub_chips[conn.source_chip].get_output(conn.source_pin))
+            self.output_values[output_pin] = value
+
+        return self.output_values
+
+    def _compute_levelized(self, sub_inputs: Dict[str, Dict[str, int]]):
+        sub_chips = self.sub_chips
+        for instance_name in self.evaluation_order:
+            chip = sub_chips[instance_name]
+            pins = sub_inputs[instance_name]
+            for conn in self.incoming_connections[instance_name]:
+                value = conn.transfer(sub_chips[conn.source_chip].get_output(conn.source_pin))
+                pins[conn.target_pin] = pins.get(conn.target_pin, 0) | value
+            for pin_name, value in pins.items():
+                chip.set_input(pin_name, value)
+            chip.compute()
+
+    def _compute_fixed_point(self, sub_inputs: Dict[str, Dict[str, int]]) -> int:
+        # Returns the number of sweeps it took to settle.
+        sub_chips = self.sub_chips
+        for chip_name, pins in sub_inputs.items():
+            for pin_name, value in pins.items():
+                sub_chips[chip_name].set_input(pin_name, value)
+
+        # Any acyclic chain settles within one sweep per sub-chip.
+        max_iterations = len(sub_chips) + 1
         for iteration in range(max_iterations):
             changed = False
 
-            for chip in self.sub_chips.values():
+            for chip in sub_chips.values():
                 old_outputs = chip.output_values.copy()
                 chip.compute()
                 if chip.output_values != old_outputs:
                     changed = True
 
+            gathered = {chip_name: dict(pins) for chip_name, pins in sub_inputs.items()}
             for conn in self.internal_connections:
-                if conn.source_chip in self.sub_chips and conn.target_chip in self.sub_chips:
-                    source_chip = self.sub_chips[conn.source_chip]
-                    target_chip = self.sub_chips[conn.target_chip]
+                if conn.source_chip in sub_chips and conn.target_chip in sub_chips:
+                    source_chip = sub_chips[conn.source_chip]
 
                     if conn.source_pin in source_chip.outputs:
-                        value = source_chip.get_output(conn.source_pin)
-                        target_chip.set_input(conn.target_pin, value)
+                        pins = gathered[conn.target_chip]
+                        value = conn.transfer(source_chip.get_output(conn.source_pin))
+                        pins[conn.target_pin] = pins.get(conn.target_pin, 0) | value
+
+            for chip_name, pins in gathered.items():
+                for pin_name, value in pins.items():
+                    sub_chips[chip_name].set_input(pin_name, value)
 
             if not changed:
                 break
+        return iteration + 1
 
-        for output_pin in self.outputs:
-            if output_pin in self.output_connections:
-                chip_name, pin_name = self.output_connections[output_pin]
-                if chip_name in self.sub_chips:
-                    self.output_values[output_pin] = self.sub_chips[chip_name].get_output(pin_name)
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        memo = self.template.memo if self.template is not None else self.memo
+        if memo is not None:
+            return self._simulate_memoized(memo, inputs, width)
+        return self._simulate_batch(inputs, width)
 
-        return self.output_values
+    def _simulate_memoized(self, memo: ChipMemo, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        # Vectors are looked up one by one; the misses are simulated together
+        # in one smaller batch and stored.
+        columns = [unpack_words(inputs.get(pin, 0), self.pin_width(pin), width) for pin in self.inputs]
+        keys = list(zip(*columns)) if columns else [()] * width
+        rows = [memo.lookup(key) for key in keys]
+        missing = [k for k, row in enumerate(rows) if row is None]
+        if missing:
+            packed = {pin: pack_words([column[k] for k in missing], self.pin_width(pin))
+                      for pin, column in zip(self.inputs, columns)}
+            computed = self._simulate_batch(packed, len(missing))
+            computed_columns = [unpack_words(computed.get(pin, 0), self.pin_width(pin), len(missing))
+                                for pin in self.outputs]
+            for j, k in enumerate(missing):
+                rows[k] = tuple(column[j] for column in computed_columns)
+                memo.store(keys[k], rows[k])
+        return {pin: pack_words([row[i] for row in rows], self.pin_width(pin))
+                for i, pin in enumerate(self.outputs)}
+
+    def _simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        if self.evaluation_order is None and self.levelize() is None:
+            return super().simulate_batch(inputs, width)
+
+        parts = self.parts
+        sub_inputs = self._pin_inputs(inputs, width)
+
+        sub_outputs: Dict[str, Dict[str, int]] = {}
+        for instance_name in self.evaluation_order:
+            chip_inputs = sub_inputs[instance_name]
+            for conn in self.incoming_connections[instance_name]:
+                value = conn.transfer(sub_outputs[conn.source_chip].get(conn.source_pin, 0), width)
+                chip_inputs[conn.target_pin] = chip_inputs.get(conn.target_pin, 0) | value
+            sub_outputs[instance_name] = parts[instance_name].simulate_batch(chip_inputs, width)
+
+        outputs: Dict[str, int] = {pin: 0 for pin in self.outputs}
+        for output_pin, connections in self.output_connections.items():
+            for conn in connections:
+                if conn.source_chip in sub_outputs:
+                    value = sub_outputs[conn.source_chip].get(conn.source_pin, 0)
+                    outputs[output_pin] |= conn.transfer(value, width)
+        return outputs
+
+    def tick(self):
+        if self.sequential:
+            for chip in self.sub_chips.values():
+                chip.tick()
+
+    def tock(self):
+        # Refresh outputs once the new state is committed, so parents that
+        # read a state-only output before computing this chip see the new value.
+        if self.sequential:
+            for chip in self.sub_chips.values():
+                chip.tock()
+            self.compute()
 
     def reset(self):
         super().reset()
-        for chip in self.sub_chips.values():
-            chip.reset()
+        if self._sub_chips is not None:
+            for chip in self._sub_chips.values():
+                chip.reset()
+        if self.sequential:
+            self.compute()
 
     def get_sub_chip(self, instance_name: str) -> Optional[Gate]:
         return self.sub_chips.get(instance_name)
 
     def list_sub_chips(self) -> List[str]:
-        return list(self.sub_chips.keys())
+        return list(self.parts.keys())
 
     def get_connection_info(self) -> Dict:
         return {
-            "input_connections": self.input_connections,
-            "output_connections": self.output_connections,
+            "input_connections": {pin: [str(conn) for conn in connections]
+                                  for pin, connections in self.input_connections.items()},
+            "output_connections": {pin: [str(conn) for conn in connections]
+                                   for pin, connections in self.output_connections.items()},
             "internal_connections": [str(conn) for conn in self.internal_connections],
-            "sub_chips": list(self.sub_chips.keys())
-        }
\ No newline at end of file
+            "sub_chips": list(self.parts.keys()),
+            "evaluation_order": self.evaluation_order
+        }
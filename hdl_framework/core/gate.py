@@ -3,15 +3,20 @@ Abstract base class for all gates and chips in the HDL framework.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import Dict, FrozenSet, List, Optional
+from ..utils.bus import pack_words, unpack_words
 
 
 class Gate(ABC):
 
-    def __init__(self, name: str, inputs: List[str], outputs: List[str]):
+    __slots__ = ("name", "inputs", "outputs", "widths", "input_values", "output_values")
+
+    def __init__(self, name: str, inputs: List[str], outputs: List[str],
+                 widths: Optional[Dict[str, int]] = None):
         self.name = name
         self.inputs = inputs
         self.outputs = outputs
+        self.widths: Dict[str, int] = widths if widths is not None else {}  # bus pins only; others are 1 bit
         self.input_values: Dict[str, int] = {}
         self.output_values: Dict[str, int] = {}
 
@@ -19,6 +24,31 @@ class Gate(ABC):
     def compute(self) -> Dict[str, int]:
         pass
 
+    def instantiate(self) -> "Gate":
+        # A fresh gate with the same definition and its own state. Gates that
+        # have no shareable definition are reused as-is.
+        return self
+
+    def pin_width(self, pin_name: str) -> int:
+        return self.widths.get(pin_name, 1)
+
+    def is_sequential(self) -> bool:
+        return False
+
+    def combinational_dependencies(self) -> Dict[str, FrozenSet[str]]:
+        # Output pin -> input pins it depends on without passing through a
+        # clocked element.
+        inputs = frozenset(self.inputs)
+        return {pin: inputs for pin in self.outputs}
+
+    def tick(self):
+        # Rising clock edge: clocked elements sample their inputs.
+        pass
+
+    def tock(self):
+        # Falling clock edge: sampled values become the new state.
+        pass
+
     def set_input(self, pin_name: str, value: int):
         if pin_name in self.inputs:
             self.input_values[pin_name] = value
@@ -31,6 +61,21 @@ class Gate(ABC):
         else:
             raise ValueError(f"Output pin '{pin_name}' not found in {self.name}")
 
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        # Words are packed bus-major (see utils.bus): for a 1-bit pin bit k is
+        # vector k. Subclasses with pure bitwise behaviour override this to
+        # evaluate all vectors at once.
+        vectors = {pin: unpack_words(word, self.pin_width(pin), width) for pin, word in inputs.items()}
+        results: Dict[str, List[int]] = {pin: [] for pin in self.outputs}
+        for k in range(width):
+            self.reset()
+            for pin, values in vectors.items():
+                self.set_input(pin, values[k])
+            values = self.compute()
+            for pin in self.outputs:
+                results[pin].append(values.get(pin, 0))
+        return {pin: pack_words(values, self.pin_width(pin)) for pin, values in results.items()}
+
     def reset(self):
         self.input_values.clear()
         self.output_values.clear()
@@ -0,0 +1,102 @@
+"""
+Output memoization for combinational chips.
+
+A ChipMemo maps a chip's input values (in pin order) to its output values and
+is shared by every instance of the chip type. Chips whose inputs total at most
+TRUTH_TABLE_BITS bits get their full truth table up front, computed in one
+bit-parallel simulate_batch call; larger chips cache on demand with LRU
+eviction once max_entries is reached.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from .gate import Gate
+from ..utils.bus import bit_mask, pack_words, unpack_words
+
+TRUTH_TABLE_BITS = 12
+
+Values = Tuple[int, ...]
+
+
+class ChipMemo:
+
+    def __init__(self, chip: Gate, max_entries: int = 4096, truth_table_bits: int = TRUTH_TABLE_BITS):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        self.name = chip.name
+        self.max_entries = max_entries
+        self.pins: Tuple[str, ...] = tuple(chip.inputs)
+        self.masks: Values = tuple(bit_mask(chip.pin_width(pin)) for pin in chip.inputs)
+        self.entries: "OrderedDict[Values, Values]" = OrderedDict()
+        self.truth_table: Optional[List[Values]] = None
+        self.offsets: Values = ()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        input_bits = sum(chip.pin_width(pin) for pin in chip.inputs)
+        if input_bits <= truth_table_bits:
+            self._build_truth_table(chip, input_bits)
+
+    def _build_truth_table(self, chip: Gate, input_bits: int):
+        # Vector k carries input value k, split across the pins LSB first.
+        count = 1 << input_bits
+        offsets = []
+        packed = {}
+        offset = 0
+        for pin in chip.inputs:
+            width = chip.pin_width(pin)
+            offsets.append(offset)
+            packed[pin] = pack_words([(k >> offset) & bit_mask(width) for k in range(count)], width)
+            offset += width
+        outputs = chip.simulate_batch(packed, count)
+        columns = [unpack_words(outputs.get(pin, 0), chip.pin_width(pin), count) for pin in chip.outputs]
+        self.truth_table = list(zip(*columns))
+        self.offsets = tuple(offsets)
+
+    def lookup(self, inputs: Values) -> Optional[Values]:
+        if self.truth_table is not None:
+            index = 0
+            for value, offset in zip(inputs, self.offsets):
+                index |= value << offset
+            self.hits += 1
+            return self.truth_table[index]
+
+        outputs = self.entries.get(inputs)
+        if outputs is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(inputs)
+        self.hits += 1
+        return outputs
+
+    def store(self, inputs: Values, outputs: Values):
+        if self.truth_table is not None:
+            return
+        self.entries[inputs] = outputs
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def key(self, input_values: Dict[str, int]) -> Values:
+        return tuple(input_values.get(pin, 0) & mask for pin, mask in zip(self.pins, self.masks))
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear_statistics(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.truth_table) if self.truth_table is not None else len(self.entries)
+
+    def __str__(self):
+        kind = "truth table" if self.truth_table is not None else f"LRU max {self.max_entries}"
+        return (f"ChipMemo(name={self.name}, {kind}, entries={len(self)}, hits={self.hits}, "
+                f"misses={self.misses}, evictions={self.evictions})")
+
+    def __repr__(self):
+        return self.__str__()
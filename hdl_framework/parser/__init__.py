@@ -3,5 +3,8 @@ HDL parsing components.
 """
 
 from .hdl_parser import HDLParser
+from .lexer import HDLSyntaxError
+from .parse_cache import ParseCache
+from .syntax import parse_hdl
 
-__all__ = ["HDLParser"]
+__all__ = ["HDLParser", "HDLSyntaxError", "ParseCache", "parse_hdl"]
@@ -0,0 +1,53 @@
+"""
+Abstract syntax tree for HDL chip definitions, with source positions.
+
+Leaf nodes are immutable tuples: a parsed design can hold hundreds of
+thousands of them, and tuples of plain values are ignored by the cyclic
+garbage collector once built.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from ..utils.bus import BitRange
+
+
+class PinDecl(NamedTuple):
+    name: str
+    line: int = 0
+    column: int = 0
+    width: int = 1
+
+
+class PinConnection(NamedTuple):
+    pin: str
+    wire: str
+    line: int = 0
+    column: int = 0
+    pin_bits: Optional[BitRange] = None  # sub-bus of the part's pin, e.g. a[0..7]
+    wire_bits: Optional[BitRange] = None  # sub-bus of the chip pin it connects to
+
+
+class PartNode(NamedTuple):
+    part_type: str
+    connections: Tuple[PinConnection, ...] = ()
+    line: int = 0
+    column: int = 0
+
+
+@dataclass
+class ChipNode:
+    name: str
+    inputs: List[PinDecl] = field(default_factory=list)
+    outputs: List[PinDecl] = field(default_factory=list)
+    parts: List[PartNode] = field(default_factory=list)
+    line: int = 0
+    column: int = 0
+
+    def input_names(self) -> List[str]:
+        return [pin.name for pin in self.inputs]
+
+    def output_names(self) -> List[str]:
+        return [pin.name for pin in self.outputs]
+
+    def bus_widths(self) -> Dict[str, int]:
+        return {pin.name: pin.width for pin in self.inputs + self.outputs if pin.width != 1}
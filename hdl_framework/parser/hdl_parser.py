@@ -2,19 +2,48 @@
 HDL file parser that converts HDL files into Gate objects.
 """
 
-import re
 import os
-from typing import Dict, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 from ..core.gate import Gate
-from ..core.builtin_gates import create_builtin_gate, is_builtin_gate
+from ..core.builtin_gates import MEMORY_GATES, create_builtin_gate, is_builtin_gate
 from ..core.composite_chip import CompositeChip
+from ..core.memo import ChipMemo
+from ..utils.bus import BitRange, CONSTANT_VALUES, format_bits
+from .hdl_ast import ChipNode, PartNode, PinConnection
+from .lexer import HDLSyntaxError
+from .parse_cache import ParseCache, bit_range, part_type_of
+from .syntax import parse_hdl
+
+
+def _connection_error(filename: str, message: str, connection: PinConnection) -> HDLSyntaxError:
+    return HDLSyntaxError(message, filename, connection.line, connection.column)
+
+
+def _bit_count(bits: BitRange) -> int:
+    return bits[1] - bits[0] + 1
+
+
+class _Source(NamedTuple):
+    content: str
+    chip_node: Optional[ChipNode]  # None when a cache entry made parsing unnecessary
+    dependencies: Tuple[str, ...]  # HDL part types, in first-use order
+    error: Optional[Exception]  # raised when the chip is built, not while scanning
 
 
 class HDLParser:
 
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", cache_dir: Optional[str] = None, native_memory: bool = True,
+                 max_workers: int = 8):
         self.base_path = base_path
+        self.max_workers = max_workers  # threads reading and scanning HDL files
+        self._sources: Dict[str, _Source] = {}  # scanned but not yet built
+        self.native_memory = native_memory  # RAM*/ROM32K parts use the array-backed built-ins
         self.parsed_chips: Dict[str, Gate] = {}
+        self.dependencies: Dict[str, List[str]] = {}  # chip -> HDL part types it instantiates
+        self.chip_keys: Dict[str, str] = {}  # chip -> hash of its content and dependency closure
+        self.content_hashes: Dict[str, str] = {}  # chip -> hash of the HDL source it was built from
+        self.parse_cache: Optional[ParseCache] = ParseCache(cache_dir, native_memory) if cache_dir else None
 
     def parse_file(self, filename: str) -> Gate:
         cache_key = filename.replace('.hdl', '')
@@ -22,132 +51,332 @@ class HDLParser:
         if cache_key in self.parsed_chips:
             return self.parsed_chips[cache_key]
 
-        if filename.endswith('.hdl'):
-            filepath = os.path.join(self.base_path, filename)
+        if cache_key in self._sources:
+            return self._build_source(cache_key)
+
+        # Phase one reads and scans every file the chip needs; phase two
+        # builds them bottom-up, so no part lookup blocks on a file read.
+        scanned = self._scan_tree(cache_key)
+        try:
+            for name in self._build_order(cache_key)[:-1]:
+                self.parse_file(name)
+            return self._build_source(cache_key)
+        finally:
+            # Sources left over by a failed build would be reused on the next
+            # call even after the files change, so they are always dropped.
+            for name in scanned:
+                self._sources.pop(name, None)
+
+    def _build_source(self, cache_key: str) -> Gate:
+        source = self._sources.pop(cache_key)
+        if source.error is not None:
+            raise source.error
+
+        content_hash = ParseCache.content_hash(source.content)
+        if self.parse_cache is None:
+            chip = self._build_chip(source.chip_node or parse_hdl(source.content, f"{cache_key}.hdl"), cache_key)
         else:
-            filepath = os.path.join(self.base_path, filename + '.hdl')
-
-        with open(filepath, 'r') as file:
-            content = file.read()
-
-        chip = self._parse_hdl_content(content, cache_key)
+            chip = self._load_cached_chip(cache_key, content_hash)
+            if chip is None:
+                chip_node = source.chip_node or parse_hdl(source.content, f"{cache_key}.hdl")
+                chip = self._build_chip(chip_node, cache_key)
+                dependency_keys = {dep: self.chip_keys[dep] for dep in self.dependencies[cache_key]}
+                self.chip_keys[cache_key] = self.parse_cache.chip_key(content_hash, dependency_keys)
+                if isinstance(chip, CompositeChip):
+                    self.parse_cache.store(content_hash, self.chip_keys[cache_key], dependency_keys, chip)
+
+        self.content_hashes[cache_key] = content_hash
         self.parsed_chips[cache_key] = chip
         return chip
 
-    def _parse_hdl_content(self, content: str, filename: str) -> Gate:
-        content = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
-        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-        content = ' '.join(content.split())
-
-        chip_match = re.search(r'CHIP\s+(\w+)', content)
-        if not chip_match:
-            raise ValueError(f"No CHIP declaration found in {filename}")
-        chip_name = chip_match.group(1)
-
-        in_match = re.search(r'IN\s+([^;]+);', content)
-        inputs = []
-        if in_match:
-            inputs = [pin.strip() for pin in in_match.group(1).split(',')]
-
-        out_match = re.search(r'OUT\s+([^;]+);', content)
-        outputs = []
-        if out_match:
-            outputs = [pin.strip() for pin in out_match.group(1).split(',')]
-
-        chip = CompositeChip(chip_name, inputs, outputs)
-
-        parts_match = re.search(r'PARTS:\s*(.*)', content, re.DOTALL)
-        if parts_match:
-            parts_content = parts_match.group(1).strip()
-            self._parse_parts_section(parts_content, chip)
-
+    def _scan_file(self, name: str) -> _Source:
+        try:
+            with open(os.path.join(self.base_path, name + '.hdl'), 'r') as file:
+                content = file.read()
+        except OSError as error:
+            return _Source("", None, (), error)
+
+        if self.parse_cache is not None:
+            # A cached structure already lists its dependencies; parsing is
+            # deferred until the entry turns out to be stale.
+            entry = self.parse_cache.load(self.parse_cache.content_hash(content))
+            if entry is not None:
+                return _Source(content, None, tuple(entry["dependencies"]), None)
+
+        try:
+            chip_node = parse_hdl(content, f"{name}.hdl")
+        except HDLSyntaxError as error:
+            return _Source(content, None, (), error)
+        dependencies = tuple(dict.fromkeys(part.part_type for part in chip_node.parts
+                                           if not self._is_builtin(part.part_type)))
+        return _Source(content, chip_node, dependencies, None)
+
+    def _scan_tree(self, top: str) -> List[str]:
+        # Each file is submitted as soon as a scanned parent references it,
+        # so reads of independent files overlap. Returns the scanned chips.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._scan_file, top): top}
+            seen = {top}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    source = future.result()
+                    self._sources[name] = source
+                    for dep in source.dependencies:
+                        if dep not in seen and dep not in self.parsed_chips:
+                            seen.add(dep)
+                            pending[executor.submit(self._scan_file, dep)] = dep
+        return list(seen)
+
+    def _build_order(self, top: str) -> List[str]:
+        # Dependencies before dependents, ending with top.
+        order: List[str] = []
+        state: Dict[str, bool] = {}  # name -> finished; False while on the DFS path
+        path: List[str] = []
+
+        def visit(name: str):
+            if name in self.parsed_chips or state.get(name):
+                return
+            if name in state:
+                cycle = path[path.index(name):] + [name]
+                raise ValueError(f"Circular chip dependency: {' -> '.join(cycle)}")
+            state[name] = False
+            path.append(name)
+            for dep in self._sources[name].dependencies:
+                visit(dep)
+            path.pop()
+            state[name] = True
+            order.append(name)
+
+        visit(top)
+        return order
+
+    def _load_cached_chip(self, cache_key: str, content_hash: str) -> Optional[CompositeChip]:
+        entry = self.parse_cache.load(content_hash)
+        if entry is None:
+            self.parse_cache.misses += 1
+            return None
+
+        for dep, dep_key in entry["dependencies"].items():
+            self.parse_file(dep)
+            if self.chip_keys.get(dep) != dep_key:
+                self.parse_cache.misses += 1
+                return None
+
+        structure = entry["chip"]
+        chip = CompositeChip(structure["name"], structure["inputs"], structure["outputs"], structure["widths"])
+        for instance_name in structure["parts"]:
+            chip.add_sub_chip(instance_name, self._instantiate_part(part_type_of(instance_name)))
+        for input_pin, targets in structure["input_connections"].items():
+            for target_chip, target_pin, source_bits, target_bits in targets:
+                chip.add_input_connection(input_pin, target_chip, target_pin,
+                                          bit_range(source_bits), bit_range(target_bits))
+        for output_pin, sources in structure["output_connections"].items():
+            for source_chip, source_pin, source_bits, target_bits in sources:
+                chip.add_output_connection(output_pin, source_chip, source_pin,
+                                           bit_range(source_bits), bit_range(target_bits))
+        for source_chip, source_pin, target_chip, target_pin, source_bits, target_bits in \
+                structure["internal_connections"]:
+            chip.add_internal_connection(source_chip, source_pin, target_chip, target_pin,
+                                         bit_range(source_bits), bit_range(target_bits))
+        chip.levelize()
+
+        self.dependencies[cache_key] = list(entry["dependencies"])
+        self.chip_keys[cache_key] = entry["key"]
+        self.parse_cache.hits += 1
         return chip
 
-    def _parse_parts_section(self, parts_content: str, chip: CompositeChip):
-        part_instances = re.findall(r'(\w+)\s*\(([^)]+)\);', parts_content)
+    def _build_chip(self, chip_node: ChipNode, filename: str) -> Gate:
+        chip = CompositeChip(chip_node.name, chip_node.input_names(), chip_node.output_names(),
+                             chip_node.bus_widths())
+        self.dependencies[filename] = self._parse_parts_section(chip_node.parts, chip, f"{filename}.hdl")
+        chip.levelize()
+        return chip
 
+    def _parse_parts_section(self, parts: List[PartNode], chip: CompositeChip, filename: str) -> List[str]:
         instance_counter = {}
         all_connections = []
+        dependencies: List[str] = []
 
-        for part_type, connections_str in part_instances:
+        for part in parts:
+            part_type = part.part_type
             if part_type not in instance_counter:
                 instance_counter[part_type] = 0
             instance_name = f"{part_type}_{instance_counter[part_type]}"
             instance_counter[part_type] += 1
 
-            if is_builtin_gate(part_type):
-                sub_chip = create_builtin_gate(part_type)
-            else:
-                template = self.parse_file(part_type)
-                if isinstance(template, CompositeChip):
-                    sub_chip = self._create_chip_copy(template)
-                else:
-                    gate_type = template.__class__.__name__.replace('Gate', '')
-                    if is_builtin_gate(gate_type):
-                        sub_chip = create_builtin_gate(gate_type)
-                    else:
-                        sub_chip = template
+            sub_chip = self._instantiate_part(part_type)
+            if not self._is_builtin(part_type) and part_type not in dependencies:
+                dependencies.append(part_type)
 
             chip.add_sub_chip(instance_name, sub_chip)
 
-            connections = [conn.strip() for conn in connections_str.split(',')]
-            for connection in connections:
-                if '=' in connection:
-                    pin_name, wire_name = connection.split('=')
-                    pin_name = pin_name.strip()
-                    wire_name = wire_name.strip()
-                    all_connections.append((instance_name, sub_chip, pin_name, wire_name))
+            for connection in part.connections:
+                if connection.pin not in sub_chip.inputs and connection.pin not in sub_chip.outputs:
+                    raise HDLSyntaxError(f"{part_type} has no pin named '{connection.pin}'",
+                                         filename, connection.line, connection.column)
+                all_connections.append((instance_name, sub_chip, connection))
 
-        self._process_connections(all_connections, chip)
+        self._process_connections(all_connections, chip, filename)
+        return dependencies
 
-    def _create_chip_copy(self, template: CompositeChip) -> CompositeChip:
-        sub_chip = CompositeChip(template.name, template.inputs[:], template.outputs[:])
+    def _is_builtin(self, part_type: str) -> bool:
+        if part_type in MEMORY_GATES:
+            return self.native_memory
+        return is_builtin_gate(part_type)
 
-        for sub_name, sub_gate in template.sub_chips.items():
-            if isinstance(sub_gate, CompositeChip):
-                sub_chip.sub_chips[sub_name] = self._create_chip_copy(sub_gate)
-            else:
-                gate_type = sub_gate.__class__.__name__.replace('Gate', '')
-                if is_builtin_gate(gate_type):
-                    sub_chip.sub_chips[sub_name] = create_builtin_gate(gate_type)
-                else:
-                    sub_chip.sub_chips[sub_name] = sub_gate
+    def _instantiate_part(self, part_type: str) -> Gate:
+        if self._is_builtin(part_type):
+            return create_builtin_gate(part_type)
 
-        sub_chip.internal_connections = template.internal_connections[:]
-        sub_chip.input_connections = {k: v[:] for k, v in template.input_connections.items()}
-        sub_chip.output_connections = template.output_connections.copy()
+        template = self.parse_file(part_type)
+        if isinstance(template, CompositeChip):
+            return self._create_chip_copy(template)
+        return template.instantiate()
 
-        return sub_chip
+    def _create_chip_copy(self, template: CompositeChip) -> CompositeChip:
+        return template.instantiate()
 
-    def _process_connections(self, all_connections, chip: CompositeChip):
-        wire_connections: Dict[str, List[Tuple[str, str, bool]]] = {}
+    def _process_connections(self, all_connections, chip: CompositeChip, filename: str):
+        wire_connections: Dict[str, List[Tuple[str, PinConnection, bool, BitRange]]] = {}
+        chip_inputs = set(chip.inputs)
+        chip_outputs = set(chip.outputs)
 
-        for instance_name, sub_chip, pin_name, wire_name in all_connections:
-            if wire_name not in wire_connections:
-                wire_connections[wire_name] = []
+        for instance_name, sub_chip, connection in all_connections:
+            pin_width = sub_chip.pin_width(connection.pin)
+            pin_bits = connection.pin_bits
+            if pin_bits is not None and pin_bits[1] >= pin_width:
+                message = f"{format_bits(connection.pin, pin_bits)} is out of range for {pin_width}-bit pin"
+                raise _connection_error(filename, message, connection)
+            part_bits = pin_bits if pin_bits is not None else (0, pin_width - 1)
 
-            is_output = pin_name in sub_chip.outputs
-            wire_connections[wire_name].append((instance_name, pin_name, is_output))
+            if connection.wire not in wire_connections:
+                wire_connections[connection.wire] = []
+
+            is_output = connection.pin in sub_chip.outputs
+            wire_connections[connection.wire].append((instance_name, connection, is_output, part_bits))
 
         for wire_name, connections in wire_connections.items():
-            outputs = [(inst, pin) for inst, pin, is_out in connections if is_out]
-            inputs = [(inst, pin) for inst, pin, is_out in connections if not is_out]
-
-            if wire_name in chip.inputs:
-                for inst_name, pin_name in inputs:
-                    chip.add_input_connection(wire_name, inst_name, pin_name)
-            elif wire_name in chip.outputs:
-                if outputs:
-                    inst_name, pin_name = outputs[0]
-                    chip.add_output_connection(wire_name, inst_name, pin_name)
+            if wire_name in CONSTANT_VALUES or wire_name in chip_inputs:
+                for inst_name, connection, is_output, part_bits in connections:
+                    if is_output:
+                        kind = "constant" if wire_name in CONSTANT_VALUES else "chip input"
+                        message = f"Output pin '{connection.pin}' cannot drive {kind} '{wire_name}'"
+                        raise _connection_error(filename, message, connection)
+                    wire_bits = self._chip_wire_bits(chip, connection, part_bits, filename)
+                    chip.add_input_connection(wire_name, inst_name, connection.pin, wire_bits, connection.pin_bits)
+
+            elif wire_name in chip_outputs:
+                for inst_name, connection, is_output, part_bits in connections:
+                    if not is_output:
+                        message = f"Input pin '{connection.pin}' cannot read chip output '{wire_name}'"
+                        raise _connection_error(filename, message, connection)
+                    wire_bits = self._chip_wire_bits(chip, connection, part_bits, filename)
+                    chip.add_output_connection(wire_name, inst_name, connection.pin, connection.pin_bits, wire_bits)
+
             else:
-                if outputs and inputs:
-                    source_inst, source_pin = outputs[0]
-                    for target_inst, target_pin in inputs:
-                        chip.add_internal_connection(source_inst, source_pin, target_inst, target_pin)
+                for _, connection, _, _ in connections:
+                    if connection.wire_bits is not None:
+                        message = f"Internal wire '{wire_name}' cannot take a sub-bus"
+                        raise _connection_error(filename, message, connection)
+
+                outputs = [entry for entry in connections if entry[2]]
+                inputs = [entry for entry in connections if not entry[2]]
+                if not (outputs and inputs):
+                    continue
+
+                # Internal wires take the width of the pin slice driving them.
+                source_inst, source, _, source_bits = outputs[0]
+                wire_width = _bit_count(source_bits)
+                for target_inst, target, _, target_bits in inputs:
+                    if _bit_count(target_bits) != wire_width:
+                        message = (f"Width mismatch: {format_bits(target.pin, target.pin_bits)} has width "
+                                   f"{_bit_count(target_bits)} but wire '{wire_name}' has width {wire_width}")
+                        raise _connection_error(filename, message, target)
+                    chip.add_internal_connection(source_inst, source.pin, target_inst, target.pin,
+                                                 source.pin_bits, target.pin_bits)
+
+    @staticmethod
+    def _chip_wire_bits(chip: CompositeChip, connection: PinConnection, part_bits: BitRange,
+                        filename: str) -> Optional[BitRange]:
+        # Checks the chip-side sub-bus against the part pin slice it connects to.
+        wire_name, wire_bits = connection.wire, connection.wire_bits
+        slice_width = _bit_count(part_bits)
+
+        if wire_name in CONSTANT_VALUES:
+            if wire_bits is not None:
+                raise _connection_error(filename, f"Constant '{wire_name}' cannot take a sub-bus", connection)
+            # Constants fill whatever width the pin slice has.
+            return 0, slice_width - 1
+
+        wire_width = chip.pin_width(wire_name)
+        if wire_bits is not None and wire_bits[1] >= wire_width:
+            message = f"{format_bits(wire_name, wire_bits)} is out of range for {wire_width}-bit pin"
+            raise _connection_error(filename, message, connection)
+
+        wire_slice = wire_width if wire_bits is None else _bit_count(wire_bits)
+        if wire_slice != slice_width:
+            message = (f"Width mismatch: {format_bits(connection.pin, connection.pin_bits)} has width "
+                       f"{slice_width} but {format_bits(wire_name, wire_bits)} has width {wire_slice}")
+            raise _connection_error(filename, message, connection)
+        return wire_bits
+
+    def enable_memo(self, max_entries: int = 4096) -> List[ChipMemo]:
+        # Memoize every combinational chip parsed so far. Building a truth
+        # table looks up the part memos already enabled, so counters start
+        # from zero once all are built.
+        memos = [chip.enable_memo(max_entries) for chip in self.parsed_chips.values()
+                 if isinstance(chip, CompositeChip) and not chip.is_sequential()]
+        for memo in memos:
+            memo.clear_statistics()
+        return memos
+
+    def closure(self, name: str) -> List[str]:
+        # A parsed chip plus every HDL chip it is built from, directly or not.
+        found: List[str] = []
+        pending = [name]
+        while pending:
+            chip = pending.pop()
+            if chip not in found:
+                found.append(chip)
+                pending.extend(self.dependencies.get(chip, ()))
+        return found
+
+    def dependents(self, names: Iterable[str]) -> List[str]:
+        # The given chips plus every parsed chip built on them, directly or not.
+        users: Dict[str, List[str]] = {}
+        for chip, deps in self.dependencies.items():
+            for dep in deps:
+                users.setdefault(dep, []).append(chip)
+        found: List[str] = []
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in found:
+                found.append(name)
+                pending.extend(users.get(name, ()))
+        return found
+
+    def invalidate(self, names: Iterable[str]) -> List[str]:
+        # Forgets the chips and their dependents so the next parse_file reads
+        # them again; returns the chips that were dropped.
+        dropped = []
+        for name in self.dependents(names):
+            self._sources.pop(name, None)
+            if self.parsed_chips.pop(name, None) is not None:
+                dropped.append(name)
+            self.dependencies.pop(name, None)
+            self.chip_keys.pop(name, None)
+            self.content_hashes.pop(name, None)
+        return dropped
 
     def get_parsed_chips(self) -> Dict[str, Gate]:
         return self.parsed_chips.copy()
 
     def clear_cache(self):
-        self.parsed_chips.clear()
\ No newline at end of file
+        self.parsed_chips.clear()
+        self.dependencies.clear()
+        self.chip_keys.clear()
+        self.content_hashes.clear()
+        self._sources.clear()
\ No newline at end of file
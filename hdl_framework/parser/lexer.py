@@ -0,0 +1,117 @@
+"""
+Single-pass tokenizer for HDL source.
+
+The lexer walks the source once with a compiled master pattern, matching at
+its current offset; comments and whitespace are skipped in place, so no
+intermediate copies of the source are made. Every token carries its line,
+column and offset for error reporting.
+"""
+
+import re
+from typing import Iterator, NamedTuple
+
+# Horizontal whitespace is absorbed in front of every match so it never costs
+# a separate iteration; alternatives are ordered by how common they are.
+_TOKEN_PATTERN = re.compile(r"""
+    [ \t\r\f\v]*
+    (?:
+        (?P<IDENT>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<PUNCT>[{}()\[\];,=:])
+      | (?P<NEWLINE>\n)
+      | (?P<LINE_COMMENT>//[^\n]*)
+      | (?P<BLOCK_COMMENT>/\*.*?\*/)
+      | (?P<UNTERMINATED>/\*)
+      | (?P<NUMBER>[0-9]+)
+      | (?P<DOTDOT>\.\.)
+      | (?P<MISMATCH>.)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+IDENT = "IDENT"
+NUMBER = "NUMBER"
+EOF_KIND = "EOF"
+
+
+class HDLSyntaxError(ValueError):
+
+    def __init__(self, message: str, filename: str = "<hdl>", line: int = 0, column: int = 0):
+        super().__init__(f"{filename}:{line}:{column}: {message}")
+        self.filename = filename
+        self.line = line
+        self.column = column
+
+
+class Token(NamedTuple):
+    kind: str  # IDENT, NUMBER, EOF or the punctuation itself ("{", "..", ...)
+    value: str
+    line: int
+    column: int
+    offset: int
+
+    def __str__(self):
+        return "end of file" if self.kind == EOF_KIND else repr(self.value)
+
+
+class Lexer:
+
+    def __init__(self, content: str, filename: str = "<hdl>"):
+        self.content = content
+        self.filename = filename
+        self.pos = 0
+        self.line = 1
+        self.line_start = 0
+
+    def skip_to(self, offset: int):
+        # Move past source the parser consumed without tokenizing it.
+        newlines = self.content.count("\n", self.pos, offset)
+        if newlines:
+            self.line += newlines
+            self.line_start = self.content.rfind("\n", self.pos, offset) + 1
+        self.pos = offset
+
+    def next_token(self) -> Token:
+        content = self.content
+        match_at = _TOKEN_PATTERN.match
+
+        while True:
+            match = match_at(content, self.pos)
+            if match is None:
+                self.pos = len(content)
+                return Token(EOF_KIND, "", self.line, self.pos - self.line_start + 1, self.pos)
+
+            kind = match.lastgroup
+            start = match.start(kind)
+            self.pos = match.end()
+
+            if kind == "IDENT":
+                return Token(IDENT, match.group(kind), self.line, start - self.line_start + 1, start)
+            elif kind == "PUNCT" or kind == "DOTDOT":
+                value = match.group(kind)
+                return Token(value, value, self.line, start - self.line_start + 1, start)
+            elif kind == "NEWLINE":
+                self.line += 1
+                self.line_start = self.pos
+            elif kind == "LINE_COMMENT":
+                continue
+            elif kind == "NUMBER":
+                return Token(NUMBER, match.group(kind), self.line, start - self.line_start + 1, start)
+            elif kind == "BLOCK_COMMENT":
+                newlines = content.count("\n", start, self.pos)
+                if newlines:
+                    self.line += newlines
+                    self.line_start = content.rfind("\n", start, self.pos) + 1
+            elif kind == "UNTERMINATED":
+                raise HDLSyntaxError("Unterminated block comment", self.filename, self.line,
+                                     start - self.line_start + 1)
+            else:
+                raise HDLSyntaxError(f"Unexpected character {match.group(kind)!r}", self.filename, self.line,
+                                     start - self.line_start + 1)
+
+
+def tokenize(content: str, filename: str = "<hdl>") -> Iterator[Token]:
+    lexer = Lexer(content, filename)
+    while True:
+        token = lexer.next_token()
+        yield token
+        if token.kind == EOF_KIND:
+            return
@@ -0,0 +1,99 @@
+"""
+Persistent on-disk cache of parsed chip structures.
+
+Entries are stored as JSON files named after the SHA-256 of the HDL source.
+Each entry records the keys of the HDL chips it depends on; a chip's key is
+the hash of its own content combined with its dependencies' keys, so editing
+Not.hdl invalidates Mux but leaves unrelated chips cached. Which parts are
+built-in depends on the parser's native_memory flag, so entries written with
+RAM*/ROM32K parsed from HDL are kept apart from the native-memory ones.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+from ..core.composite_chip import CompositeChip
+from ..utils.bus import BitRange
+from ..utils.json_store import clear_json_entries, write_json_atomic
+
+CACHE_FORMAT_VERSION = 3
+
+
+class ParseCache:
+
+    def __init__(self, cache_dir: str, native_memory: bool = True):
+        self.cache_dir = os.path.join(cache_dir, "parse")
+        self.native_memory = native_memory
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @staticmethod
+    def chip_key(content_hash: str, dependency_keys: Dict[str, str]) -> str:
+        digest = hashlib.sha256(content_hash.encode())
+        for name in sorted(dependency_keys):
+            digest.update(f"|{name}={dependency_keys[name]}".encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, content_hash: str) -> str:
+        suffix = "" if self.native_memory else "-hdl-memory"
+        return os.path.join(self.cache_dir, f"{content_hash}{suffix}.json")
+
+    def load(self, content_hash: str) -> Optional[Dict]:
+        try:
+            with open(self._entry_path(content_hash), 'r') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return entry
+
+    def store(self, content_hash: str, key: str, dependency_keys: Dict[str, str], chip: CompositeChip):
+        entry = {
+            "version": CACHE_FORMAT_VERSION,
+            "key": key,
+            "dependencies": dependency_keys,
+            "chip": serialize_structure(chip)
+        }
+        write_json_atomic(self._entry_path(content_hash), entry)
+
+    def clear(self):
+        clear_json_entries(self.cache_dir)
+
+
+def serialize_structure(chip: CompositeChip) -> Dict:
+    return {
+        "name": chip.name,
+        "inputs": chip.inputs,
+        "outputs": chip.outputs,
+        "widths": chip.widths,
+        "parts": list(chip.parts),
+        "input_connections": {
+            pin: [[conn.target_chip, conn.target_pin, conn.source_bits, conn.target_bits] for conn in connections]
+            for pin, connections in chip.input_connections.items()
+        },
+        "output_connections": {
+            pin: [[conn.source_chip, conn.source_pin, conn.source_bits, conn.target_bits] for conn in connections]
+            for pin, connections in chip.output_connections.items()
+        },
+        "internal_connections": [
+            [conn.source_chip, conn.source_pin, conn.target_chip, conn.target_pin,
+             conn.source_bits, conn.target_bits]
+            for conn in chip.internal_connections
+        ]
+    }
+
+
+def bit_range(value: Optional[List[int]]) -> Optional[BitRange]:
+    # JSON turns bit-range tuples into lists.
+    return None if value is None else (value[0], value[1])
+
+
+def part_type_of(instance_name: str) -> str:
+    # Instances are named <PartType>_<index> by the parser.
+    return instance_name.rsplit('_', 1)[0]
@@ -0,0 +1,207 @@
+"""
+Recursive-descent parser that turns HDL source into a ChipNode.
+
+Grammar:
+    chip        := 'CHIP' IDENT '{' section* '}'
+    section     := 'IN' pin_list ';' | 'OUT' pin_list ';' | 'PARTS' ':' part*
+    pin_list    := pin (',' pin)*
+    pin         := IDENT ['[' NUMBER ']']
+    part        := IDENT '(' [connection (',' connection)*] ')' ';'
+    connection  := IDENT [subscript] '=' IDENT [subscript]
+    subscript   := '[' NUMBER ['..' NUMBER] ']'
+
+Parts are by far the most common statement, so a part written without
+comments is matched in one step by a single pattern anchored at the current
+offset. Anything else falls back to token-by-token parsing; either way the
+source is consumed strictly left to right.
+"""
+
+import re
+from typing import List, Optional
+from ..utils.bus import BitRange
+from .lexer import Lexer, Token, HDLSyntaxError, IDENT, NUMBER, EOF_KIND
+from .hdl_ast import ChipNode, PartNode, PinConnection, PinDecl
+
+_NAME = r"[A-Za-z_][A-Za-z0-9_]*"
+_SUBSCRIPT = r"\[\s*([0-9]+)\s*(?:\.\.\s*([0-9]+)\s*)?\]"
+_CONNECTION = rf"\s*{_NAME}\s*(?:{_SUBSCRIPT}\s*)?=\s*{_NAME}\s*(?:{_SUBSCRIPT}\s*)?"
+_FAST_PART = re.compile(rf"({_NAME})\s*\(((?:{_CONNECTION},)*{_CONNECTION})\)[ \t\r\f\v]*;\s*")
+_FAST_CONNECTION = re.compile(rf"({_NAME})\s*(?:{_SUBSCRIPT}\s*)?=\s*({_NAME})(?:\s*{_SUBSCRIPT})?")
+
+
+class _SyntaxParser:
+
+    def __init__(self, content: str, filename: str):
+        self.content = content
+        self.filename = filename
+        self.lexer = Lexer(content, filename)
+        self.current = self.lexer.next_token()
+
+    def error(self, message: str, token: Optional[Token] = None) -> HDLSyntaxError:
+        token = token or self.current
+        return HDLSyntaxError(message, self.filename, token.line, token.column)
+
+    def advance(self) -> Token:
+        token = self.current
+        if token.kind != EOF_KIND:
+            self.current = self.lexer.next_token()
+        return token
+
+    def expect(self, kind: str, description: Optional[str] = None) -> Token:
+        if self.current.kind != kind:
+            raise self.error(f"Expected {description or repr(kind)}, found {self.current}")
+        return self.advance()
+
+    def at_keyword(self, keyword: str) -> bool:
+        return self.current.kind == IDENT and self.current.value == keyword
+
+    def parse_chip(self) -> ChipNode:
+        if not self.at_keyword("CHIP"):
+            raise self.error(f"Expected CHIP declaration, found {self.current}")
+        start = self.advance()
+        name = self.expect(IDENT, "chip name").value
+        chip = ChipNode(name, line=start.line, column=start.column)
+        self.expect("{")
+
+        while self.current.kind != "}":
+            if self.at_keyword("IN"):
+                self.advance()
+                chip.inputs.extend(self.parse_pin_list())
+            elif self.at_keyword("OUT"):
+                self.advance()
+                chip.outputs.extend(self.parse_pin_list())
+            elif self.at_keyword("PARTS"):
+                self.advance()
+                self.expect(":")
+                self.parse_parts(chip.parts)
+            else:
+                raise self.error(f"Expected IN, OUT, PARTS or '}}', found {self.current}")
+
+        self.expect("}")
+        if self.current.kind != EOF_KIND:
+            raise self.error(f"Unexpected {self.current} after end of chip")
+        return chip
+
+    def parse_pin_list(self) -> List[PinDecl]:
+        pins = [self.parse_pin()]
+        while self.current.kind == ",":
+            self.advance()
+            pins.append(self.parse_pin())
+        self.expect(";")
+        return pins
+
+    def parse_pin(self) -> PinDecl:
+        token = self.expect(IDENT, "pin name")
+        width = 1
+        if self.current.kind == "[":
+            self.advance()
+            width_token = self.expect(NUMBER, "bus width")
+            width = int(width_token.value)
+            if width < 1:
+                raise self.error(f"Bus width must be at least 1, got {width}", width_token)
+            self.expect("]")
+        return PinDecl(token.value, token.line, token.column, width)
+
+    def parse_subscript(self) -> Optional[BitRange]:
+        if self.current.kind != "[":
+            return None
+        start = self.advance()
+        low = int(self.expect(NUMBER, "bit index").value)
+        high = low
+        if self.current.kind == "..":
+            self.advance()
+            high = int(self.expect(NUMBER, "bit index").value)
+        self.expect("]")
+        return self._bit_range(low, high, start)
+
+    def _bit_range(self, low: int, high: int, token: Token) -> BitRange:
+        if low > high:
+            raise self.error(f"Sub-bus [{low}..{high}] has its bounds reversed", token)
+        return low, high
+
+    def parse_parts(self, parts: List[PartNode]):
+        while self.current.kind == IDENT:
+            match = _FAST_PART.match(self.content, self.current.offset)
+            if match is None:
+                parts.append(self.parse_part())
+            else:
+                self._parse_parts_fast(match, parts)
+
+    def _parse_parts_fast(self, match, parts: List[PartNode]):
+        # Consume a run of comment-free parts without tokenizing them,
+        # tracking line numbers by counting newlines between matches.
+        content = self.content
+        fast_part = _FAST_PART.match
+        fast_connections = _FAST_CONNECTION.finditer
+        token = self.current
+        position = token.offset
+        line = token.line
+        line_start = position - token.column + 1
+
+        while match is not None:
+            start = match.start()
+            newlines = content.count("\n", position, start)
+            if newlines:
+                line += newlines
+                line_start = content.rfind("\n", position, start) + 1
+            part_line = line
+            part_column = start - line_start + 1
+            position = start
+
+            connections = []
+            for connection in fast_connections(content, match.start(2), match.end(2)):
+                start = connection.start()
+                newlines = content.count("\n", position, start)
+                if newlines:
+                    line += newlines
+                    line_start = content.rfind("\n", position, start) + 1
+                position = start
+                pin_low, pin_high, wire, wire_low, wire_high = connection.group(2, 3, 4, 5, 6)
+                column = start - line_start + 1
+                pin_bits = wire_bits = None
+                if pin_low is not None:
+                    pin_bits = self._fast_bit_range(pin_low, pin_high, line, column)
+                if wire_low is not None:
+                    wire_bits = self._fast_bit_range(wire_low, wire_high, line, column)
+                connections.append(PinConnection(connection.group(1), wire, line, column, pin_bits, wire_bits))
+
+            parts.append(PartNode(match.group(1), tuple(connections), part_line, part_column))
+            end = match.end()
+            match = fast_part(content, end)
+
+        self.lexer.skip_to(end)
+        self.current = self.lexer.next_token()
+
+    def _fast_bit_range(self, low: str, high: Optional[str], line: int, column: int) -> BitRange:
+        low_value = int(low)
+        high_value = low_value if high is None else int(high)
+        if low_value > high_value:
+            raise HDLSyntaxError(f"Sub-bus [{low_value}..{high_value}] has its bounds reversed",
+                                 self.filename, line, column)
+        return low_value, high_value
+
+    def parse_part(self) -> PartNode:
+        token = self.current
+        self.advance()
+        connections = []
+        self.expect("(")
+        if self.current.kind != ")":
+            connections.append(self.parse_connection())
+            while self.current.kind == ",":
+                self.advance()
+                connections.append(self.parse_connection())
+        self.expect(")")
+        self.expect(";")
+        return PartNode(token.value, tuple(connections), token.line, token.column)
+
+    def parse_connection(self) -> PinConnection:
+        pin = self.expect(IDENT, "pin name")
+        pin_bits = self.parse_subscript()
+        self.expect("=")
+        wire = self.expect(IDENT, "wire name")
+        wire_bits = self.parse_subscript()
+        return PinConnection(pin.value, wire.value, pin.line, pin.column, pin_bits, wire_bits)
+
+
+def parse_hdl(content: str, filename: str = "<hdl>") -> ChipNode:
+    return _SyntaxParser(content, filename).parse_chip()
@@ -0,0 +1,21 @@
+"""
+Simulation backends that operate on compiled chip representations.
+"""
+
+from .netlist import Netlist, Primitive, FlipFlop, Memory, flatten_chip
+from .codegen import CompiledChip, compile_chip, compile_netlist, generate_source
+from .numpy_backend import NumpyEvaluator, numpy_available
+from .event_driven import EventSimulator
+from .clocked import ClockedSimulator
+from .optimize import OptimizationReport, optimize_netlist, measure_speedup
+from .truth_table import TruthTable, truth_table
+from .bdd import BDD, EquivalenceResult, check_equivalence
+
+__all__ = [
+    "Netlist", "Primitive", "FlipFlop", "Memory", "flatten_chip",
+    "CompiledChip", "compile_chip", "compile_netlist", "generate_source",
+    "NumpyEvaluator", "numpy_available",
+    "EventSimulator", "ClockedSimulator",
+    "OptimizationReport", "optimize_netlist", "measure_speedup",
+    "TruthTable", "truth_table", "BDD", "EquivalenceResult", "check_equivalence"
+]
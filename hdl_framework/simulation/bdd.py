@@ -0,0 +1,234 @@
+"""
+Equivalence checking of combinational chips.
+
+Two chips are equivalent when they compute the same outputs for every
+input. Small chips are compared through their exhaustive truth tables.
+Larger ones are compared symbolically: every output bit of both flattened
+netlists is built as a reduced ordered binary decision diagram (BDD) in one
+shared manager. Reduced BDDs over the same variable order are canonical, so
+the chips agree exactly when each pair of output bits is the same node, and
+a proof costs the size of the diagrams rather than 2^n simulations.
+
+The variable order decides that size. Narrow control pins (sel, load, ...)
+come first, then the widest buses interleaved bit by bit starting at bit 0,
+which keeps adders, incrementers and multiplexers linear in their width.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from ..core.gate import Gate
+from .netlist import Netlist, flatten_chip, NAND, NOT, AND, OR, CONST_TRUE
+from .truth_table import TruthTable, netlist_truth_table
+
+EXHAUSTIVE_INPUT_BITS = 16  # method="auto" enumerates up to this many input bits
+MAX_NODES = 2_000_000
+
+FALSE = 0
+TRUE = 1
+
+_AND, _OR, _XOR = 0, 1, 2
+
+
+class BDD:
+    # Nodes are ints: 0 and 1 are the terminals, every other node is
+    # (var, low, high) in self.nodes, made unique through self.unique.
+
+    def __init__(self, variables: int, max_nodes: int = MAX_NODES):
+        self.variables = variables
+        self.max_nodes = max_nodes
+        self.nodes: List[Tuple[int, int, int]] = [(variables, FALSE, FALSE), (variables, TRUE, TRUE)]
+        self.unique: Dict[Tuple[int, int, int], int] = {}
+        self.cache: Dict[Tuple[int, int, int], int] = {}
+        self.negated: Dict[int, int] = {}
+
+    def var(self, index: int) -> int:
+        return self.node(index, FALSE, TRUE)
+
+    def node(self, var: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (var, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            if len(self.nodes) >= self.max_nodes:
+                raise ValueError(f"BDD grew past {self.max_nodes} nodes; the chip is too large to check symbolically")
+            node = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = node
+        return node
+
+    def negate(self, u: int) -> int:
+        if u <= TRUE:
+            return TRUE - u
+        result = self.negated.get(u)
+        if result is None:
+            var, low, high = self.nodes[u]
+            result = self.node(var, self.negate(low), self.negate(high))
+            self.negated[u] = result
+        return result
+
+    def apply(self, op: int, u: int, v: int) -> int:
+        if op == _AND:
+            if u == FALSE or v == FALSE:
+                return FALSE
+            if u == TRUE or u == v:
+                return v
+            if v == TRUE:
+                return u
+        elif op == _OR:
+            if u == TRUE or v == TRUE:
+                return TRUE
+            if u == FALSE or u == v:
+                return v
+            if v == FALSE:
+                return u
+        else:
+            if u == v:
+                return FALSE
+            if u == FALSE:
+                return v
+            if v == FALSE:
+                return u
+            if u == TRUE:
+                return self.negate(v)
+            if v == TRUE:
+                return self.negate(u)
+        if u > v:  # every op is commutative
+            u, v = v, u
+        key = (op, u, v)
+        result = self.cache.get(key)
+        if result is None:
+            u_var, u_low, u_high = self.nodes[u]
+            v_var, v_low, v_high = self.nodes[v]
+            var = min(u_var, v_var)
+            if u_var != var:
+                u_low = u_high = u
+            if v_var != var:
+                v_low = v_high = v
+            result = self.node(var, self.apply(op, u_low, v_low), self.apply(op, u_high, v_high))
+            self.cache[key] = result
+        return result
+
+    def satisfy(self, u: int) -> Optional[Dict[int, bool]]:
+        # One assignment that makes u true (unlisted variables are free), or
+        # None when u is FALSE. Every non-FALSE node has a path to TRUE.
+        if u == FALSE:
+            return None
+        assignment = {}
+        while u != TRUE:
+            var, low, high = self.nodes[u]
+            assignment[var] = low == FALSE
+            u = high if assignment[var] else low
+        return assignment
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+class EquivalenceResult(NamedTuple):
+    equivalent: bool
+    method: str  # "exhaustive" or "bdd"
+    counterexample: Optional[Dict[str, int]]  # inputs on which the chips differ
+    outputs_a: Optional[Dict[str, int]]
+    outputs_b: Optional[Dict[str, int]]
+    nodes: int  # BDD nodes built, 0 for an exhaustive check
+
+
+def variable_order(netlist: Netlist) -> List[Tuple[str, int]]:
+    # (pin, bit) for each BDD variable, in order.
+    widest = max((len(wires) for wires in netlist.inputs.values()), default=0)
+    order = [(pin, bit) for pin, wires in netlist.inputs.items() if len(wires) < widest
+             for bit in range(len(wires))]
+    buses = [pin for pin, wires in netlist.inputs.items() if len(wires) == widest]
+    order.extend((pin, bit) for bit in range(widest) for pin in buses)
+    return order
+
+
+def build_outputs(bdd: BDD, netlist: Netlist, variables: Dict[Tuple[str, int], int]) -> Dict[str, List[int]]:
+    # The BDD of every output bit, given the variable index of each input bit.
+    values = [FALSE] * netlist.wire_count
+    values[CONST_TRUE] = TRUE
+    for pin, wires in netlist.inputs.items():
+        for bit, wire in enumerate(wires):
+            values[wire] = bdd.var(variables[(pin, bit)])
+    for op, a, b, out in netlist.gates:
+        if op == NAND:
+            values[out] = bdd.negate(bdd.apply(_AND, values[a], values[b]))
+        elif op == NOT:
+            values[out] = bdd.negate(values[a])
+        elif op == AND:
+            values[out] = bdd.apply(_AND, values[a], values[b])
+        elif op == OR:
+            values[out] = bdd.apply(_OR, values[a], values[b])
+        else:
+            raise ValueError(f"{netlist.name} reads memory, which the BDD engine does not model")
+    return {pin: [values[wire] for wire in wires] for pin, wires in netlist.outputs.items()}
+
+
+def _check_comparable(a: Netlist, b: Netlist):
+    for netlist in (a, b):
+        if netlist.is_sequential() or netlist.memories:
+            raise ValueError(f"{netlist.name} has clocked elements or memory; "
+                             f"equivalence checking needs combinational chips")
+    for kind, pins_a, pins_b in (("input", a.inputs, b.inputs), ("output", a.outputs, b.outputs)):
+        widths_a = {pin: len(wires) for pin, wires in pins_a.items()}
+        widths_b = {pin: len(wires) for pin, wires in pins_b.items()}
+        if widths_a != widths_b:
+            raise ValueError(f"{a.name} and {b.name} have different {kind} pins: {widths_a} vs {widths_b}")
+
+
+def _exhaustive(a: Netlist, b: Netlist) -> EquivalenceResult:
+    table_a = netlist_truth_table(a)
+    table_b = netlist_truth_table(b)
+    rows = table_a.rows
+    differences = 0
+    for pin, width in table_a.outputs:
+        difference = table_a.planes[pin] ^ table_b.planes[pin]
+        for i in range(width):
+            differences |= difference >> i * rows
+    differences &= (1 << rows) - 1
+    if not differences:
+        return EquivalenceResult(True, "exhaustive", None, None, None, 0)
+    row = (differences & -differences).bit_length() - 1
+    return EquivalenceResult(False, "exhaustive", table_a.input_values(row), _row_outputs(table_a, row),
+                             _row_outputs(table_b, row), 0)
+
+
+def _row_outputs(table: TruthTable, row: int) -> Dict[str, int]:
+    return {pin: table.output(pin, row) for pin, _ in table.outputs}
+
+
+def _symbolic(a: Netlist, b: Netlist, max_nodes: int) -> EquivalenceResult:
+    order = variable_order(a)
+    variables = {pin_bit: index for index, pin_bit in enumerate(order)}
+    bdd = BDD(len(order), max_nodes)
+    outputs_a = build_outputs(bdd, a, variables)
+    outputs_b = build_outputs(bdd, b, variables)
+    for pin, bits in outputs_a.items():
+        for u, v in zip(bits, outputs_b[pin]):
+            if u != v:
+                assignment = bdd.satisfy(bdd.apply(_XOR, u, v))
+                counterexample = {pin: 0 for pin in a.inputs}
+                for var, value in assignment.items():
+                    input_pin, bit = order[var]
+                    counterexample[input_pin] |= value << bit
+                return EquivalenceResult(False, "bdd", counterexample, a.evaluate(counterexample),
+                                         b.evaluate(counterexample), len(bdd))
+    return EquivalenceResult(True, "bdd", None, None, None, len(bdd))
+
+
+def check_equivalence(chip_a: Gate, chip_b: Gate, method: str = "auto",
+                      max_nodes: int = MAX_NODES) -> EquivalenceResult:
+    a = flatten_chip(chip_a)
+    b = flatten_chip(chip_b)
+    _check_comparable(a, b)
+    # Truth-table rows follow the input pin order, so give b the order of a.
+    b.inputs = {pin: b.inputs[pin] for pin in a.inputs}
+
+    if method == "auto":
+        input_bits = sum(len(wires) for wires in a.inputs.values())
+        method = "exhaustive" if input_bits <= EXHAUSTIVE_INPUT_BITS else "bdd"
+    if method == "exhaustive":
+        return _exhaustive(a, b)
+    if method == "bdd":
+        return _symbolic(a, b, max_nodes)
+    raise ValueError(f"Unknown method '{method}', expected auto, bdd or exhaustive")
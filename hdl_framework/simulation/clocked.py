@@ -0,0 +1,155 @@
+"""
+Clocked simulation of sequential chips.
+
+The flattened netlist's combinational logic is compiled into one
+straight-line function of the inputs and the flip-flop state (see codegen).
+Between clock edges that function is the whole evaluation: gates run in
+levelized order once per call. tick() evaluates and samples every flip-flop
+input, and tock() commits all sampled values as the new state in one batch
+before evaluating again, matching the Nand2Tetris tick/tock convention.
+
+RAM contents live in array('H') buffers bound to the compiled function as
+globals; a write sampled on tick is stored on tock with one index assignment.
+"""
+
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from ..core.gate import Gate
+from ..utils.memory_image import load_memory_image
+from .codegen import build_function
+from .netlist import Netlist, flatten_chip
+
+
+class ClockedSimulator:
+
+    def __init__(self, netlist: Netlist):
+        self.netlist = netlist
+        self.name = netlist.name
+        self.inputs: List[str] = list(netlist.inputs)
+        self.outputs: List[str] = list(netlist.outputs)
+        self.source, self.function = build_function(netlist, "step")
+        self._globals = self.function.__globals__
+        self._writable = [index for index, memory in enumerate(netlist.memories) if memory.writable]
+        self._sequential = netlist.is_sequential()
+        self._args: List[int] = [0] * len(self.inputs)
+        self._gates_per_eval = netlist.gate_count()
+        self.gate_evaluations = 0
+        self.reset()
+
+    @classmethod
+    def from_chip(cls, chip: Gate) -> "ClockedSimulator":
+        return cls(flatten_chip(chip))
+
+    def reset(self):
+        self.state: List[int] = [0] * len(self.netlist.flip_flops)
+        self.sampled: Optional[List[int]] = None
+        self.cycle = 0
+        self.output_values: Dict[str, int] = {}
+        self._next_state: List[int] = self.state
+        self._writes: Tuple = ()
+        self._sampled_writes: Tuple = ()
+        # RAM starts from the netlist's contents (usually zeros) on every
+        # reset; ROM images are read-only and stay shared.
+        self.memories: List[Sequence[int]] = []
+        for index, memory in enumerate(self.netlist.memories):
+            contents = array('H', memory.contents) if memory.writable else memory.contents
+            self.memories.append(contents)
+            self._globals[f"mem{index}"] = contents
+        self.eval()
+
+    @property
+    def time(self) -> str:
+        # Nand2Tetris notation: "3+" after the fourth tick, "4" after its tock.
+        return f"{self.cycle}+" if self.sampled is not None else str(self.cycle)
+
+    def set_input(self, pin_name: str, value: int):
+        if pin_name not in self.netlist.inputs:
+            raise ValueError(f"Input pin '{pin_name}' not found in {self.name}")
+        self._args[self.inputs.index(pin_name)] = value & ((1 << len(self.netlist.inputs[pin_name])) - 1)
+
+    def set_inputs(self, values: Dict[str, int]):
+        for pin_name, value in values.items():
+            self.set_input(pin_name, value)
+
+    def _memory_index(self, name: str) -> int:
+        for index, memory in enumerate(self.netlist.memories):
+            if memory.name == name:
+                return index
+        raise ValueError(f"No memory named '{name}' in {self.name}")
+
+    def memory(self, name: str) -> Sequence[int]:
+        # Contents of a RAM/ROM by instance path, e.g. "RAM8_0" or "Memory_0.RAM16K_0".
+        return self.memories[self._memory_index(name)]
+
+    def load_memory(self, name: str, filename: str):
+        index = self._memory_index(name)
+        contents = load_memory_image(filename, len(self.memories[index]))
+        if self.netlist.memories[index].writable:
+            contents = array('H', contents)
+        self.memories[index] = contents
+        self._globals[f"mem{index}"] = contents
+        self.eval()
+
+    def eval(self) -> Dict[str, int]:
+        if self._sequential:
+            results, self._next_state, self._writes = self.function(self.state, *self._args)
+        else:
+            results = self.function(*self._args)
+        self.gate_evaluations += self._gates_per_eval
+        self.output_values = dict(zip(self.outputs, results))
+        return self.output_values
+
+    def tick(self) -> Dict[str, int]:
+        outputs = self.eval()
+        self.sampled = self._next_state
+        self._sampled_writes = self._writes
+        return outputs
+
+    def tock(self) -> Dict[str, int]:
+        if self.sampled is None:
+            self.tick()
+        self.state = self.sampled
+        self.sampled = None
+        self._commit(self._sampled_writes)
+        self.cycle += 1
+        return self.eval()
+
+    def _commit(self, writes: Tuple):
+        for index, (load, address, value) in zip(self._writable, writes):
+            if load:
+                self.memories[index][address] = value
+
+    def step(self, inputs: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        if inputs:
+            self.set_inputs(inputs)
+        self.tick()
+        return self.tock()
+
+    def run(self, cycles: int, inputs: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        # Full clock cycles with fixed inputs, without per-edge bookkeeping.
+        if inputs:
+            self.set_inputs(inputs)
+        if self._sequential and cycles > 0:
+            function: Callable = self.function
+            args = self._args
+            state = self.state
+            if self._writable:
+                commit = self._commit
+                for _ in range(cycles):
+                    _, state, writes = function(state, *args)
+                    commit(writes)
+            else:
+                for _ in range(cycles):
+                    state = function(state, *args)[1]
+            self.state = state
+            self.sampled = None
+            self.cycle += cycles
+            self.gate_evaluations += self._gates_per_eval * cycles
+        return self.eval()
+
+    def __str__(self):
+        return (f"ClockedSimulator(name={self.name}, gates={self._gates_per_eval}, "
+                f"flip_flops={len(self.state)}, memories={len(self.memories)}, time={self.time})")
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,149 @@
+"""
+Compile a flattened netlist into a straight-line Python function.
+
+Every primitive becomes one assignment such as ``w7 = mask ^ (w2 & w3)``, so
+evaluating a chip is a single call with no dict lookups or method dispatch.
+The trailing ``mask`` argument defaults to 1; passing a wider mask evaluates
+packed vectors, one per bit, in the same call. Bus pins are passed and
+returned as single packed ints (bus-major, ``width`` vectors per bus bit)
+and split into bit wires inside the function.
+
+For netlists with flip-flops or RAM the function takes the current state as
+its first argument and returns ``(outputs, next_state, writes)``: next_state
+holds each flip-flop's input and writes one ``(load, address, in)`` triple per
+RAM; the clock itself is driven by ClockedSimulator. Memories are module
+globals ``mem0``, ``mem1``, ... read with a single index, one vector at a time.
+"""
+
+from typing import Callable, Dict, List, Tuple
+from ..core.gate import Gate
+from .netlist import Netlist, flatten_chip, NAND, NOT, AND, READ, CONST_FALSE, CONST_TRUE
+
+
+class CompiledChip:
+
+    def __init__(self, netlist: Netlist, source: str, function: Callable[..., Tuple[int, ...]]):
+        self.name = netlist.name
+        self.inputs: List[str] = list(netlist.inputs)
+        self.outputs: List[str] = list(netlist.outputs)
+        self.input_widths: List[int] = [len(wires) for wires in netlist.inputs.values()]
+        self.source = source
+        self.function = function
+
+    def __call__(self, *args: int) -> Tuple[int, ...]:
+        return self.function(*args)
+
+    def evaluate(self, inputs: Dict[str, int]) -> Dict[str, int]:
+        results = self.function(*[inputs.get(pin, 0) for pin in self.inputs])
+        return dict(zip(self.outputs, results))
+
+    def simulate_batch(self, inputs: Dict[str, int], width: int) -> Dict[str, int]:
+        args = [inputs.get(pin, 0) & ((1 << bus_width * width) - 1)
+                for pin, bus_width in zip(self.inputs, self.input_widths)]
+        results = self.function(*args, (1 << width) - 1, width)
+        return dict(zip(self.outputs, results))
+
+    def __str__(self):
+        return f"CompiledChip(name={self.name}, inputs={self.inputs}, outputs={self.outputs})"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _operand(wire: int) -> str:
+    if wire == CONST_FALSE:
+        return "0"
+    if wire == CONST_TRUE:
+        return "mask"
+    return f"w{wire}"
+
+
+def _offset(i: int) -> str:
+    # Bit i of a bus starts at bit i * width of its packed value.
+    return "width" if i == 1 else f"{i} * width"
+
+
+def _pack_operand(wires: List[int]) -> str:
+    if len(wires) == 1:
+        return _operand(wires[0])
+    terms = [_operand(wire) if i == 0 else f"{_operand(wire)} << {_offset(i)}"
+             for i, wire in enumerate(wires) if wire != CONST_FALSE]
+    return f"({' | '.join(terms)})" if terms else "0"
+
+
+def _word_operand(wires: List[int]) -> str:
+    # A bus as one value for a single vector (width 1), e.g. a memory address.
+    terms = [_operand(wire) if i == 0 else f"{_operand(wire)} << {i}"
+             for i, wire in enumerate(wires) if wire != CONST_FALSE]
+    return f"({' | '.join(terms)})" if len(terms) > 1 else (terms[0] if terms else "0")
+
+
+def generate_source(netlist: Netlist, function_name: str = "chip") -> str:
+    params = []
+    unpack = []
+    for index, (pin, wires) in enumerate(netlist.inputs.items()):
+        if len(wires) == 1:
+            params.append(f"w{wires[0]}")
+            unpack.append(f"    # {pin} -> w{wires[0]}")
+            continue
+        params.append(f"bus{index}")
+        unpack.append(f"    # {pin}[{len(wires)}] -> bus{index}")
+        for i, wire in enumerate(wires):
+            shifted = f"bus{index}" if i == 0 else f"(bus{index} >> {_offset(i)})"
+            unpack.append(f"    w{wire} = {shifted} & mask")
+
+    sequential = netlist.is_sequential()
+    if sequential:
+        params.insert(0, "state")
+        unpack.append(f"    ({''.join(f'w{flip_flop.q}, ' for flip_flop in netlist.flip_flops)}) = state")
+
+    lines = [f"def {function_name}({''.join(param + ', ' for param in params)}mask=1, width=1):"]
+    lines.extend(unpack)
+
+    read: set = set()
+    for op, a, b, out in netlist.gates:
+        if op == READ:
+            if a not in read:
+                read.add(a)
+                lines.append(f"    d{a} = mem{a}[{_word_operand(netlist.memories[a].address)}]")
+            lines.append(f"    w{out} = (d{a} >> {b}) & 1" if b else f"    w{out} = d{a} & 1")
+            continue
+        if op == NAND:
+            expr = f"mask ^ ({_operand(a)} & {_operand(b)})"
+        elif op == NOT:
+            expr = f"mask ^ {_operand(a)}"
+        elif op == AND:
+            expr = f"{_operand(a)} & {_operand(b)}"
+        else:
+            expr = f"{_operand(a)} | {_operand(b)}"
+        lines.append(f"    w{out} = {expr}")
+
+    results = "".join(f"{_pack_operand(wires)}, " for wires in netlist.outputs.values())
+    if sequential:
+        next_state = "".join(f"{_operand(flip_flop.d)}, " for flip_flop in netlist.flip_flops)
+        writes = "".join(f"({_operand(memory.load)}, {_word_operand(memory.address)}, "
+                         f"{_word_operand(memory.data)}), "
+                         for memory in netlist.memories if memory.writable)
+        lines.append(f"    return ({results.rstrip()}), [{next_state.rstrip(', ')}], ({writes.rstrip()})")
+    else:
+        lines.append(f"    return ({results.rstrip()})")
+    return "\n".join(lines) + "\n"
+
+
+def build_function(netlist: Netlist, function_name: str = "chip") -> Tuple[str, Callable]:
+    source = generate_source(netlist, function_name)
+    namespace: Dict[str, object] = {f"mem{index}": memory.contents
+                                    for index, memory in enumerate(netlist.memories)}
+    exec(compile(source, f"<compiled {netlist.name}>", "exec"), namespace)
+    return source, namespace[function_name]
+
+
+def compile_netlist(netlist: Netlist) -> CompiledChip:
+    if netlist.is_sequential() or netlist.memories:
+        raise ValueError(f"{netlist.name} contains flip-flops or memory; simulate it with ClockedSimulator")
+    source, function = build_function(netlist)
+    return CompiledChip(netlist, source, function)
+
+
+def compile_chip(chip: Gate) -> CompiledChip:
+    return compile_netlist(flatten_chip(chip))
@@ -0,0 +1,113 @@
+"""
+Event-driven (selective-trace) simulation of a flattened netlist.
+
+Wire values are kept between calls. Applying a new input vector only
+schedules the gates reading inputs that actually changed; a gate whose output
+does not change schedules nothing further. Gates are dispatched in netlist
+order, which is topological, so every gate is evaluated at most once per
+vector.
+"""
+
+import heapq
+from typing import Dict, List
+from ..core.gate import Gate
+from .netlist import Netlist, flatten_chip, NAND, NOT, AND, CONST_TRUE
+
+
+class EventSimulator:
+
+    def __init__(self, netlist: Netlist):
+        if netlist.is_sequential() or netlist.memories:
+            raise ValueError(f"{netlist.name} contains flip-flops or memory; simulate it with ClockedSimulator")
+        self.netlist = netlist
+        self.fanout: List[List[int]] = [[] for _ in range(netlist.wire_count)]  # wire -> gate indices
+        for index, (op, a, b, out) in enumerate(netlist.gates):
+            self.fanout[a].append(index)
+            if b != a:
+                self.fanout[b].append(index)
+        self.values: List[int] = [0] * netlist.wire_count
+        self.clear_statistics()
+        self.reset()
+
+    @classmethod
+    def from_chip(cls, chip: Gate) -> "EventSimulator":
+        return cls(flatten_chip(chip))
+
+    def reset(self):
+        # Settle every wire for all-zero inputs with one full pass.
+        values = self.values
+        for wire in range(len(values)):
+            values[wire] = 0
+        values[CONST_TRUE] = 1
+        for op, a, b, out in self.netlist.gates:
+            values[out] = _evaluate(op, values[a], values[b])
+
+    def apply(self, inputs: Dict[str, int]) -> Dict[str, int]:
+        values = self.values
+        fanout = self.fanout
+        queue: List[int] = []
+        queued = set()
+
+        for pin, wires in self.netlist.inputs.items():
+            value = inputs.get(pin, 0)
+            for i, wire in enumerate(wires):
+                bit = (value >> i) & 1
+                if values[wire] != bit:
+                    values[wire] = bit
+                    for index in fanout[wire]:
+                        if index not in queued:
+                            queued.add(index)
+                            heapq.heappush(queue, index)
+
+        gates = self.netlist.gates
+        evaluations = 0
+        while queue:
+            op, a, b, out = gates[heapq.heappop(queue)]
+            evaluations += 1
+            result = _evaluate(op, values[a], values[b])
+            if result != values[out]:
+                values[out] = result
+                for index in fanout[out]:
+                    if index not in queued:
+                        queued.add(index)
+                        heapq.heappush(queue, index)
+
+        self.last_evaluations = evaluations
+        self.total_evaluations += evaluations
+        self.vector_count += 1
+        return self.outputs()
+
+    def outputs(self) -> Dict[str, int]:
+        values = self.values
+        outputs: Dict[str, int] = {}
+        for pin, wires in self.netlist.outputs.items():
+            value = 0
+            for i, wire in enumerate(wires):
+                value |= values[wire] << i
+            outputs[pin] = value
+        return outputs
+
+    def clear_statistics(self):
+        self.last_evaluations = 0
+        self.total_evaluations = 0
+        self.vector_count = 0
+
+    def average_evaluations(self) -> float:
+        return self.total_evaluations / self.vector_count if self.vector_count else 0.0
+
+    def __str__(self):
+        return (f"EventSimulator(name={self.netlist.name}, gates={self.netlist.gate_count()}, "
+                f"vectors={self.vector_count}, evaluations={self.total_evaluations})")
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _evaluate(op: int, a: int, b: int) -> int:
+    if op == NAND:
+        return 1 ^ (a & b)
+    if op == NOT:
+        return 1 ^ a
+    if op == AND:
+        return a & b
+    return a | b
@@ -0,0 +1,356 @@
+"""
+Flat netlist representation of a hierarchical chip.
+
+Flattening inlines every CompositeChip down to its built-in primitives, so the
+result is a single list of Nand/Not/And/Or gates over integer wire indices.
+Sub-chip pins become aliases of the wires that drive them; no buffer gates
+are introduced. A bus pin maps to a list of wires, least significant bit
+first, and 16-bit built-ins become one primitive per bit.
+
+DFFs become flip-flops whose output wire is a source like a chip input. A
+part whose output is read before it is flattened (feedback through state)
+is read through placeholder wires that are aliased to the real wires
+afterwards, and the gates are then sorted topologically at bit level.
+
+Native RAM/ROM parts become Memory blocks that keep their array contents.
+Each output bit is a READ primitive (a = memory index, b = bit) that depends
+on the memory's address wires, so reads sort like any other gate.
+"""
+
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from ..core.builtin_gates import MemoryGate
+from ..core.gate import Gate
+from ..core.composite_chip import CompositeChip
+from ..utils.bus import BitRange, CONSTANT_VALUES
+
+NAND = 0
+NOT = 1
+AND = 2
+OR = 3
+READ = 4  # bit b of memory a at its current address
+
+PRIMITIVE_TYPES: Dict[str, int] = {
+    "Nand": NAND,
+    "Not": NOT,
+    "And": AND,
+    "Or": OR
+}
+
+PRIMITIVE_NAMES: Dict[int, str] = {op: name for name, op in PRIMITIVE_TYPES.items()}
+
+BUS_PRIMITIVE_TYPES: Dict[str, int] = {f"{name}16": op for name, op in PRIMITIVE_TYPES.items()}
+
+# Wires 0 and 1 always hold constant false/true; unconnected pins read wire 0.
+CONST_FALSE = 0
+CONST_TRUE = 1
+
+
+class Primitive(NamedTuple):
+    op: int
+    a: int
+    b: int
+    out: int
+
+    def __str__(self):
+        if self.op == NOT:
+            return f"w{self.out} = Not(w{self.a})"
+        if self.op == READ:
+            return f"w{self.out} = mem{self.a}.out[{self.b}]"
+        return f"w{self.out} = {PRIMITIVE_NAMES[self.op]}(w{self.a}, w{self.b})"
+
+
+class FlipFlop(NamedTuple):
+    d: int  # sampled on tick
+    q: int  # holds the state; a source wire for combinational logic
+
+    def __str__(self):
+        return f"w{self.q} = DFF(w{self.d})"
+
+
+class Memory(NamedTuple):
+    name: str  # hierarchical instance path
+    contents: Sequence[int]  # initial words; simulators copy writable memories
+    address: List[int]
+    data: List[int]  # empty for a ROM
+    load: int  # CONST_FALSE for a ROM
+
+    @property
+    def writable(self) -> bool:
+        return bool(self.data)
+
+
+class Netlist:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wire_count = 2
+        self.gates: List[Primitive] = []
+        self.inputs: Dict[str, List[int]] = {}  # top-level input pin -> wire per bit
+        self.outputs: Dict[str, List[int]] = {}  # top-level output pin -> wire per bit
+        self.wire_names: Dict[str, int] = {}  # hierarchical pin (or pin[bit]) name -> wire
+        self.flip_flops: List[FlipFlop] = []
+        self.memories: List[Memory] = []
+
+    def new_wire(self, name: Optional[str] = None) -> int:
+        wire = self.wire_count
+        self.wire_count += 1
+        if name is not None:
+            self.wire_names[name] = wire
+        return wire
+
+    def add_gate(self, op: int, a: int, b: int, name: Optional[str] = None) -> int:
+        out = self.new_wire(name)
+        self.gates.append(Primitive(op, a, b, out))
+        return out
+
+    def names_for_wire(self, wire: int) -> List[str]:
+        return [name for name, index in self.wire_names.items() if index == wire]
+
+    def gate_count(self) -> int:
+        return len(self.gates)
+
+    def is_sequential(self) -> bool:
+        return bool(self.flip_flops) or any(memory.writable for memory in self.memories)
+
+    def gate_inputs(self, gate: Primitive) -> List[int]:
+        if gate.op == READ:
+            return self.memories[gate.a].address
+        return [gate.a] if gate.a == gate.b else [gate.a, gate.b]
+
+    def evaluate(self, inputs: Dict[str, int], width: int = 1,
+                 state: Optional[List[int]] = None) -> Dict[str, int]:
+        # With width > 1 every wire carries packed vectors: bit k is vector k,
+        # and bus values are packed bus-major as described in utils.bus.
+        # state holds one value per flip-flop and defaults to all zeros.
+        mask = (1 << width) - 1
+        values = [0] * self.wire_count
+        values[CONST_TRUE] = mask
+        if state is not None:
+            for flip_flop, value in zip(self.flip_flops, state):
+                values[flip_flop.q] = value & mask
+        for pin, wires in self.inputs.items():
+            value = inputs.get(pin, 0)
+            for i, wire in enumerate(wires):
+                values[wire] = (value >> i * width) & mask
+        if self.memories and width > 1:
+            raise ValueError(f"{self.name} reads memory, which is evaluated one vector at a time")
+
+        for op, a, b, out in self.gates:
+            if op == READ:
+                memory = self.memories[a]
+                address = sum(values[wire] << i for i, wire in enumerate(memory.address))
+                values[out] = (memory.contents[address] >> b) & 1
+            elif op == NAND:
+                values[out] = mask ^ (values[a] & values[b])
+            elif op == NOT:
+                values[out] = mask ^ values[a]
+            elif op == AND:
+                values[out] = values[a] & values[b]
+            else:
+                values[out] = values[a] | values[b]
+
+        outputs: Dict[str, int] = {}
+        for pin, wires in self.outputs.items():
+            value = 0
+            for i, wire in enumerate(wires):
+                value |= values[wire] << i * width
+            outputs[pin] = value
+        return outputs
+
+    def __str__(self):
+        return (f"Netlist(name={self.name}, wires={self.wire_count}, gates={len(self.gates)}, "
+                f"flip_flops={len(self.flip_flops)}, memories={len(self.memories)})")
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _bit_names(pin: str, width: int) -> List[str]:
+    return [pin] if width == 1 else [f"{pin}[{i}]" for i in range(width)]
+
+
+def _place(target: List[int], wires: List[int], source_bits: Optional[BitRange],
+           target_bits: Optional[BitRange]):
+    if source_bits is not None:
+        wires = wires[source_bits[0]:source_bits[1] + 1]
+    start = target_bits[0] if target_bits is not None else 0
+    target[start:start + len(wires)] = wires
+
+
+def flatten_chip(chip: Gate) -> Netlist:
+    netlist = Netlist(chip.name)
+    input_wires = {pin: [netlist.new_wire(name) for name in _bit_names(pin, chip.pin_width(pin))]
+                   for pin in chip.inputs}
+    netlist.inputs = {pin: list(wires) for pin, wires in input_wires.items()}
+
+    aliases: Dict[int, int] = {}  # placeholder wire -> wire it stands for
+    output_wires = _flatten_gate(netlist, chip, input_wires, "", aliases)
+    for pin in chip.outputs:
+        names = _bit_names(pin, chip.pin_width(pin))
+        wires = output_wires.get(pin, [CONST_FALSE] * len(names))
+        netlist.outputs[pin] = wires
+        for name, wire in zip(names, wires):
+            netlist.wire_names.setdefault(name, wire)
+
+    if aliases:
+        _resolve_aliases(netlist, aliases)
+    if aliases or netlist.flip_flops:
+        _sort_gates(netlist)
+    return netlist
+
+
+def _resolve_aliases(netlist: Netlist, aliases: Dict[int, int]):
+    def resolve(wire: int) -> int:
+        while wire in aliases:
+            wire = aliases[wire]
+        return wire
+
+    netlist.gates = [gate if gate.op == READ else Primitive(gate.op, resolve(gate.a), resolve(gate.b), gate.out)
+                     for gate in netlist.gates]
+    netlist.flip_flops = [FlipFlop(resolve(d), q) for d, q in netlist.flip_flops]
+    netlist.memories = [memory._replace(address=[resolve(wire) for wire in memory.address],
+                                        data=[resolve(wire) for wire in memory.data],
+                                        load=resolve(memory.load))
+                        for memory in netlist.memories]
+    netlist.outputs = {pin: [resolve(wire) for wire in wires] for pin, wires in netlist.outputs.items()}
+    netlist.wire_names = {name: resolve(wire) for name, wire in netlist.wire_names.items()}
+
+
+def _sort_gates(netlist: Netlist):
+    # Kahn's algorithm over wires; inputs, constants and flip-flop outputs are
+    # sources. Ties keep flattening order so output stays deterministic.
+    gates = netlist.gates
+    producer = {gate.out: index for index, gate in enumerate(gates)}
+    pending = [0] * len(gates)
+    dependents: List[List[int]] = [[] for _ in gates]
+    for index, gate in enumerate(gates):
+        for wire in set(netlist.gate_inputs(gate)):
+            if wire in producer:
+                pending[index] += 1
+                dependents[producer[wire]].append(index)
+
+    ready = deque(index for index, count in enumerate(pending) if count == 0)
+    order: List[int] = []
+    while ready:
+        index = ready.popleft()
+        order.append(index)
+        for dependent in dependents[index]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(gates):
+        stuck = [gates[index].out for index, count in enumerate(pending) if count > 0]
+        names = [name for wire in stuck[:5] for name in netlist.names_for_wire(wire)[:1]]
+        raise ValueError(f"Combinational cycle detected in {netlist.name}: {', '.join(names) or 'unnamed wires'}")
+    netlist.gates = [gates[index] for index in order]
+
+
+def _flatten_gate(netlist: Netlist, gate: Gate, input_wires: Dict[str, List[int]],
+                  path: str, aliases: Dict[int, int]) -> Dict[str, List[int]]:
+    if isinstance(gate, CompositeChip):
+        return _flatten_composite(netlist, gate, input_wires, path, aliases)
+
+    if gate.name == "DFF":
+        q = netlist.new_wire(f"{path}.out" if path else None)
+        netlist.flip_flops.append(FlipFlop(input_wires.get("in", [CONST_FALSE])[0], q))
+        return {"out": [q]}
+
+    if isinstance(gate, MemoryGate):
+        return _flatten_memory(netlist, gate, input_wires, path)
+
+    op = PRIMITIVE_TYPES.get(gate.name, BUS_PRIMITIVE_TYPES.get(gate.name))
+    if op is None:
+        raise ValueError(f"Cannot flatten gate '{gate.name}': not a built-in primitive")
+
+    width = gate.pin_width("out")
+    if op == NOT:
+        a = input_wires.get("in", [CONST_FALSE] * width)
+        b = a
+    else:
+        a = input_wires.get("a", [CONST_FALSE] * width)
+        b = input_wires.get("b", [CONST_FALSE] * width)
+
+    names = _bit_names(f"{path}.out", width) if path else [None] * width
+    return {"out": [netlist.add_gate(op, a[i], b[i], names[i]) for i in range(width)]}
+
+
+def _flatten_memory(netlist: Netlist, gate: MemoryGate, input_wires: Dict[str, List[int]],
+                    path: str) -> Dict[str, List[int]]:
+    index = len(netlist.memories)
+    writable = "in" in gate.inputs
+    netlist.memories.append(Memory(
+        path or gate.name,
+        gate.contents,
+        input_wires.get("address", [CONST_FALSE] * gate.pin_width("address")),
+        input_wires.get("in", [CONST_FALSE] * 16) if writable else [],
+        input_wires.get("load", [CONST_FALSE])[0] if writable else CONST_FALSE
+    ))
+    names = _bit_names(f"{path}.out", 16) if path else [None] * 16
+    return {"out": [netlist.add_gate(READ, index, bit, names[bit]) for bit in range(16)]}
+
+
+def _flatten_composite(netlist: Netlist, chip: CompositeChip, input_wires: Dict[str, List[int]],
+                       path: str, aliases: Dict[int, int]) -> Dict[str, List[int]]:
+    order = chip.evaluation_order if chip.evaluation_order is not None else chip.levelize()
+    if order is None:
+        order = list(chip.parts)
+
+    parts = chip.parts
+    sub_inputs: Dict[str, Dict[str, List[int]]] = {name: {} for name in parts}
+
+    def target_wires(chip_name: str, pin_name: str) -> List[int]:
+        pins = sub_inputs[chip_name]
+        if pin_name not in pins:
+            pins[pin_name] = [CONST_FALSE] * parts[chip_name].pin_width(pin_name)
+        return pins[pin_name]
+
+    for input_pin, connections in chip.input_connections.items():
+        for conn in connections:
+            if conn.target_chip not in sub_inputs:
+                continue
+            target = target_wires(conn.target_chip, conn.target_pin)
+            if input_pin in CONSTANT_VALUES:
+                wires = [CONST_TRUE if CONSTANT_VALUES[input_pin] else CONST_FALSE] * len(target)
+            else:
+                wires = input_wires.get(input_pin, [CONST_FALSE] * chip.pin_width(input_pin))
+            _place(target, wires, conn.source_bits, conn.target_bits)
+
+    sub_outputs: Dict[str, Dict[str, List[int]]] = {}
+    placeholders: Dict[str, Dict[str, List[int]]] = {}  # sub-chip -> pin -> wires read before flattening
+
+    def source_wires(chip_name: str, pin_name: str) -> Optional[List[int]]:
+        if chip_name in sub_outputs:
+            return sub_outputs[chip_name].get(pin_name)
+        pins = placeholders.setdefault(chip_name, {})
+        if pin_name not in pins:
+            pins[pin_name] = [netlist.new_wire() for _ in range(parts[chip_name].pin_width(pin_name))]
+        return pins[pin_name]
+
+    for instance_name in order:
+        for conn in chip.incoming_connections[instance_name]:
+            source = source_wires(conn.source_chip, conn.source_pin)
+            if source is not None:
+                _place(target_wires(instance_name, conn.target_pin), source, conn.source_bits, conn.target_bits)
+
+        wires = sub_inputs[instance_name]
+        instance_path = f"{path}.{instance_name}" if path else instance_name
+        for pin_name, pin_wires in wires.items():
+            for name, wire in zip(_bit_names(f"{instance_path}.{pin_name}", len(pin_wires)), pin_wires):
+                netlist.wire_names[name] = wire
+
+        sub_outputs[instance_name] = _flatten_gate(netlist, parts[instance_name], wires, instance_path, aliases)
+        for pin_name, pending in placeholders.pop(instance_name, {}).items():
+            real = sub_outputs[instance_name].get(pin_name, [CONST_FALSE] * len(pending))
+            aliases.update(zip(pending, real))
+
+    outputs: Dict[str, List[int]] = {}
+    for output_pin, connections in chip.output_connections.items():
+        wires = [CONST_FALSE] * chip.pin_width(output_pin)
+        for conn in connections:
+            source = sub_outputs.get(conn.source_chip, {}).get(conn.source_pin)
+            if source is not None:
+                _place(wires, source, conn.source_bits, conn.target_bits)
+        outputs[output_pin] = wires
+    return outputs
@@ -0,0 +1,142 @@
+"""
+NumPy backend for evaluating very large test-vector sets.
+
+Each wire of the flattened netlist holds either a bool array with one entry
+per vector or, in packed mode, a uint64 array carrying 64 vectors per word.
+Gates are applied one at a time over the whole array; bus columns hold
+integer values and are split into one array per bit. NumPy is an optional
+dependency; importing this module without it succeeds, but constructing a
+NumpyEvaluator raises ImportError.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from ..core.gate import Gate
+from ..utils.bus import parse_value
+from .netlist import Netlist, flatten_chip, NAND, NOT, AND, CONST_FALSE, CONST_TRUE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class NumpyEvaluator:
+
+    def __init__(self, chip: Gate, packed: bool = True, netlist: Optional[Netlist] = None):
+        if np is None:
+            raise ImportError("The numpy engine requires NumPy (pip install numpy)")
+        self.chip = chip
+        self.packed = packed
+        self.netlist: Netlist = netlist if netlist is not None else flatten_chip(chip)
+        if self.netlist.is_sequential() or self.netlist.memories:
+            raise ValueError(f"{chip.name} contains flip-flops or memory; the numpy engine is gate-only")
+        self._last_use = self._compute_last_use()
+
+    def _compute_last_use(self) -> Dict[int, int]:
+        last_use: Dict[int, int] = {}
+        for index, (op, a, b, out) in enumerate(self.netlist.gates):
+            last_use[a] = index
+            last_use[b] = index
+        for wires in self.netlist.outputs.values():
+            for wire in wires:
+                last_use[wire] = len(self.netlist.gates)
+        return last_use
+
+    def _pack(self, column) -> "np.ndarray":
+        packed = np.packbits(column.astype(bool), bitorder="little")
+        padding = -len(packed) % 8
+        if padding:
+            packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+        return packed.view(np.uint64)
+
+    def _unpack(self, words, count: int) -> "np.ndarray":
+        return np.unpackbits(words.view(np.uint8), bitorder="little")[:count]
+
+    def evaluate(self, inputs: "np.ndarray", input_pins: Optional[List[str]] = None) -> "np.ndarray":
+        # inputs is a (vectors x pins) array of pin values; the result is
+        # (vectors x outputs).
+        inputs = np.asarray(inputs, dtype=np.int64)
+        if inputs.ndim != 2:
+            raise ValueError(f"Expected a 2-D input array, got shape {inputs.shape}")
+        if input_pins is None:
+            input_pins = list(self.netlist.inputs)
+        if inputs.shape[1] != len(input_pins):
+            raise ValueError(f"Expected {len(input_pins)} input columns, got {inputs.shape[1]}")
+
+        count = inputs.shape[0]
+        if self.packed:
+            length = (count + 63) // 64
+            zeros = np.zeros(length, dtype=np.uint64)
+            ones = np.full(length, np.iinfo(np.uint64).max, dtype=np.uint64)
+        else:
+            zeros = np.zeros(count, dtype=bool)
+            ones = np.ones(count, dtype=bool)
+
+        values: List[Optional["np.ndarray"]] = [None] * self.netlist.wire_count
+        values[CONST_FALSE] = zeros
+        values[CONST_TRUE] = ones
+        for wires in self.netlist.inputs.values():
+            for wire in wires:
+                values[wire] = zeros
+        for column, pin in enumerate(input_pins):
+            for i, wire in enumerate(self.netlist.inputs.get(pin, ())):
+                data = (inputs[:, column] >> i) & 1
+                values[wire] = self._pack(data) if self.packed else data.astype(bool)
+
+        last_use = self._last_use
+        for index, (op, a, b, out) in enumerate(self.netlist.gates):
+            if op == NAND:
+                values[out] = ~(values[a] & values[b])
+            elif op == NOT:
+                values[out] = ~values[a]
+            elif op == AND:
+                values[out] = values[a] & values[b]
+            else:
+                values[out] = values[a] | values[b]
+            # Release intermediate arrays as soon as nothing reads them again.
+            if a > CONST_TRUE and last_use.get(a) == index:
+                values[a] = None
+            if b > CONST_TRUE and last_use.get(b) == index:
+                values[b] = None
+
+        result = np.zeros((count, len(self.netlist.outputs)), dtype=np.int64)
+        for column, wires in enumerate(self.netlist.outputs.values()):
+            for i, wire in enumerate(wires):
+                data = values[wire]
+                bits = self._unpack(data, count) if self.packed else data
+                result[:, column] |= bits.astype(np.int64) << i
+        return result
+
+    def load_vector_file(self, filename: str) -> Tuple[List[str], "np.ndarray"]:
+        with open(filename, 'r') as file:
+            header = [pin.strip() for pin in file.readline().split(',')]
+            widths = [self.chip.pin_width(pin) for pin in header]
+            if max(widths) == 1:
+                data = np.loadtxt(file, delimiter=',', dtype=np.int64, ndmin=2)
+            else:
+                # Bus columns may be binary, decimal or hex, so they are parsed per cell.
+                text = np.loadtxt(file, delimiter=',', dtype=str, ndmin=2)
+                data = np.zeros(text.shape, dtype=np.int64)
+                for column, width in enumerate(widths):
+                    data[:, column] = [parse_value(cell, width) for cell in text[:, column]]
+        if data.size == 0:
+            data = np.zeros((0, len(header)), dtype=np.int64)
+        return header, data
+
+    def failing_rows(self, header: List[str], data: "np.ndarray") -> "np.ndarray":
+        input_columns = [i for i, pin in enumerate(header) if pin in self.netlist.inputs]
+        output_columns = [i for i, pin in enumerate(header) if pin in self.netlist.outputs]
+        output_order = list(self.netlist.outputs)
+
+        actual = self.evaluate(data[:, input_columns], [header[i] for i in input_columns])
+        actual = actual[:, [output_order.index(header[i]) for i in output_columns]]
+        expected = data[:, output_columns]
+        return np.nonzero(np.any(actual != expected, axis=1))[0]
+
+    def check_file(self, filename: str) -> Tuple[int, "np.ndarray"]:
+        header, data = self.load_vector_file(filename)
+        return data.shape[0], self.failing_rows(header, data)
@@ -0,0 +1,208 @@
+"""
+Logic optimization of a flattened netlist.
+
+One forward pass over the (topologically ordered) gates folds constants,
+applies identities (x AND x = x, x AND 1 = x, x NAND x = NOT x, ...), removes
+double inversions, turns Not(Nand) / Not(And) into a single And /
+Nand, and merges structurally identical gates by hashing (op, a, b) with
+commutative operands sorted. A backward liveness pass then drops every gate
+and flip-flop that cannot reach a chip output or a RAM write port.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple, Union
+from .clocked import ClockedSimulator
+from .netlist import (Netlist, Primitive, FlipFlop, NAND, NOT, AND, OR, READ,
+                      CONST_FALSE, CONST_TRUE)
+
+_FOLDED = "folded"
+_IDENTITY = "identity"
+_INVERSION = "inversion"
+
+Simplified = Union[int, Tuple[int, int, int]]  # a wire, or the (op, a, b) left to emit
+
+
+@dataclass
+class OptimizationReport:
+    gates_before: int
+    gates_after: int = 0
+    flip_flops_before: int = 0
+    flip_flops_after: int = 0
+    constants_folded: int = 0
+    identities_applied: int = 0
+    inversions_removed: int = 0
+    gates_merged: int = 0
+    dead_gates_removed: int = 0
+
+    def reduction(self) -> float:
+        return 1 - self.gates_after / self.gates_before if self.gates_before else 0.0
+
+    def __str__(self):
+        lines = [f"Gates: {self.gates_before} -> {self.gates_after} ({self.reduction():.1%} fewer)",
+                 f"  constants folded:   {self.constants_folded}",
+                 f"  identities applied: {self.identities_applied}",
+                 f"  inversions removed: {self.inversions_removed}",
+                 f"  gates merged:       {self.gates_merged}",
+                 f"  dead gates removed: {self.dead_gates_removed}"]
+        if self.flip_flops_before:
+            lines.insert(1, f"Flip-flops: {self.flip_flops_before} -> {self.flip_flops_after}")
+        return "\n".join(lines)
+
+
+def _simplify(op: int, a: int, b: int, producers: Dict[int, Primitive]) -> Tuple[Simplified, str]:
+    # Returns the simplified gate and the first rule that changed it ("" if none).
+    if op == NOT:
+        if a == CONST_FALSE or a == CONST_TRUE:
+            return (CONST_TRUE if a == CONST_FALSE else CONST_FALSE), _FOLDED
+        source = producers.get(a)
+        if source is not None:
+            if source.op == NOT:
+                return source.a, _INVERSION
+            if source.op == NAND or source.op == AND:
+                return (AND if source.op == NAND else NAND, source.a, source.b), _INVERSION
+        return (NOT, a, a), ""
+
+    if op == NAND:
+        if a == CONST_FALSE or b == CONST_FALSE:
+            return CONST_TRUE, _FOLDED
+        if a == CONST_TRUE or b == CONST_TRUE or a == b:
+            other = b if a == CONST_TRUE else a
+            return _identity(_simplify(NOT, other, other, producers)[0])
+    elif op == AND:
+        if a == CONST_FALSE or b == CONST_FALSE:
+            return CONST_FALSE, _FOLDED
+        if a == CONST_TRUE or a == b:
+            return _identity(b)
+        if b == CONST_TRUE:
+            return _identity(a)
+    elif op == OR:
+        if a == CONST_TRUE or b == CONST_TRUE:
+            return CONST_TRUE, _FOLDED
+        if a == CONST_FALSE or a == b:
+            return _identity(b)
+        if b == CONST_FALSE:
+            return _identity(a)
+    return (op, min(a, b), max(a, b)), ""
+
+
+def _identity(result: Simplified) -> Tuple[Simplified, str]:
+    # An identity whose remaining operand is itself a constant is a fold.
+    return result, _FOLDED if result == CONST_FALSE or result == CONST_TRUE else _IDENTITY
+
+
+def optimize_netlist(netlist: Netlist) -> Tuple[Netlist, OptimizationReport]:
+    report = OptimizationReport(netlist.gate_count(), flip_flops_before=len(netlist.flip_flops))
+    replacement: Dict[int, int] = {}  # removed gate output -> wire carrying the same value
+
+    def resolve(wire: int) -> int:
+        return replacement.get(wire, wire)
+
+    producers: Dict[int, Primitive] = {}
+    structure: Dict[Tuple[int, int, int], int] = {}
+    gates: List[Primitive] = []
+    for gate in netlist.gates:
+        if gate.op == READ:
+            gates.append(gate)
+            continue
+
+        a = resolve(gate.a)
+        result, rule = _simplify(gate.op, a, a if gate.op == NOT else resolve(gate.b), producers)
+        if rule == _FOLDED:
+            report.constants_folded += 1
+        elif rule == _IDENTITY:
+            report.identities_applied += 1
+        elif rule == _INVERSION:
+            report.inversions_removed += 1
+        if isinstance(result, int):
+            replacement[gate.out] = result
+            continue
+
+        existing = structure.get(result)
+        if existing is not None:
+            replacement[gate.out] = existing
+            report.gates_merged += 1
+            continue
+        structure[result] = gate.out
+        primitive = Primitive(result[0], result[1], result[2], gate.out)
+        producers[gate.out] = primitive
+        gates.append(primitive)
+
+    optimized = Netlist(netlist.name)
+    optimized.wire_count = netlist.wire_count
+    optimized.inputs = dict(netlist.inputs)
+    optimized.outputs = {pin: [resolve(wire) for wire in wires] for pin, wires in netlist.outputs.items()}
+    optimized.memories = [memory._replace(address=[resolve(wire) for wire in memory.address],
+                                          data=[resolve(wire) for wire in memory.data],
+                                          load=resolve(memory.load))
+                          for memory in netlist.memories]
+    flip_flops = [FlipFlop(resolve(d), q) for d, q in netlist.flip_flops]
+    optimized.gates = gates
+
+    live = _live_wires(optimized, flip_flops)
+    optimized.gates = [gate for gate in gates if gate.out in live]
+    optimized.flip_flops = [flip_flop for flip_flop in flip_flops if flip_flop.q in live]
+    optimized.wire_names = {name: resolve(wire) for name, wire in netlist.wire_names.items()
+                            if resolve(wire) in live}
+
+    report.dead_gates_removed = len(gates) - len(optimized.gates)
+    report.gates_after = optimized.gate_count()
+    report.flip_flops_after = len(optimized.flip_flops)
+    return optimized, report
+
+
+def _live_wires(netlist: Netlist, flip_flops: List[FlipFlop]) -> Set[int]:
+    # Wires that can reach an output, directly or through flip-flops; RAM
+    # write ports count as outputs.
+    producer = {gate.out: gate for gate in netlist.gates}
+    state_inputs = {flip_flop.q: flip_flop.d for flip_flop in flip_flops}
+    pending = [wire for wires in netlist.outputs.values() for wire in wires]
+    for memory in netlist.memories:
+        if memory.writable:
+            pending.extend(memory.address)
+            pending.extend(memory.data)
+            pending.append(memory.load)
+
+    live: Set[int] = set()
+    while pending:
+        wire = pending.pop()
+        if wire in live:
+            continue
+        live.add(wire)
+        gate = producer.get(wire)
+        if gate is not None:
+            pending.extend(netlist.gate_inputs(gate))
+        if wire in state_inputs:
+            pending.append(state_inputs[wire])
+    return live
+
+
+def measure_speedup(original: Netlist, optimized: Netlist, vectors: int = 10000,
+                    seed: int = 0) -> Tuple[float, float]:
+    # Times both netlists on the same random vectors (clock cycles for
+    # sequential chips) and checks that every output matches. Returns
+    # (original seconds, optimized seconds).
+    rng = random.Random(seed)
+    stimulus = [{pin: rng.getrandbits(len(wires)) for pin, wires in original.inputs.items()}
+                for _ in range(vectors)]
+
+    timings = []
+    results = []
+    for netlist in (original, optimized):
+        simulator = ClockedSimulator(netlist)
+        outputs = []
+        start = time.perf_counter()
+        if netlist.is_sequential():
+            for values in stimulus:
+                outputs.append(simulator.step(values))
+        else:
+            function = simulator.function
+            for values in stimulus:
+                outputs.append(function(*[values[pin] for pin in simulator.inputs]))
+        timings.append(time.perf_counter() - start)
+        results.append(outputs)
+
+    if results[0] != results[1]:
+        raise ValueError(f"Optimized {original.name} does not match the original netlist")
+    return timings[0], timings[1]
@@ -0,0 +1,209 @@
+"""
+Exhaustive truth tables of combinational chips.
+
+Row k of a table applies input value k, split across the input pins in
+declaration order, least significant pin first. Rather than running 2^n
+single vectors, the compiled netlist is called once per chunk of up to
+2^CHUNK_BITS rows with bit-parallel inputs. Input bit i of row k is bit i of
+k, so every input plane is a fixed periodic pattern (2^i zeros, 2^i ones)
+that is built with a few big-int operations instead of packed row by row.
+
+A table can be written as a CSV in the format of hdl_test_files (so it
+doubles as a test file) or as a compact binary file: a header line, then
+each output bit as a plane of one bit per row.
+"""
+
+import json
+from typing import Dict, Iterator, List, Tuple
+from ..core.gate import Gate
+from ..utils.bus import bit_mask, unpack_words
+from .codegen import compile_netlist
+from .netlist import Netlist, flatten_chip
+
+MAX_INPUT_BITS = 24
+CHUNK_BITS = 16
+BINARY_MAGIC = b"HDLTT1\n"
+
+Pins = List[Tuple[str, int]]  # (pin, bus width)
+
+
+def _input_plane(bit: int, rows: int) -> int:
+    # Bit k of the result is bit `bit` of k, for k in [0, rows).
+    period = 1 << bit + 1
+    if period > rows:
+        return 0
+    block = bit_mask(1 << bit) << (1 << bit)  # 2^bit zeros, then 2^bit ones
+    return block * (bit_mask(rows) // bit_mask(period))
+
+
+class TruthTable:
+
+    def __init__(self, name: str, inputs: Pins, outputs: Pins, planes: Dict[str, int]):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.input_bits = sum(width for _, width in inputs)
+        self.rows = 1 << self.input_bits
+        self.planes = planes  # output pin -> values of every row, packed bus-major
+        self.widths = dict(outputs)
+        self._plane_bytes: Dict[str, List[bytes]] = {}
+
+    def plane_bytes(self, pin: str) -> List[bytes]:
+        # Each bit of the pin as a little-endian plane of one bit per row,
+        # split out of the packed word once so rows can be read in linear time.
+        planes = self._plane_bytes.get(pin)
+        if planes is None:
+            word = self.planes[pin]
+            size = (self.rows + 7) // 8
+            planes = [((word >> i * self.rows) & bit_mask(self.rows)).to_bytes(size, "little")
+                      for i in range(self.widths[pin])]
+            self._plane_bytes[pin] = planes
+        return planes
+
+    def output(self, pin: str, row: int) -> int:
+        return sum(((plane[row >> 3] >> (row & 7)) & 1) << i for i, plane in enumerate(self.plane_bytes(pin)))
+
+    def input_values(self, row: int) -> Dict[str, int]:
+        values = {}
+        offset = 0
+        for pin, width in self.inputs:
+            values[pin] = (row >> offset) & bit_mask(width)
+            offset += width
+        return values
+
+    def _output_chunks(self) -> Iterator[Tuple[int, List[List[int]]]]:
+        # Yields (first row, values of each output pin) for chunks of up to
+        # 2^CHUNK_BITS rows; chunks are byte-aligned slices of the planes.
+        chunk = min(self.rows, 1 << CHUNK_BITS)
+        for start in range(0, self.rows, chunk):
+            columns = []
+            for pin, width in self.outputs:
+                word = 0
+                for i, plane in enumerate(self.plane_bytes(pin)):
+                    word |= int.from_bytes(plane[start >> 3:(start + chunk + 7) >> 3], "little") << i * chunk
+                columns.append(unpack_words(word, width, chunk))
+            yield start, columns
+
+    def iter_rows(self) -> Iterator[Tuple[Dict[str, int], Dict[str, int]]]:
+        names = [pin for pin, _ in self.outputs]
+        for start, columns in self._output_chunks():
+            for row, values in enumerate(zip(*columns), start):
+                yield self.input_values(row), dict(zip(names, values))
+
+    def csv_lines(self) -> Iterator[str]:
+        yield ",".join(pin for pin, _ in self.inputs + self.outputs)
+        input_fields = []
+        offset = 0
+        for _, width in self.inputs:
+            input_fields.append((offset, bit_mask(width), f"0{width}b"))
+            offset += width
+        output_formats = [f"0{width}b" for _, width in self.outputs]
+        for start, columns in self._output_chunks():
+            for row, values in enumerate(zip(*columns), start):
+                fields = [format((row >> offset) & mask, spec) for offset, mask, spec in input_fields]
+                fields.extend(format(value, spec) for value, spec in zip(values, output_formats))
+                yield ",".join(fields)
+
+    def write_csv(self, filename: str):
+        with open(filename, 'w') as file:
+            for line in self.csv_lines():
+                file.write(line + "\n")
+
+    def write_binary(self, filename: str):
+        header = {"chip": self.name, "inputs": self.inputs, "outputs": self.outputs, "rows": self.rows}
+        with open(filename, 'wb') as file:
+            file.write(BINARY_MAGIC)
+            file.write(json.dumps(header).encode() + b"\n")
+            for pin, _ in self.outputs:
+                for plane in self.plane_bytes(pin):
+                    file.write(plane)
+
+    @classmethod
+    def read_binary(cls, filename: str) -> "TruthTable":
+        with open(filename, 'rb') as file:
+            if file.readline() != BINARY_MAGIC:
+                raise ValueError(f"{filename} is not a truth table file")
+            header = json.loads(file.readline())
+            rows = header["rows"]
+            plane_bytes = (rows + 7) // 8
+            planes = {}
+            for pin, width in header["outputs"]:
+                word = 0
+                for i in range(width):
+                    data = file.read(plane_bytes)
+                    if len(data) != plane_bytes:
+                        raise ValueError(f"{filename} is truncated")
+                    word |= int.from_bytes(data, "little") << i * rows
+                planes[pin] = word
+        inputs = [(pin, width) for pin, width in header["inputs"]]
+        outputs = [(pin, width) for pin, width in header["outputs"]]
+        return cls(header["chip"], inputs, outputs, planes)
+
+    def __eq__(self, other):
+        return (isinstance(other, TruthTable) and self.inputs == other.inputs
+                and self.outputs == other.outputs and self.planes == other.planes)
+
+    def __str__(self):
+        return f"TruthTable(name={self.name}, input_bits={self.input_bits}, rows={self.rows})"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def truth_table(chip: Gate, max_input_bits: int = MAX_INPUT_BITS) -> TruthTable:
+    return netlist_truth_table(flatten_chip(chip), max_input_bits)
+
+
+def netlist_truth_table(netlist: Netlist, max_input_bits: int = MAX_INPUT_BITS) -> TruthTable:
+    if netlist.is_sequential() or netlist.memories:
+        raise ValueError(f"{netlist.name} has clocked elements or memory; truth tables need a combinational chip")
+    inputs = [(pin, len(wires)) for pin, wires in netlist.inputs.items()]
+    outputs = [(pin, len(wires)) for pin, wires in netlist.outputs.items()]
+    input_bits = sum(width for _, width in inputs)
+    if input_bits > max_input_bits:
+        raise ValueError(f"{netlist.name} has {input_bits} input bits; enumerating 2^{input_bits} rows "
+                         f"exceeds the limit of {max_input_bits} (use an equivalence check instead)")
+
+    compiled = compile_netlist(netlist)
+    chunk_bits = min(input_bits, CHUNK_BITS)
+    chunk = 1 << chunk_bits
+    low_planes = [_input_plane(bit, chunk) for bit in range(chunk_bits)]
+    ones = bit_mask(chunk)
+
+    # pieces[pin][i] collects bit i of the pin for each chunk, in row order.
+    pieces: Dict[str, List[List[int]]] = {pin: [[] for _ in range(width)] for pin, width in outputs}
+    for start in range(0, 1 << input_bits, chunk):
+        packed = {}
+        bit = 0
+        for pin, width in inputs:
+            word = 0
+            for i in range(width):
+                if bit < chunk_bits:
+                    plane = low_planes[bit]
+                else:
+                    plane = ones if (start >> bit) & 1 else 0
+                word |= plane << i * chunk
+                bit += 1
+            packed[pin] = word
+        results = compiled.simulate_batch(packed, chunk)
+        for pin, width in outputs:
+            word = results.get(pin, 0)
+            for i in range(width):
+                pieces[pin][i].append((word >> i * chunk) & ones)
+
+    rows = 1 << input_bits
+    planes = {}
+    for pin, width in outputs:
+        word = 0
+        for i, chunks in enumerate(pieces[pin]):
+            word |= _join(chunks, chunk) << i * rows
+        planes[pin] = word
+    return TruthTable(netlist.name, inputs, outputs, planes)
+
+
+def _join(chunks: List[int], chunk: int) -> int:
+    # Concatenates equal-size bit chunks, first chunk lowest, in linear time.
+    if len(chunks) == 1:
+        return chunks[0]
+    size = chunk // 8
+    return int.from_bytes(b"".join(value.to_bytes(size, "little") for value in chunks), "little")
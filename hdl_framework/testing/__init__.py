@@ -4,5 +4,14 @@ Testing components for HDL chips.
 
 from .test_vector import TestVector
 from .test_runner import TestRunner, TestResult
+from .benchmark import run_benchmarks, compare_results
+from .profiler import Profiler, InstanceProfile, FileProfile
+from .server import SimulationServer, send_requests
+from .watcher import ChipWatcher, WatchResult
+from .result_cache import ResultCache
+from .stimulus import StimulusGenerator, ToggleCoverage, RandomTester, RandomTestResult, load_reference
 
-__all__ = ["TestVector", "TestRunner", "TestResult"]
\ No newline at end of file
+__all__ = ["TestVector", "TestRunner", "TestResult", "run_benchmarks", "compare_results",
+           "Profiler", "InstanceProfile", "FileProfile", "SimulationServer", "send_requests",
+           "ChipWatcher", "WatchResult", "ResultCache", "StimulusGenerator", "ToggleCoverage",
+           "RandomTester", "RandomTestResult", "load_reference"]
\ No newline at end of file
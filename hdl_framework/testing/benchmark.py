@@ -0,0 +1,270 @@
+"""
+Benchmark suite for parsing, building and simulating chips.
+
+Every chip in an HDL directory is measured, plus generated designs whose size
+scales with a single factor: N-bit ripple-carry adders, 2^K-way Mux trees and
+deep Not chains. For each design the suite times parsing (fresh parser, no
+parse cache), building an instance (template copy plus materializing every
+sub-chip) and evaluation throughput in vectors per second on each engine.
+Throughput runs grow the vector count until a run takes at least min_time,
+so small and large designs are both measured over a stable interval.
+
+Results are plain JSON so runs from different commits can be compared with
+compare_results().
+"""
+
+import os
+import platform
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from ..core.composite_chip import CompositeChip
+from ..core.gate import Gate
+from ..parser.hdl_parser import HDLParser
+from ..simulation.netlist import flatten_chip
+from ..simulation.numpy_backend import NumpyEvaluator, numpy_available
+from .test_runner import TestRunner
+from .test_vector import TestVector
+
+RESULTS_FORMAT = 1
+COMBINATIONAL_ENGINES = ("compiled", "interpreter", "event", "numpy")
+SEQUENTIAL_ENGINES = ("clocked", "interpreter")
+MAX_VECTORS = 1 << 18
+
+_HELPER_CHIPS = {
+    "BenchXor": """CHIP BenchXor {
+    IN a, b;
+    OUT out;
+    PARTS:
+    Nand(a=a, b=b, out=n);
+    Nand(a=a, b=n, out=x);
+    Nand(a=n, b=b, out=y);
+    Nand(a=x, b=y, out=out);
+}
+""",
+    "BenchFullAdder": """CHIP BenchFullAdder {
+    IN a, b, c;
+    OUT sum, carry;
+    PARTS:
+    BenchXor(a=a, b=b, out=ab);
+    BenchXor(a=ab, b=c, out=sum);
+    And(a=a, b=b, out=c1);
+    And(a=ab, b=c, out=c2);
+    Or(a=c1, b=c2, out=carry);
+}
+""",
+    "BenchMux": """CHIP BenchMux {
+    IN a, b, sel;
+    OUT out;
+    PARTS:
+    Not(in=sel, out=notSel);
+    And(a=a, b=notSel, out=x);
+    And(a=b, b=sel, out=y);
+    Or(a=x, b=y, out=out);
+}
+"""
+}
+
+
+def ripple_adder_hdl(bits: int) -> str:
+    parts = []
+    for i in range(bits):
+        carry_in = "false" if i == 0 else f"c{i - 1}"
+        carry_out = "carry" if i == bits - 1 else f"c{i}"
+        parts.append(f"    BenchFullAdder(a=a[{i}], b=b[{i}], c={carry_in}, sum=out[{i}], carry={carry_out});")
+    return (f"CHIP Ripple{bits} {{\n    IN a[{bits}], b[{bits}];\n    OUT out[{bits}], carry;\n"
+            f"    PARTS:\n" + "\n".join(parts) + "\n}\n")
+
+
+def mux_tree_hdl(levels: int) -> str:
+    width = 1 << levels
+    parts = []
+    previous = [f"in[{i}]" for i in range(width)]
+    for level in range(levels):
+        current = []
+        for i in range(0, len(previous), 2):
+            out = "out" if level == levels - 1 else f"m{level}x{i // 2}"
+            parts.append(f"    BenchMux(a={previous[i]}, b={previous[i + 1]}, sel=sel[{level}], out={out});")
+            current.append(out)
+        previous = current
+    return (f"CHIP MuxTree{width} {{\n    IN in[{width}], sel[{levels}];\n    OUT out;\n"
+            f"    PARTS:\n" + "\n".join(parts) + "\n}\n")
+
+
+def not_chain_hdl(length: int) -> str:
+    parts = []
+    for i in range(length):
+        source = "in" if i == 0 else f"n{i - 1}"
+        target = "out" if i == length - 1 else f"n{i}"
+        parts.append(f"    Not(in={source}, out={target});")
+    return (f"CHIP NotChain{length} {{\n    IN in;\n    OUT out;\n"
+            f"    PARTS:\n" + "\n".join(parts) + "\n}\n")
+
+
+def write_synthetic_designs(directory: str, scale: int = 1) -> List[str]:
+    # Writes the generated chips (and their helpers) and returns the names of
+    # the top-level designs.
+    designs = {
+        f"Ripple{32 * scale}": ripple_adder_hdl(32 * scale),
+        f"MuxTree{1 << (5 + scale)}": mux_tree_hdl(5 + scale),
+        f"NotChain{256 * scale}": not_chain_hdl(256 * scale),
+    }
+    for name, content in {**_HELPER_CHIPS, **designs}.items():
+        with open(os.path.join(directory, f"{name}.hdl"), 'w') as file:
+            file.write(content)
+    return list(designs)
+
+
+def _materialize(chip: Gate):
+    if isinstance(chip, CompositeChip):
+        for sub_chip in chip.sub_chips.values():
+            _materialize(sub_chip)
+
+
+def _best_time(action: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _throughput(run: Callable[[int], None], min_time: float) -> float:
+    # run(count) evaluates count vectors and returns the seconds spent.
+    count = 64
+    while True:
+        elapsed = run(count)
+        if elapsed >= min_time or count >= MAX_VECTORS:
+            return count / elapsed if elapsed > 0 else float("inf")
+        count *= 4
+
+
+def _random_vectors(chip: Gate, count: int, rng: random.Random) -> List[TestVector]:
+    return [TestVector({pin: rng.getrandbits(chip.pin_width(pin)) for pin in chip.inputs}, {})
+            for _ in range(count)]
+
+
+def measure_engine(chip: Gate, engine: str, min_time: float = 0.2, seed: int = 0) -> float:
+    # Vectors per second (clock cycles per second for sequential chips).
+    rng = random.Random(seed)
+
+    if engine == "numpy":
+        evaluator = NumpyEvaluator(chip)
+
+        def run_numpy(count: int) -> float:
+            columns = [[rng.getrandbits(chip.pin_width(pin)) for pin in chip.inputs] for _ in range(count)]
+            start = time.perf_counter()
+            evaluator.evaluate(columns)
+            return time.perf_counter() - start
+
+        return _throughput(run_numpy, min_time)
+
+    runner = TestRunner(chip, engine="compiled" if engine == "clocked" else engine)
+
+    def run_vectors(count: int) -> float:
+        vectors = _random_vectors(chip, count, rng)
+        start = time.perf_counter()
+        runner.run_all_tests(vectors, verbose=False, keep_results=False)
+        return time.perf_counter() - start
+
+    return _throughput(run_vectors, min_time)
+
+
+def _numpy_supports(chip: Gate) -> bool:
+    # The numpy engine takes int64 input columns and has no memory support.
+    return (numpy_available() and not flatten_chip(chip).memories
+            and all(chip.pin_width(pin) < 64 for pin in chip.inputs))
+
+
+def benchmark_design(name: str, hdl_path: str, engines: Optional[List[str]] = None,
+                     min_time: float = 0.2, repeats: int = 3) -> Dict:
+    parse_seconds = _best_time(lambda: HDLParser(base_path=hdl_path).parse_file(name), repeats)
+
+    parser = HDLParser(base_path=hdl_path)
+    template = parser.parse_file(name)
+    if isinstance(template, CompositeChip):
+        build_seconds = _best_time(lambda: _materialize(parser._create_chip_copy(template)), repeats)
+    else:
+        build_seconds = 0.0
+
+    sequential = template.is_sequential()
+    available = SEQUENTIAL_ENGINES if sequential else COMBINATIONAL_ENGINES
+    throughput: Dict[str, float] = {}
+    for engine in available:
+        if engines is not None and engine not in engines:
+            continue
+        if engine == "numpy" and not _numpy_supports(template):
+            continue
+        chip = parser._create_chip_copy(template) if isinstance(template, CompositeChip) else template
+        throughput[engine] = measure_engine(chip, engine, min_time)
+
+    return {
+        "gates": flatten_chip(template).gate_count(),
+        "sequential": sequential,
+        "parse_seconds": parse_seconds,
+        "build_seconds": build_seconds,
+        "throughput": throughput
+    }
+
+
+def run_benchmarks(hdl_path: Optional[str] = "hdl_files", synthetic: bool = True, scale: int = 1,
+                   engines: Optional[List[str]] = None, chips: Optional[List[str]] = None,
+                   min_time: float = 0.2, progress: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+    designs: List[Tuple[str, str, bool]] = []  # (name, directory, generated)
+    if hdl_path is not None:
+        for filename in sorted(os.listdir(hdl_path)):
+            if filename.endswith(".hdl"):
+                designs.append((filename[:-4], hdl_path, False))
+
+    with tempfile.TemporaryDirectory(prefix="hdl_bench_") as synthetic_dir:
+        if synthetic:
+            designs.extend((name, synthetic_dir, True) for name in write_synthetic_designs(synthetic_dir, scale))
+
+        results: Dict[str, Dict] = {}
+        for name, directory, generated in designs:
+            if chips is not None and name not in chips:
+                continue
+            result = benchmark_design(name, directory, engines, min_time)
+            result["synthetic"] = generated
+            results[name] = result
+            if progress is not None:
+                progress(name, result)
+
+    return {
+        "format": RESULTS_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_available(),
+        "scale": scale,
+        "min_time": min_time,
+        "designs": results
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = 0.2) -> List[str]:
+    # Regressions: a time that grew, or a throughput that fell, by more than
+    # threshold (0.2 = 20%). Designs or engines missing on either side are
+    # skipped.
+    if baseline.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"Baseline format {baseline.get('format')} is not {RESULTS_FORMAT}")
+
+    regressions: List[str] = []
+    for name, result in current["designs"].items():
+        base = baseline["designs"].get(name)
+        if base is None:
+            continue
+        for metric in ("parse_seconds", "build_seconds"):
+            old, new = base.get(metric, 0.0), result[metric]
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(f"{name} {metric.replace('_seconds', '')}: "
+                                   f"{old * 1000:.2f} ms -> {new * 1000:.2f} ms (+{new / old - 1:.0%})")
+        for engine, new in result["throughput"].items():
+            old = base.get("throughput", {}).get(engine)
+            if old and new < old * (1 - threshold):
+                regressions.append(f"{name} {engine}: {old:,.0f} -> {new:,.0f} vectors/s "
+                                   f"(-{1 - new / old:.0%})")
+    return regressions
@@ -0,0 +1,235 @@
+"""
+Opt-in profiling of chip parsing, building and evaluation.
+
+A Profiler replaces the evaluation and loading methods on the Gate classes
+and HDLParser while it is enabled and puts the originals back when it is
+disabled, so nothing is measured, and nothing costs anything, otherwise.
+
+Evaluation is recorded per instance name qualified by the chip type that
+owns it ("Mux.And_0"); every instance of that type adds to the same entry.
+The top-level chip is recorded under its own name. Sub-chips are named as
+soon as their parent materializes, resets or clocks them, so parts first
+evaluated from tock() are keyed like the rest. For each entry the profiler
+counts compute() and simulate_batch() calls, fixed-point sweeps, and
+cumulative time both including and excluding the sub-chips it ran.
+Parsing (read and syntax) and building are recorded per HDL file.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from ..core.composite_chip import CompositeChip
+from ..core.gate import Gate
+from ..parser.hdl_parser import HDLParser
+
+
+@dataclass
+class InstanceProfile:
+    calls: int = 0
+    batch_calls: int = 0
+    iterations: int = 0  # fixed-point sweeps, for chips with a sub-chip cycle
+    total_time: float = 0.0
+    self_time: float = 0.0
+
+
+@dataclass
+class FileProfile:
+    parse_time: float = 0.0
+    build_time: float = 0.0
+    copies: int = 0
+    copy_time: float = 0.0
+
+
+def _gate_classes() -> List[type]:
+    classes = [Gate]
+    for cls in classes:
+        classes.extend(sub for sub in cls.__subclasses__() if sub not in classes)
+    return classes
+
+
+class Profiler:
+
+    _active: Optional["Profiler"] = None
+
+    def __init__(self):
+        self.instances: Dict[str, InstanceProfile] = {}
+        self.files: Dict[str, FileProfile] = {}
+        self._names: Dict[int, str] = {}  # id(chip) -> profile key
+        self._named: Dict[int, Gate] = {}  # keeps every id in _names alive, so ids are not reused
+        self._running: List[Gate] = []
+        self._child_time: List[float] = []
+        self._originals: List[Tuple[type, str, Callable]] = []
+
+    def enable(self):
+        if Profiler._active is not None:
+            raise ValueError("Another profiler is already enabled")
+        Profiler._active = self
+        for cls in _gate_classes():
+            for method in ("compute", "simulate_batch"):
+                if method in cls.__dict__:
+                    self._patch(cls, method, self._timed(cls.__dict__[method], method == "simulate_batch"))
+        self._patch(CompositeChip, "_compute_fixed_point", self._counted(CompositeChip._compute_fixed_point))
+        # Sequential parts are reset as soon as they are instantiated, and
+        # may first run from tock(), so parts are named before either.
+        for method in ("_settle_sub_chips", "reset", "tick", "tock"):
+            self._patch(CompositeChip, method, self._naming(CompositeChip.__dict__[method]))
+        self._patch(HDLParser, "_scan_file", self._file_timer(HDLParser._scan_file, "parse_time"))
+        self._patch(HDLParser, "_build_chip", self._build_timer(HDLParser._build_chip, 1))
+        self._patch(HDLParser, "_load_cached_chip", self._build_timer(HDLParser._load_cached_chip, 0))
+        self._patch(HDLParser, "_create_chip_copy", self._copy_timer(HDLParser._create_chip_copy))
+
+    def disable(self):
+        for cls, method, original in reversed(self._originals):
+            setattr(cls, method, original)
+        self._originals.clear()
+        if Profiler._active is self:
+            Profiler._active = None
+
+    def __enter__(self) -> "Profiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def clear(self):
+        self.instances.clear()
+        self.files.clear()
+
+    def _patch(self, cls: type, method: str, replacement: Callable):
+        self._originals.append((cls, method, cls.__dict__[method]))
+        setattr(cls, method, replacement)
+
+    def _key(self, chip: Gate) -> str:
+        key = self._names.get(id(chip))
+        if key is None:
+            key = chip.name
+            self._name(chip, key)
+        return key
+
+    def _name(self, chip: Gate, key: str):
+        self._names[id(chip)] = key
+        self._named[id(chip)] = chip
+
+    def _name_parts(self, chip: CompositeChip, parts: Dict[str, Gate]):
+        for instance_name, part in parts.items():
+            if id(part) not in self._names:
+                self._name(part, f"{chip.name}.{instance_name}")
+
+    def _naming(self, original: Callable) -> Callable:
+        profiler = self
+
+        def naming(chip):
+            if chip._sub_chips is not None:
+                profiler._name_parts(chip, chip._sub_chips)
+            return original(chip)
+
+        return naming
+
+    def _timed(self, original: Callable, batch: bool) -> Callable:
+        profiler = self
+
+        def timed(chip, *args):
+            running = profiler._running
+            if running and running[-1] is chip:
+                return original(chip, *args)  # a subclass calling its base implementation
+            if isinstance(chip, CompositeChip):
+                profiler._name_parts(chip, chip.parts if batch else chip.sub_chips)
+            profile = profiler.instances.setdefault(profiler._key(chip), InstanceProfile())
+
+            running.append(chip)
+            profiler._child_time.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(chip, *args)
+            finally:
+                elapsed = time.perf_counter() - start
+                running.pop()
+                child_time = profiler._child_time.pop()
+                if profiler._child_time:
+                    profiler._child_time[-1] += elapsed
+                if batch:
+                    profile.batch_calls += 1
+                else:
+                    profile.calls += 1
+                profile.total_time += elapsed
+                profile.self_time += elapsed - child_time
+
+        return timed
+
+    def _counted(self, original: Callable) -> Callable:
+        profiler = self
+
+        def counted(chip, sub_inputs):
+            iterations = original(chip, sub_inputs)
+            profiler.instances.setdefault(profiler._key(chip), InstanceProfile()).iterations += iterations
+            return iterations
+
+        return counted
+
+    def _file(self, name: str) -> FileProfile:
+        return self.files.setdefault(name, FileProfile())
+
+    def _file_timer(self, original: Callable, field: str) -> Callable:
+        profiler = self
+
+        def timed(parser, name, *args):
+            start = time.perf_counter()
+            try:
+                return original(parser, name, *args)
+            finally:
+                profile = profiler._file(name)
+                setattr(profile, field, getattr(profile, field) + time.perf_counter() - start)
+
+        return timed
+
+    def _build_timer(self, original: Callable, name_position: int) -> Callable:
+        # _build_chip(chip_node, name) and _load_cached_chip(name, hash) take
+        # the file name in different positions.
+        profiler = self
+
+        def timed(parser, first, second):
+            name = (first, second)[name_position]
+            start = time.perf_counter()
+            try:
+                return original(parser, first, second)
+            finally:
+                profiler._file(name).build_time += time.perf_counter() - start
+
+        return timed
+
+    def _copy_timer(self, original: Callable) -> Callable:
+        profiler = self
+
+        def timed(parser, template):
+            start = time.perf_counter()
+            try:
+                return original(parser, template)
+            finally:
+                profile = profiler._file(template.name)
+                profile.copies += 1
+                profile.copy_time += time.perf_counter() - start
+
+        return timed
+
+    def report(self, limit: Optional[int] = 20) -> str:
+        lines = []
+        if self.files:
+            lines.append(f"{'HDL file':<24} {'parse ms':>10} {'build ms':>10} {'copies':>8} {'copy ms':>10}")
+            ranked = sorted(self.files.items(), key=lambda item: -(item[1].parse_time + item[1].build_time))
+            for name, profile in ranked:
+                lines.append(f"{name:<24} {profile.parse_time * 1000:>10.3f} {profile.build_time * 1000:>10.3f} "
+                             f"{profile.copies:>8} {profile.copy_time * 1000:>10.3f}")
+            lines.append("")
+
+        if self.instances:
+            lines.append(f"{'Instance':<32} {'calls':>9} {'batches':>8} {'sweeps':>8} "
+                         f"{'total ms':>10} {'self ms':>10}")
+            ranked = sorted(self.instances.items(), key=lambda item: -item[1].total_time)
+            for name, profile in ranked[:limit]:
+                lines.append(f"{name:<32} {profile.calls:>9} {profile.batch_calls:>8} {profile.iterations:>8} "
+                             f"{profile.total_time * 1000:>10.3f} {profile.self_time * 1000:>10.3f}")
+            if limit is not None and len(ranked) > limit:
+                lines.append(f"... {len(ranked) - limit} more instances")
+
+        return "\n".join(lines) if lines else "Nothing was profiled"
@@ -0,0 +1,112 @@
+"""
+Persistent cache of test results.
+
+An entry is found by hashing the chip name, HDL directory, engine, optimize
+flag, the CSV's content and the framework version (its release number plus
+a hash of its own sources, so editing the simulator invalidates everything).
+The entry records the content hash of every HDL file in the chip's
+dependency closure; a lookup re-hashes those files and only replays the
+stored summary if none changed. A hit therefore needs neither parsing nor
+simulation.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+from ..parser.hdl_parser import HDLParser
+from ..parser.parse_cache import ParseCache
+from ..utils.json_store import clear_json_entries, write_json_atomic
+
+RESULT_FORMAT_VERSION = 1
+
+_framework_hash: Optional[str] = None
+
+
+def framework_version() -> str:
+    global _framework_hash
+    if _framework_hash is None:
+        from .. import __version__  # the package imports this module before defining it
+        digest = hashlib.sha256(__version__.encode())
+        package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for directory, subdirectories, filenames in sorted(os.walk(package)):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    path = os.path.join(directory, filename)
+                    digest.update(os.path.relpath(path, package).encode())
+                    with open(path, 'rb') as file:
+                        digest.update(file.read())
+        _framework_hash = f"{__version__}+{digest.hexdigest()[:16]}"
+    return _framework_hash
+
+
+def _file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _hdl_hash(path: str) -> Optional[str]:
+    # Hashed like HDLParser.content_hashes: the decoded text.
+    try:
+        with open(path, 'r') as file:
+            return ParseCache.content_hash(file.read())
+    except (OSError, ValueError):
+        return None
+
+
+class ResultCache:
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.join(cache_dir, "results")
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, chip_name: str, hdl_path: str, test_file: str, engine: str, optimize: bool = False) -> Optional[str]:
+        csv_hash = _file_hash(test_file)
+        if csv_hash is None:
+            return None
+        fields = [str(RESULT_FORMAT_VERSION), framework_version(), os.path.abspath(hdl_path),
+                  chip_name, engine, str(optimize), csv_hash]
+        return hashlib.sha256("|".join(fields).encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def lookup(self, key: Optional[str], hdl_path: str) -> Optional[Dict]:
+        entry = None
+        if key is not None:
+            try:
+                with open(self._entry_path(key), 'r') as file:
+                    entry = json.load(file)
+            except (OSError, ValueError):
+                entry = None
+        if entry is None or entry.get("version") != RESULT_FORMAT_VERSION or not all(
+                _hdl_hash(os.path.join(hdl_path, f"{name}.hdl")) == content_hash
+                for name, content_hash in entry["closure"].items()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key: Optional[str], parser: HDLParser, chip_name: str, summary: Dict[str, float],
+              failures: List[str]):
+        # The closure hashes come from the sources the parser actually built,
+        # so an edit made during the run is caught by the next lookup.
+        closure = parser.closure(chip_name)
+        if key is None or any(name not in parser.content_hashes for name in closure):
+            return
+        entry = {
+            "version": RESULT_FORMAT_VERSION,
+            "chip": chip_name,
+            "closure": {name: parser.content_hashes[name] for name in closure},
+            "summary": summary,
+            "failures": failures
+        }
+        write_json_atomic(self._entry_path(key), entry)
+
+    def clear(self):
+        clear_json_entries(self.cache_dir)
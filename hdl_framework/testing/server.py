@@ -0,0 +1,277 @@
+"""
+Long-running simulation server.
+
+The server keeps one HDLParser, its parsed chips and ready-to-run TestRunners
+(with their compiled code) in memory, so a test request costs only the
+simulation itself. Before a chip is used, the modification times of the HDL
+files it was built from are checked; a changed file drops that chip and the
+chips built on it, and only those are parsed again.
+
+Clients talk newline-delimited JSON over a Unix socket or localhost TCP: each
+line is one request object and gets one response line, on the same
+connection, in order. Requests:
+
+    {"command": "test", "chip": "Xor", "test_file": "hdl_test_files/Xor.csv"}
+    {"command": "test", "chip": "Xor", "vectors": "a,b,out\\n0,1,1\\n", "engine": "event"}
+    {"command": "reload", "chips": ["Xor"]}    (no "chips": reload everything)
+    {"command": "ping"} / {"command": "stats"} / {"command": "shutdown"}
+
+Every response has "ok" (and "error" when false), "elapsed_ms", and echoes
+the request's "id" if it had one.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from ..core.gate import Gate
+from ..parser.hdl_parser import HDLParser
+from .test_runner import TestRunner
+
+PROTOCOL_VERSION = 1
+
+Address = Union[str, Tuple[str, int]]  # a Unix socket path, or (host, port)
+RunnerKey = Tuple[str, int, str, bool]  # (chip, generation, engine, optimize)
+
+
+class ChipStore:
+    # Parsed chips with the mtimes of their HDL files, plus idle TestRunners
+    # for each (chip, engine, optimize). A runner is used by one request at a
+    # time: acquire() hands it out and release() returns it to the pool.
+
+    def __init__(self, hdl_path: str, cache_dir: Optional[str] = None):
+        self.parser = HDLParser(base_path=hdl_path, cache_dir=cache_dir)
+        self.mtimes: Dict[str, Optional[int]] = {}  # chip -> st_mtime_ns when it was parsed
+        self.generations: Dict[str, int] = {}  # bumped each time a chip is dropped
+        self.runners: Dict[RunnerKey, List[TestRunner]] = {}
+        self.reloads = 0
+        self.lock = threading.Lock()
+
+    def _mtime(self, name: str) -> Optional[int]:
+        try:
+            return os.stat(os.path.join(self.parser.base_path, name + ".hdl")).st_mtime_ns
+        except OSError:
+            return None
+
+    def _drop(self, names: Iterable[str]) -> List[str]:
+        dropped = self.parser.invalidate(names)
+        for name in dropped:
+            self.mtimes.pop(name, None)
+            self.generations[name] = self.generations.get(name, 0) + 1
+        self.runners = {key: pool for key, pool in self.runners.items() if key[0] not in dropped}
+        self.reloads += len(dropped)
+        return dropped
+
+    def _template(self, name: str) -> Gate:
+        if name in self.parser.parsed_chips:
+            changed = [chip for chip in self.parser.closure(name) if self._mtime(chip) != self.mtimes.get(chip)]
+            if changed:
+                self._drop(changed)
+        if name not in self.parser.parsed_chips:
+            self.parser.parse_file(name)
+            for chip in self.parser.closure(name):
+                if chip not in self.mtimes:
+                    self.mtimes[chip] = self._mtime(chip)
+        return self.parser.parsed_chips[name]
+
+    def template(self, name: str) -> Gate:
+        with self.lock:
+            return self._template(name)
+
+    def acquire(self, name: str, engine: str, optimize: bool) -> Tuple[RunnerKey, TestRunner]:
+        with self.lock:
+            template = self._template(name)
+            key = (name, self.generations.get(name, 0), engine, optimize)
+            pool = self.runners.setdefault(key, [])
+            if pool:
+                return key, pool.pop()
+        # Flattening and compiling happen outside the lock.
+        return key, TestRunner(template.instantiate(), engine=engine, optimize=optimize)
+
+    def release(self, key: RunnerKey, runner: TestRunner):
+        with self.lock:
+            pool = self.runners.get(key)
+            if pool is not None:  # otherwise the chip was reloaded while the runner was busy
+                pool.append(runner)
+
+    def reload(self, names: Optional[List[str]] = None) -> List[str]:
+        with self.lock:
+            return self._drop(list(self.parser.parsed_chips) if names is None else names)
+
+    def preload(self) -> List[str]:
+        names = sorted(filename[:-4] for filename in os.listdir(self.parser.base_path)
+                       if filename.endswith(".hdl"))
+        for name in names:
+            self.template(name)
+        return names
+
+
+class SimulationServer:
+
+    def __init__(self, hdl_path: str = "hdl_files", cache_dir: Optional[str] = None,
+                 workers: Optional[int] = None):
+        self.store = ChipStore(hdl_path, cache_dir)
+        self.workers = workers or os.cpu_count() or 1  # connections served at once
+        self.requests = 0
+        self._server: Optional[socketserver.BaseServer] = None
+        self._counter_lock = threading.Lock()
+
+    def handle(self, request: Dict) -> Dict:
+        start = time.perf_counter()
+        with self._counter_lock:
+            self.requests += 1
+        command = request.get("command", "test")
+        try:
+            if command == "test":
+                response = self._test(request)
+            elif command == "ping":
+                response = {"version": PROTOCOL_VERSION}
+            elif command == "stats":
+                response = self._stats()
+            elif command == "reload":
+                response = {"reloaded": self.store.reload(request.get("chips"))}
+            elif command == "shutdown":
+                response = {"shutdown": True}
+            else:
+                raise ValueError(f"Unknown command '{command}'")
+            response = {"ok": True, **response}
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+        if "id" in request:
+            response["id"] = request["id"]
+        response["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        return response
+
+    def _test(self, request: Dict) -> Dict:
+        chip_name = request.get("chip")
+        if not chip_name:
+            raise ValueError("A test request needs a 'chip'")
+        if ("test_file" in request) == ("vectors" in request):
+            raise ValueError("A test request needs exactly one of 'test_file' or 'vectors'")
+        engine = request.get("engine", "compiled")
+        if engine not in TestRunner.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(TestRunner.ENGINES)}")
+
+        key, runner = self.store.acquire(chip_name, engine, bool(request.get("optimize", False)))
+        if "test_file" in request:
+            summary = runner.run_file(request["test_file"], verbose=False)
+        else:
+            vectors = runner.iter_test_lines(request["vectors"].splitlines())
+            summary = runner.run_all_tests(vectors, verbose=False, keep_results=False)
+        failures = [{"row": result.row + 1, "inputs": result.test_vector.inputs, "expected": result.test_vector.outputs,
+                     "actual": dict(result.actual_outputs), "time": result.test_vector.time}
+                    for result in runner.get_failed_tests()[:TestRunner.MAX_REPORTED_FAILURES]]
+        engine_used = runner.engine
+        self.store.release(key, runner)  # only after a clean run; a failed one is discarded
+
+        return {"chip": chip_name, "engine": engine_used, **summary, "failures": failures}
+
+    def _stats(self) -> Dict:
+        store = self.store
+        with store.lock:
+            return {
+                "version": PROTOCOL_VERSION,
+                "requests": self.requests,
+                "chips": sorted(store.parser.parsed_chips),
+                "idle_runners": sum(len(pool) for pool in store.runners.values()),
+                "reloads": store.reloads
+            }
+
+    def serve(self, address: Address, on_ready: Optional[Callable[[], None]] = None):
+        # Blocks until a shutdown request or shutdown() from another thread.
+        if isinstance(address, str):
+            if not hasattr(socketserver, "UnixStreamServer"):
+                raise ValueError("Unix sockets are not supported on this platform; use a TCP port")
+            if os.path.exists(address):
+                os.unlink(address)  # left behind by a server that did not exit cleanly
+            server = _UnixServer(address, _RequestHandler)
+        else:
+            server = _TCPServer(address, _RequestHandler)
+        server.simulation = self
+        server.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._server = server
+        try:
+            if on_ready is not None:
+                on_ready()
+            server.serve_forever(poll_interval=0.2)
+        finally:
+            server.executor.shutdown(wait=False)
+            server.server_close()
+            self._server = None
+            if isinstance(address, str) and os.path.exists(address):
+                os.unlink(address)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class _PooledMixIn:
+    # Like socketserver.ThreadingMixIn, but connections run on a bounded pool.
+    executor: ThreadPoolExecutor
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class _TCPServer(_PooledMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(_PooledMixIn, socketserver.UnixStreamServer):
+        pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        simulation: SimulationServer = self.server.simulation
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("a request must be a JSON object")
+            except ValueError as e:
+                response = {"ok": False, "error": f"Invalid request: {e}"}
+            else:
+                response = simulation.handle(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+            if response.get("shutdown"):
+                simulation.shutdown()
+                return
+
+
+def send_requests(address: Address, requests: List[Dict], timeout: Optional[float] = None) -> List[Dict]:
+    # Sends the requests one at a time on a single connection and returns the
+    # responses in order.
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    responses = []
+    with socket.socket(family, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(address)
+        with connection.makefile('rwb') as stream:
+            for request in requests:
+                stream.write(json.dumps(request).encode() + b"\n")
+                stream.flush()
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("The server closed the connection")
+                responses.append(json.loads(line))
+    return responses
@@ -0,0 +1,278 @@
+"""
+Random and constrained stimulus with toggle coverage.
+
+A StimulusGenerator draws seeded input vectors in batches, already packed
+for bit-parallel simulation (bus-major, as in utils.bus), so nothing is
+written to or parsed from a CSV. Unconstrained pins are a single
+getrandbits() call per batch; a pin may instead be fixed, limited to a
+range, drawn from a list of values, or produced by a function of the RNG.
+
+RandomTester feeds the batches to the compiled netlist and checks each
+vector against a Python reference model. The model gets a dict of input
+pin values and returns a dict of outputs (or a bare int for a chip with one
+output), which are truncated to the pin widths:
+
+    def add16(inputs):
+        return {"out": inputs["a"] + inputs["b"]}
+
+It also tracks toggle coverage. An input bit or gate output counts as
+covered once it has both risen and fallen between consecutive vectors. The
+coverage probes are compiled into the simulation function as extra outputs,
+and covered wires are dropped from the probe set as the run goes on.
+Generation stops when the coverage target is reached, the vector budget is
+spent, or enough failures have been collected.
+"""
+
+import copy
+import importlib
+import importlib.util
+import os
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from ..core.gate import Gate
+from ..simulation.codegen import build_function
+from ..simulation.netlist import Netlist, flatten_chip, CONST_FALSE, CONST_TRUE
+from ..utils.bus import bit_mask, pack_words, parse_value, unpack_words
+from .test_runner import TestResult, TestRunner
+from .test_vector import TestVector
+
+DEFAULT_BATCH = 4096
+
+# A pin constraint: a fixed value, an inclusive (low, high) range, a list of
+# values to choose from, or a function of the generator's Random.
+Constraint = Union[int, Tuple[int, int], List[int], Callable[[random.Random], int]]
+Reference = Callable[[Dict[str, int]], Union[int, Dict[str, int]]]
+
+
+def parse_constraint(text: str, width: int) -> Constraint:
+    # CLI form: "5", "0..255" or "1,2,4"; values as accepted in test files.
+    if ".." in text:
+        low, high = text.split("..", 1)
+        return parse_value(low, width), parse_value(high, width)
+    if "," in text:
+        return [parse_value(value, width) for value in text.split(",")]
+    return parse_value(text, width)
+
+
+def load_reference(spec: str) -> Reference:
+    # "module:function" (importable) or "path/to/model.py:function".
+    module_name, separator, function_name = spec.rpartition(":")
+    if not separator or not module_name or not function_name:
+        raise ValueError(f"Reference '{spec}' must have the form module:function or file.py:function")
+    if module_name.endswith(".py"):
+        if not os.path.exists(module_name):
+            raise FileNotFoundError(module_name)
+        module_spec = importlib.util.spec_from_file_location(
+            os.path.splitext(os.path.basename(module_name))[0], module_name)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    reference = getattr(module, function_name, None)
+    if not callable(reference):
+        raise ValueError(f"{module_name} has no function '{function_name}'")
+    return reference
+
+
+class StimulusGenerator:
+
+    def __init__(self, pins: Dict[str, int], seed: int = 0,
+                 constraints: Optional[Dict[str, Constraint]] = None):
+        self.pins = pins  # input pin -> bus width
+        self.rng = random.Random(seed)
+        self.constraints = constraints or {}
+        unknown = set(self.constraints) - set(pins)
+        if unknown:
+            raise ValueError(f"Constraints on unknown input pins: {', '.join(sorted(unknown))}")
+        for pin, constraint in self.constraints.items():
+            if isinstance(constraint, tuple) and constraint[0] > constraint[1]:
+                raise ValueError(f"Empty range {constraint[0]}..{constraint[1]} for pin '{pin}'")
+            if isinstance(constraint, list) and not constraint:
+                raise ValueError(f"No values to choose from for pin '{pin}'")
+
+    def _values(self, pin: str, count: int) -> List[int]:
+        constraint = self.constraints[pin]
+        rng = self.rng
+        if isinstance(constraint, int):
+            return [constraint] * count
+        if isinstance(constraint, tuple):
+            low, high = constraint
+            return [rng.randint(low, high) for _ in range(count)]
+        if isinstance(constraint, list):
+            return rng.choices(constraint, k=count)
+        return [constraint(rng) for _ in range(count)]
+
+    def batch(self, count: int) -> Tuple[Dict[str, int], Dict[str, List[int]]]:
+        # The next count vectors, packed per pin, and the same values per vector.
+        packed = {}
+        values = {}
+        for pin, width in self.pins.items():
+            if pin in self.constraints:
+                values[pin] = [value & bit_mask(width) for value in self._values(pin, count)]
+                packed[pin] = pack_words(values[pin], width)
+            else:
+                packed[pin] = self.rng.getrandbits(width * count)
+                values[pin] = unpack_words(packed[pin], width, count)
+        return packed, values
+
+
+class ToggleCoverage:
+
+    def __init__(self, netlist: Netlist):
+        self.netlist = netlist
+        names: Dict[int, str] = {}
+        for name, wire in netlist.wire_names.items():
+            names.setdefault(wire, name)
+        wires = [wire for pin_wires in netlist.inputs.values() for wire in pin_wires]
+        wires.extend(gate.out for gate in netlist.gates)
+        wires = list(dict.fromkeys(wire for wire in wires if wire not in (CONST_FALSE, CONST_TRUE)))
+        self.names = {wire: names.get(wire, f"w{wire}") for wire in wires}
+        self.rose: Dict[int, bool] = {wire: False for wire in wires}
+        self.fell: Dict[int, bool] = {wire: False for wire in wires}
+        self.last: Dict[int, int] = {}  # wire -> its value in the previous vector
+
+    def pending(self) -> List[int]:
+        return [wire for wire in self.rose if not (self.rose[wire] and self.fell[wire])]
+
+    def update(self, wires: Sequence[int], values: Sequence[int], width: int):
+        # values[i] holds wire i for width consecutive vectors, packed.
+        mask = bit_mask(width)
+        top = width - 1
+        for wire, value in zip(wires, values):
+            last = self.last.get(wire, value & 1)
+            previous = ((value << 1) | last) & mask
+            if value & ~previous:
+                self.rose[wire] = True
+            if previous & ~value:
+                self.fell[wire] = True
+            self.last[wire] = value >> top
+
+    @property
+    def wires(self) -> int:
+        return len(self.rose)
+
+    @property
+    def covered(self) -> int:
+        return sum(1 for wire in self.rose if self.rose[wire] and self.fell[wire])
+
+    def fraction(self) -> float:
+        return self.covered / self.wires if self.wires else 1.0
+
+    def uncovered(self) -> List[str]:
+        return [self.names[wire] for wire in self.pending()]
+
+
+class RandomTestResult(NamedTuple):
+    vectors: int
+    failures: List[TestResult]  # the first max_failures mismatches
+    failed: int  # every mismatching vector
+    coverage: float
+    covered: int
+    wires: int
+    uncovered: List[str]
+    stop_reason: str  # "coverage", "budget" or "failures"
+    seconds: float
+
+    @property
+    def passed(self) -> bool:
+        return self.failed == 0
+
+
+class RandomTester:
+
+    def __init__(self, chip: Gate, reference: Optional[Reference] = None, seed: int = 0,
+                 constraints: Optional[Dict[str, Constraint]] = None, batch_size: int = DEFAULT_BATCH):
+        self.netlist = flatten_chip(chip)
+        if self.netlist.is_sequential() or self.netlist.memories:
+            raise ValueError(f"{self.netlist.name} has clocked elements or memory; "
+                             f"random testing needs a combinational chip")
+        self.reference = reference
+        self.batch_size = batch_size
+        self.inputs = {pin: len(wires) for pin, wires in self.netlist.inputs.items()}
+        self.outputs = {pin: len(wires) for pin, wires in self.netlist.outputs.items()}
+        self.generator = StimulusGenerator(self.inputs, seed, constraints)
+        self.coverage = ToggleCoverage(self.netlist)
+        self._compile(self.coverage.pending())
+
+    def _compile(self, probes: List[int]):
+        # The chip's outputs followed by one extra output per probed wire.
+        netlist = copy.copy(self.netlist)
+        netlist.outputs = {**self.netlist.outputs, **{f"~w{wire}": [wire] for wire in probes}}
+        _, self.function = build_function(netlist)
+        self.probes = probes
+
+    def _expected(self, values: Dict[str, List[int]]) -> Dict[str, List[int]]:
+        # The reference outputs of every vector, masked to the pin widths.
+        pins = list(self.inputs)
+        single = next(iter(self.outputs)) if len(self.outputs) == 1 else None
+        results: Dict[str, List[int]] = {pin: [] for pin in self.outputs}
+        for vector in zip(*(values[pin] for pin in pins)):
+            result = self.reference(dict(zip(pins, vector)))
+            if not isinstance(result, dict):
+                if single is None:
+                    raise ValueError("The reference must return a dict of outputs for a chip with several outputs")
+                result = {single: result}
+            for pin, column in results.items():
+                column.append(result[pin])
+        for pin, column in results.items():
+            mask = bit_mask(self.outputs[pin])
+            results[pin] = [value & mask for value in column]
+        return results
+
+    @staticmethod
+    def _mismatches(actual: Dict[str, List[int]], expected: Dict[str, List[int]]) -> List[int]:
+        # Indices of the vectors whose outputs differ; whole columns are
+        # compared first, so a passing batch costs one list comparison per pin.
+        indices = set()
+        for pin, column in expected.items():
+            if column != actual[pin]:
+                indices.update(k for k, (a, e) in enumerate(zip(actual[pin], column)) if a != e)
+        return sorted(indices)
+
+    def run(self, max_vectors: int = 1_000_000, coverage_target: float = 1.0,
+            max_failures: int = TestRunner.MAX_REPORTED_FAILURES,
+            progress: Optional[Callable[[int, float, int], None]] = None) -> RandomTestResult:
+        start = time.perf_counter()
+        coverage = self.coverage
+        outputs = list(self.outputs)
+        failures: List[TestResult] = []
+        failed = 0
+        vectors = 0
+        stop_reason = "budget"
+        while vectors < max_vectors:
+            if coverage.fraction() >= coverage_target:
+                stop_reason = "coverage"
+                break
+            count = min(self.batch_size, max_vectors - vectors)
+            packed, values = self.generator.batch(count)
+            results = self.function(*packed.values(), bit_mask(count), count)
+            if self.probes:
+                coverage.update(self.probes, results[len(outputs):], count)
+                pending = coverage.pending()
+                if len(pending) <= len(self.probes) // 2:
+                    self._compile(pending)
+
+            if self.reference is not None:
+                expected = self._expected(values)
+                actual = {pin: unpack_words(word, self.outputs[pin], count) for pin, word in zip(outputs, results)}
+                mismatches = self._mismatches(actual, expected)
+                failed += len(mismatches)
+                # max_failures=0 never stops the run, so every mismatch is kept.
+                recorded = mismatches[:max_failures - len(failures)] if max_failures else mismatches
+                for index in recorded:
+                    inputs = {pin: values[pin][index] for pin in self.inputs}
+                    test_vector = TestVector(inputs, {pin: expected[pin][index] for pin in outputs})
+                    failures.append(TestResult(test_vector, False, {pin: actual[pin][index] for pin in outputs}))
+            vectors += count
+            if progress is not None:
+                progress(vectors, coverage.fraction(), failed)
+            if max_failures and failed >= max_failures:
+                stop_reason = "failures"
+                break
+        else:
+            if coverage.fraction() >= coverage_target:
+                stop_reason = "coverage"
+
+        return RandomTestResult(vectors, failures, failed, coverage.fraction(), coverage.covered,
+                                coverage.wires, coverage.uncovered(), stop_reason, time.perf_counter() - start)
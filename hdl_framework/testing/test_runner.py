@@ -2,21 +2,46 @@
 Test runner for executing HDL chip tests using test vectors.
 """
 
-from typing import List, Dict
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 from ..core.gate import Gate
+from ..simulation.clocked import ClockedSimulator
+from ..simulation.codegen import CompiledChip, compile_netlist
+from ..simulation.event_driven import EventSimulator
+from ..simulation.netlist import Netlist, flatten_chip
+from ..simulation.numpy_backend import NumpyEvaluator
+from ..simulation.optimize import OptimizationReport, optimize_netlist
+from ..utils.bus import bit_mask, pack_words, parse_value, unpack_words
 from .test_vector import TestVector
 
+ColumnMap = List[Tuple[int, str, int]]  # (column, pin, bus width)
+TIME_COLUMN = "time"
+
+
+def _packed_value(word: int, bus_width: int, count: int, k: int) -> int:
+    # Vector k's value out of a bus-major packed word.
+    return sum(((word >> i * count + k) & 1) << i for i in range(bus_width))
+
 
 class TestResult:
 
-    def __init__(self, test_vector: TestVector, passed: bool, actual_outputs: Dict[str, int]):
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, test_vector: TestVector, passed: bool, actual_outputs: Dict[str, int],
+                 gate_evaluations: Optional[int] = None):
         self.test_vector = test_vector
         self.passed = passed
         self.actual_outputs = actual_outputs
+        self.gate_evaluations = gate_evaluations  # set by the event engine
+        self.row: Optional[int] = None  # 0-based vector index in the run, set when the result is kept
 
     def __str__(self):
         status = "PASS" if self.passed else "FAIL"
         result = f"{status} | {self.test_vector}"
+        if self.gate_evaluations is not None:
+            result += f" | {self.gate_evaluations} gate evals"
         if not self.passed:
             actual_str = ', '.join([f"{k}={v}" for k, v in self.actual_outputs.items()])
             result += f"\n        Actual: {actual_str}"
@@ -25,44 +50,149 @@ class TestResult:
 
 class TestRunner:
 
-    def __init__(self, chip: Gate):
+    __test__ = False  # not a pytest test class
+
+    ENGINES = ("compiled", "interpreter", "numpy", "event")
+    MAX_REPORTED_FAILURES = 20
+
+    def __init__(self, chip: Gate, engine: str = "compiled", batch_width: int = 256,
+                 failure_sample_size: int = 100, optimize: bool = False, batch: bool = True):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(self.ENGINES)}")
+        if batch_width < 1:
+            raise ValueError(f"batch_width must be positive, got {batch_width}")
         self.chip = chip
+        self.batch_width = batch_width
+        self.failure_sample_size = failure_sample_size
+        self.optimize = optimize  # run the netlist optimizer before compiling; ignored by the interpreter
+        self.batch = batch  # False runs interpreter vectors through compute() one at a time
+        self.optimization: Optional[OptimizationReport] = None
+        self._flattened: Optional[Netlist] = None
         self.test_results: List[TestResult] = []
+        self.total_count = 0
+        self.passed_count = 0
+        self.compiled: Optional[CompiledChip] = None
+        self.numpy_evaluator: Optional[NumpyEvaluator] = None
+        self.event_simulator: Optional[EventSimulator] = None
+        self.clocked: Optional[ClockedSimulator] = None
+        self.sequential = chip.is_sequential()
+        self._tick_pending = False  # the interpreter has sampled inputs that tock has not committed
+        if self.sequential:
+            # Clock state carries over between vectors, so sequential chips
+            # always run serially: on the interpreter or the clocked engine.
+            if engine != "interpreter":
+                self.clocked = ClockedSimulator(self._netlist())
+            self.engine = "clocked" if self.clocked is not None else "interpreter"
+            return
+        if engine == "numpy":
+            self.numpy_evaluator = NumpyEvaluator(chip, netlist=self._netlist())
+        if engine == "event":
+            # Wire state persists between vectors, so vectors run one at a time.
+            self.event_simulator = EventSimulator(self._netlist())
+        if engine in ("compiled", "numpy"):
+            try:
+                self.compiled = compile_netlist(self._netlist())
+            except ValueError:
+                # Chips the flattener cannot handle fall back to the interpreter.
+                self.compiled = None
+        if self.numpy_evaluator is not None:
+            self.engine = "numpy"
+        elif self.event_simulator is not None:
+            self.engine = "event"
+        else:
+            self.engine = "compiled" if self.compiled is not None else "interpreter"
+
+    def _netlist(self) -> Netlist:
+        if self._flattened is None:
+            self._flattened = flatten_chip(self.chip)
+            if self.optimize:
+                self._flattened, self.optimization = optimize_netlist(self._flattened)
+        return self._flattened
 
     def parse_test_file(self, filename: str) -> List[TestVector]:
-        test_vectors: List[TestVector] = []
+        return list(self.iter_test_file(filename))
 
+    def iter_test_file(self, filename: str) -> Iterator[TestVector]:
         with open(filename, 'r') as file:
-            lines = [line.strip() for line in file.readlines() if line.strip()]
-
-        if not lines:
-            return test_vectors
+            yield from self.iter_test_lines(file)
 
-        header = lines[0]
-        all_pins = [pin.strip() for pin in header.split(',')]
-
-        input_pins = [pin for pin in all_pins if pin in self.chip.inputs]
-        output_pins = [pin for pin in all_pins if pin in self.chip.outputs]
-
-        for line in lines[1:]:
-            values = [int(val.strip()) for val in line.split(',')]
-
-            pin_values = dict(zip(all_pins, values))
+    def iter_test_lines(self, lines: Iterable[str]) -> Iterator[TestVector]:
+        # CSV lines, header first; blank lines are skipped.
+        input_columns = None
+        output_columns = None
+        time_column = None
 
-            inputs = {pin: pin_values[pin] for pin in input_pins}
-            outputs = {pin: pin_values[pin] for pin in output_pins}
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
 
-            test_vectors.append(TestVector(inputs, outputs))
+            if input_columns is None:
+                input_columns, output_columns, time_column = self._vector_columns(line)
+                continue
 
-        return test_vectors
-
-    def run_test(self, test_vector: TestVector) -> TestResult:
-        self.chip.reset()
+            yield self._parse_vector(line, input_columns, output_columns, time_column)
 
+    def _vector_columns(self, header: str) -> Tuple[ColumnMap, ColumnMap, Optional[int]]:
+        all_pins = [pin.strip() for pin in header.split(',')]
+        input_columns = [(i, pin, self.chip.pin_width(pin)) for i, pin in enumerate(all_pins)
+                         if pin in self.chip.inputs]
+        output_columns = [(i, pin, self.chip.pin_width(pin)) for i, pin in enumerate(all_pins)
+                          if pin in self.chip.outputs]
+        time_column = all_pins.index(TIME_COLUMN) if TIME_COLUMN in all_pins else None
+        return input_columns, output_columns, time_column
+
+    @staticmethod
+    def _parse_vector(line: str, input_columns: ColumnMap, output_columns: ColumnMap,
+                      time_column: Optional[int] = None) -> TestVector:
+        values = line.split(',')
+        inputs = {pin: parse_value(values[i], width) for i, pin, width in input_columns}
+        outputs = {pin: parse_value(values[i], width) for i, pin, width in output_columns}
+        time = values[time_column].strip() if time_column is not None else None
+        return TestVector(inputs, outputs, time)
+
+    def _clock(self, test_vector: TestVector) -> Dict[str, int]:
+        # "N+" rows check outputs after a tick, "N" rows after a tock; rows
+        # without a time run a full cycle. An "N" row with no tick pending
+        # ticks first, as ClockedSimulator.tock does.
+        time = test_vector.time
+        if self.clocked is not None:
+            simulator = self.clocked
+            simulator.set_inputs(test_vector.inputs)
+            if time is None:
+                return simulator.step()
+            return simulator.tick() if time.endswith("+") else simulator.tock()
+
+        chip = self.chip
         for pin, value in test_vector.inputs.items():
-            self.chip.set_input(pin, value)
+            chip.set_input(pin, value)
+        ticked = time is not None and time.endswith("+")
+        if ticked or time is None or not self._tick_pending:
+            chip.compute()
+            chip.tick()
+            self._tick_pending = True
+            if ticked:
+                return dict(chip.output_values)
+        chip.tock()
+        self._tick_pending = False
+        return dict(chip.compute())
 
-        actual_outputs = self.chip.compute()
+    def run_test(self, test_vector: TestVector) -> TestResult:
+        gate_evaluations = None
+        if self.sequential:
+            actual_outputs = self._clock(test_vector)
+        elif self.event_simulator is not None:
+            actual_outputs = self.event_simulator.apply(test_vector.inputs)
+            gate_evaluations = self.event_simulator.last_evaluations
+        elif self.compiled is not None:
+            actual_outputs = self.compiled.evaluate(test_vector.inputs)
+        else:
+            self.chip.reset()
+
+            for pin, value in test_vector.inputs.items():
+                self.chip.set_input(pin, value)
+
+            actual_outputs = self.chip.compute()
 
         passed = True
         for pin, expected_value in test_vector.outputs.items():
@@ -71,42 +201,255 @@ class TestRunner:
                 passed = False
                 break
 
-        return TestResult(test_vector, passed, actual_outputs)
-
-    def run_all_tests(self, test_vectors: List[TestVector], verbose: bool = True) -> Dict[str, float]:
+        return TestResult(test_vector, passed, actual_outputs, gate_evaluations)
+
+    def _simulate_packed(self, test_vectors: List[TestVector]) -> Dict[str, int]:
+        width = len(test_vectors)
+        packed: Dict[str, int] = {}
+        for pin in self.chip.inputs:
+            values = [test_vector.inputs.get(pin, 0) for test_vector in test_vectors]
+            packed[pin] = pack_words(values, self.chip.pin_width(pin))
+
+        if self.compiled is not None:
+            return self.compiled.simulate_batch(packed, width)
+        return self.chip.simulate_batch(packed, width)
+
+    def check_batch(self, test_vectors: List[TestVector]) -> List[Tuple[int, TestResult]]:
+        # Like run_batch, but returns only the failing results, each with its
+        # index in test_vectors. Expected
+        # outputs are packed and compared as whole words, so only failing
+        # vectors are unpacked.
+        width = len(test_vectors)
+        packed_outputs = self._simulate_packed(test_vectors)
+        ones = bit_mask(width)
+        failing = 0
+        for pin in self.chip.outputs:
+            pin_width = self.chip.pin_width(pin)
+            expected = [test_vector.outputs.get(pin, 0) for test_vector in test_vectors]
+            checked = [pin in test_vector.outputs for test_vector in test_vectors]
+            difference = packed_outputs.get(pin, 0) ^ pack_words(expected, pin_width)
+            mismatched = 0
+            for i in range(pin_width):
+                mismatched |= difference >> i * width
+            failing |= mismatched & ones & (ones if all(checked) else pack_words(checked))
+
+        failures: List[Tuple[int, TestResult]] = []
+        while failing:
+            k = (failing & -failing).bit_length() - 1
+            failing &= failing - 1
+            actual_outputs = {pin: _packed_value(word, self.chip.pin_width(pin), width, k)
+                              for pin, word in packed_outputs.items()}
+            failures.append((k, TestResult(test_vectors[k], False, actual_outputs)))
+        return failures
+
+    def run_batch(self, test_vectors: List[TestVector]) -> List[TestResult]:
+        width = len(test_vectors)
+        packed_outputs = self._simulate_packed(test_vectors)
+
+        unpacked = {pin: unpack_words(word, self.chip.pin_width(pin), width)
+                    for pin, word in packed_outputs.items()}
+        results: List[TestResult] = []
+        for k, test_vector in enumerate(test_vectors):
+            actual_outputs = {pin: values[k] for pin, values in unpacked.items()}
+            passed = all(actual_outputs.get(pin, 0) == expected_value
+                         for pin, expected_value in test_vector.outputs.items())
+            results.append(TestResult(test_vector, passed, actual_outputs))
+        return results
+
+    def run_all_tests(self, test_vectors: Iterable[TestVector], verbose: bool = True,
+                      keep_results: bool = True) -> Dict[str, float]:
+        # With keep_results=False only the counters and the first
+        # failure_sample_size failures are kept, so memory use does not
+        # depend on how many vectors the iterable yields.
         self.test_results.clear()
         passed_count = 0
-        total_count = len(test_vectors)
+        total_count = 0
+        if self.event_simulator is not None:
+            self.event_simulator.clear_statistics()
+        if self.clocked is not None:
+            self.clocked.reset()
+            self.clocked.gate_evaluations = 0
+        elif self.sequential:
+            self.chip.reset()
+            self._tick_pending = False
 
         if verbose:
-            print(f"Running {total_count} test cases for {self.chip.name}:")
+            if hasattr(test_vectors, "__len__"):
+                print(f"Running {len(test_vectors)} test cases for {self.chip.name}:")
+            else:
+                print(f"Running test cases for {self.chip.name}:")
             print("-" * 60)
 
-        for i, test_vector in enumerate(test_vectors):
-            result = self.run_test(test_vector)
-            self.test_results.append(result)
+        vectors = iter(test_vectors)
+        while True:
+            batch = list(islice(vectors, self.batch_width))
+            if not batch:
+                break
+
+            if self.event_simulator is not None or self.sequential or not self.batch:
+                results = [self.run_test(test_vector) for test_vector in batch]
+            elif keep_results or verbose:
+                results = self.run_batch(batch)
+            else:
+                # Only failures are kept, so passing vectors are never unpacked.
+                failures = self.check_batch(batch)
+                passed_count += len(batch) - len(failures)
+                for k, result in failures[:self.failure_sample_size - len(self.test_results)]:
+                    result.row = total_count + k
+                    self.test_results.append(result)
+                total_count += len(batch)
+                continue
+
+            for i, result in enumerate(results, total_count):
+                if result.passed:
+                    passed_count += 1
 
-            if result.passed:
-                passed_count += 1
+                if keep_results or (not result.passed and len(self.test_results) < self.failure_sample_size):
+                    result.row = i
+                    self.test_results.append(result)
 
-            if verbose:
-                print(f"Test {i + 1:2d}: {result}")
+                if verbose:
+                    print(f"Test {i + 1:2d}: {result}")
+
+            total_count += len(batch)
+
+        return self._finish(total_count, passed_count, verbose)
+
+    def _finish(self, total_count: int, passed_count: int, verbose: bool) -> Dict[str, float]:
+        self.total_count = total_count
+        self.passed_count = passed_count
 
         if verbose:
             print("-" * 60)
             print(f"Summary: {passed_count}/{total_count} tests passed")
 
+            if self.event_simulator is not None:
+                simulator = self.event_simulator
+                print(f"Gate evaluations: {simulator.total_evaluations} total, "
+                      f"{simulator.average_evaluations():.1f} per vector "
+                      f"(full evaluation: {simulator.netlist.gate_count()})")
+            if self.clocked is not None:
+                print(f"Clock cycles: {self.clocked.cycle}, "
+                      f"gate evaluations: {self.clocked.gate_evaluations}")
+
             if passed_count == total_count:
                 print("All tests passed!")
             else:
                 print(f"{total_count - passed_count} tests failed")
 
-        return {
+        summary = {
             "total": total_count,
             "passed": passed_count,
             "failed": total_count - passed_count,
             "success_rate": passed_count / total_count if total_count > 0 else 0
         }
+        if self.event_simulator is not None:
+            summary["gate_evaluations"] = self.event_simulator.total_evaluations
+        if self.clocked is not None:
+            summary["gate_evaluations"] = self.clocked.gate_evaluations
+            summary["cycles"] = self.clocked.cycle
+        return summary
+
+    def run_file(self, filename: str, verbose: bool = True, jobs: int = 1) -> Dict[str, float]:
+        if self.numpy_evaluator is not None:
+            return self._run_file_numpy(filename, verbose)
+        if jobs > 1 and self.event_simulator is None and not self.sequential and self.batch:
+            return self._run_file_sharded(filename, verbose, jobs)
+        return self.run_all_tests(self.iter_test_file(filename), verbose, keep_results=False)
+
+    def _run_file_numpy(self, filename: str, verbose: bool) -> Dict[str, float]:
+        self.test_results.clear()
+        total_count, failing_rows = self.numpy_evaluator.check_file(filename)
+        failed_count = len(failing_rows)
+
+        if verbose:
+            print(f"Running {total_count} test cases for {self.chip.name} (numpy):")
+            print("-" * 60)
+            for row in failing_rows[:self.MAX_REPORTED_FAILURES]:
+                print(f"Test {row + 1:2d}: FAIL")
+            if failed_count > self.MAX_REPORTED_FAILURES:
+                print(f"... and {failed_count - self.MAX_REPORTED_FAILURES} more failures")
+
+        return self._finish(total_count, total_count - failed_count, verbose)
+
+    def _run_file_sharded(self, filename: str, verbose: bool, jobs: int) -> Dict[str, float]:
+        self.test_results.clear()
+
+        with open(filename, 'rb') as file:
+            header = file.readline()
+            while header and not header.strip():
+                header = file.readline()
+            data_start = file.tell()
+            size = os.fstat(file.fileno()).st_size
+
+        if verbose:
+            print(f"Running test cases for {self.chip.name} across {jobs} processes:")
+            print("-" * 60)
+
+        if not header.strip():
+            return self._finish(0, 0, verbose)
+
+        step = max(1, -(-(size - data_start) // jobs))
+        shards = [(filename, header.decode().strip(), start, min(start + step, size))
+                  for start in range(data_start, size, step)]
+
+        worker_engine = "compiled" if self.compiled is not None else "interpreter"
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_shard_worker,
+                                 initargs=(self.chip, worker_engine, self.batch_width,
+                                           self.failure_sample_size, self.optimize)) as executor:
+            shard_results = list(executor.map(_run_shard, shards))
+
+        # Shard-local row numbers become file row numbers by offsetting with
+        # the row counts of all preceding shards.
+        total_count = 0
+        passed_count = 0
+        for shard_total, shard_passed, failures in shard_results:
+            for row, result in failures:
+                if len(self.test_results) < self.failure_sample_size:
+                    result.row = total_count + row
+                    self.test_results.append(result)
+                    if verbose:
+                        print(f"Test {result.row + 1:2d}: {result}")
+            total_count += shard_total
+            passed_count += shard_passed
+
+        return self._finish(total_count, passed_count, verbose)
+
+    def _run_byte_range(self, filename: str, header: str, start: int,
+                        end: int) -> Tuple[int, int, List[Tuple[int, TestResult]]]:
+        input_columns, output_columns, time_column = self._vector_columns(header)
+        total_count = 0
+        passed_count = 0
+        failures: List[Tuple[int, TestResult]] = []
+
+        with open(filename, 'rb') as file:
+            # A shard owns every line that starts inside [start, end).
+            file.seek(start - 1)
+            file.readline()
+
+            def vectors() -> Iterator[TestVector]:
+                while file.tell() < end:
+                    line = file.readline()
+                    if not line:
+                        break
+                    line = line.strip()
+                    if line:
+                        yield self._parse_vector(line.decode(), input_columns, output_columns, time_column)
+
+            rows = vectors()
+            while True:
+                batch = list(islice(rows, self.batch_width))
+                if not batch:
+                    break
+
+                batch_failures = self.check_batch(batch)
+                passed_count += len(batch) - len(batch_failures)
+                for k, result in batch_failures[:self.failure_sample_size - len(failures)]:
+                    failures.append((total_count + k, result))
+
+                total_count += len(batch)
+
+        return total_count, passed_count, failures
 
     def get_failed_tests(self) -> List[TestResult]:
         return [result for result in self.test_results if not result.passed]
@@ -115,9 +458,9 @@ class TestRunner:
         return [result for result in self.test_results if result.passed]
 
     def get_test_summary(self) -> Dict:
-        total = len(self.test_results)
-        passed = len(self.get_passed_tests())
-        failed = len(self.get_failed_tests())
+        total = self.total_count
+        passed = self.passed_count
+        failed = total - passed
 
         return {
             "chip_name": self.chip.name,
@@ -133,9 +476,26 @@ class TestRunner:
             file.write(f"Test Results for {self.chip.name}\n")
             file.write("=" * 50 + "\n\n")
 
-            for i, result in enumerate(self.test_results):
-                file.write(f"Test {i + 1}: {result}\n")
+            # Streamed runs keep only a sample of failures, so each result
+            # carries its own row number.
+            for result in self.test_results:
+                file.write(f"Test {result.row + 1}: {result}\n")
 
             summary = self.get_test_summary()
             file.write(f"\nSummary: {summary['passed_tests']}/{summary['total_tests']} tests passed\n")
-            file.write(f"Success Rate: {summary['success_rate']:.2%}\n")
\ No newline at end of file
+            file.write(f"Success Rate: {summary['success_rate']:.2%}\n")
+
+
+# Runner rebuilt once in each shard worker process
+_shard_runner: Optional[TestRunner] = None
+
+
+def _init_shard_worker(chip: Gate, engine: str, batch_width: int, failure_sample_size: int,
+                       optimize: bool):
+    global _shard_runner
+    _shard_runner = TestRunner(chip, engine, batch_width, failure_sample_size, optimize)
+
+
+def _run_shard(shard: Tuple[str, str, int, int]) -> Tuple[int, int, List[Tuple[int, TestResult]]]:
+    filename, header, start, end = shard
+    return _shard_runner._run_byte_range(filename, header, start, end)
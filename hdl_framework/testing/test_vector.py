@@ -2,14 +2,17 @@
 Test vector representation for HDL chip testing.
 """
 
-from typing import Dict
+from typing import Dict, Optional
 
 
 class TestVector:
 
-    def __init__(self, inputs: Dict[str, int], outputs: Dict[str, int]):
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, inputs: Dict[str, int], outputs: Dict[str, int], time: Optional[str] = None):
         self.inputs = inputs
         self.outputs = outputs
+        self.time = time  # clock step for sequential chips: "3+" after a tick, "4" after a tock
 
     def get_input(self, pin_name: str) -> int:
         return self.inputs.get(pin_name, 0)
@@ -32,15 +35,18 @@ class TestVector:
     def __str__(self):
         input_str = ', '.join([f"{k}={v}" for k, v in self.inputs.items()])
         output_str = ', '.join([f"{k}={v}" for k, v in self.outputs.items()])
-        return f"Inputs: {input_str} | Expected: {output_str}"
+        time_str = f"Time: {self.time} | " if self.time is not None else ""
+        return f"{time_str}Inputs: {input_str} | Expected: {output_str}"
 
     def __repr__(self):
+        if self.time is not None:
+            return f"TestVector(inputs={self.inputs}, outputs={self.outputs}, time={self.time!r})"
         return f"TestVector(inputs={self.inputs}, outputs={self.outputs})"
 
     def __eq__(self, other):
         if not isinstance(other, TestVector):
             return False
-        return self.inputs == other.inputs and self.outputs == other.outputs
+        return self.inputs == other.inputs and self.outputs == other.outputs and self.time == other.time
 
     def __hash__(self):
-        return hash((tuple(sorted(self.inputs.items())), tuple(sorted(self.outputs.items()))))
\ No newline at end of file
+        return hash((tuple(sorted(self.inputs.items())), tuple(sorted(self.outputs.items())), self.time))
\ No newline at end of file
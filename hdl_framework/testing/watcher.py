@@ -0,0 +1,111 @@
+"""
+Incremental re-testing of the chips affected by file edits.
+
+A ChipWatcher polls the modification times of the HDL and CSV directories.
+An edited HDL file invalidates that chip and every parsed chip built on it
+(HDLParser.dependencies records what each chip instantiates), and only those
+chips' vector files run again; an edited CSV re-runs just its own chip. The
+parser keeps every unaffected chip, so one edit costs a few parses and the
+affected tests rather than a full suite run.
+"""
+
+import os
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from ..parser.hdl_parser import HDLParser
+from .test_runner import TestRunner
+
+
+class WatchResult(NamedTuple):
+    chip: str
+    summary: Optional[Dict[str, float]]  # None when the chip could not be parsed or run
+    failures: List[str]
+    error: Optional[str]
+    seconds: float
+
+    @property
+    def passed(self) -> bool:
+        return self.summary is not None and self.summary["failed"] == 0
+
+
+class ChipWatcher:
+
+    def __init__(self, hdl_path: str = "hdl_files", test_path: str = "hdl_test_files",
+                 engine: str = "compiled", cache_dir: Optional[str] = None):
+        self.hdl_path = hdl_path
+        self.test_path = test_path
+        self.engine = engine
+        self.parser = HDLParser(base_path=hdl_path, cache_dir=cache_dir)
+        self.mtimes: Dict[str, int] = {}  # file path -> st_mtime_ns at the last poll
+        self.broken: Set[str] = set()  # chips whose last run raised; retried on any HDL edit
+
+    def _scan(self) -> Dict[str, int]:
+        mtimes: Dict[str, int] = {}
+        for directory, extension in ((self.hdl_path, ".hdl"), (self.test_path, ".csv")):
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(extension) and entry.is_file():
+                            mtimes[entry.path] = entry.stat().st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return mtimes
+
+    def _test_file(self, chip: str) -> str:
+        return os.path.join(self.test_path, chip + ".csv")
+
+    def changes(self) -> Tuple[List[str], List[str]]:
+        # Chips whose HDL file and chips whose CSV file was added, edited or
+        # removed since the last call.
+        mtimes = self._scan()
+        changed = {path for path in mtimes.keys() | self.mtimes.keys()
+                   if mtimes.get(path) != self.mtimes.get(path)}
+        self.mtimes = mtimes
+        hdl = sorted(os.path.basename(path)[:-4] for path in changed if path.endswith(".hdl"))
+        csv = sorted(os.path.basename(path)[:-4] for path in changed if path.endswith(".csv"))
+        return hdl, csv
+
+    def affected(self, hdl_changed: List[str], csv_changed: List[str]) -> List[str]:
+        # Drops the edited chips and their dependents from the parser and
+        # returns every chip with a vector file that must run again.
+        chips = set(self.parser.dependents(hdl_changed)) | set(csv_changed)
+        self.parser.invalidate(hdl_changed)
+        if hdl_changed:
+            chips |= self.broken
+        return sorted(chip for chip in chips
+                      if os.path.exists(os.path.join(self.hdl_path, chip + ".hdl"))
+                      and os.path.exists(self._test_file(chip)))
+
+    def test(self, chip: str) -> WatchResult:
+        start = time.perf_counter()
+        try:
+            runner = TestRunner(self.parser.parse_file(chip), engine=self.engine)
+            summary = runner.run_file(self._test_file(chip), verbose=False)
+        except Exception as e:
+            self.broken.add(chip)
+            return WatchResult(chip, None, [], f"{type(e).__name__}: {e}", time.perf_counter() - start)
+        self.broken.discard(chip)
+        failures = [f"Test {result.row + 1}: {result}"
+                    for result in runner.get_failed_tests()[:TestRunner.MAX_REPORTED_FAILURES]]
+        return WatchResult(chip, summary, failures, None, time.perf_counter() - start)
+
+    def start(self) -> List[WatchResult]:
+        # Records the current files and tests every chip that has vectors.
+        hdl, csv = self.changes()
+        return [self.test(chip) for chip in self.affected(hdl, csv)]
+
+    def poll(self) -> Tuple[List[str], List[WatchResult]]:
+        # Changed file names and the results of the chips re-tested for them.
+        hdl, csv = self.changes()
+        if not hdl and not csv:
+            return [], []
+        files = [f"{chip}.hdl" for chip in hdl] + [f"{chip}.csv" for chip in csv]
+        return files, [self.test(chip) for chip in self.affected(hdl, csv)]
+
+    def watch(self, report: Callable[[List[str], List[WatchResult]], None], interval: float = 0.5):
+        # Runs until interrupted; report is called once per batch of edits.
+        while True:
+            files, results = self.poll()
+            if files:
+                report(files, results)
+            time.sleep(interval)
@@ -2,6 +2,13 @@
 Utility classes and functions.
 """
 
+from .bus import BitRange, CONSTANT_VALUES, parse_value, pack_words, unpack_words
 from .connections import Connection, ChipInstance
+from .json_store import write_json_atomic, clear_json_entries
+from .memory_image import load_memory_image
 
-__all__ = ["Connection", "ChipInstance"]
\ No newline at end of file
+__all__ = [
+    "Connection", "ChipInstance",
+    "BitRange", "CONSTANT_VALUES", "parse_value", "pack_words", "unpack_words",
+    "write_json_atomic", "clear_json_entries", "load_memory_image"
+]
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Helpers for multi-bit bus values.
+
+A bus value is a single int with bit i holding bus bit i. When several
+vectors are simulated at once, a bus of width W carrying N vectors is packed
+bus-major: bits [i*N, (i+1)*N) hold bit i of every vector, so bitwise gates
+stay a single operation and a sub-bus is one shift and mask.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+BitRange = Tuple[int, int]  # inclusive (low, high) bit indices
+
+# Constant wires accepted on the right-hand side of a part connection.
+CONSTANT_VALUES: Dict[str, int] = {"true": -1, "false": 0}
+
+_RADIX_PREFIXES: Dict[str, int] = {"%B": 2, "0B": 2, "%D": 10, "%X": 16, "0X": 16}
+
+_BIT_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def bit_mask(width: int) -> int:
+    return (1 << width) - 1
+
+
+def transfer_bits(value: int, source_bits: Optional[BitRange], target_bits: Optional[BitRange],
+                  width: int = 1) -> int:
+    # Moves bits [source_bits] of value to start at target_bits[0]; width is
+    # the number of packed vectors per bus bit.
+    if source_bits is not None:
+        low, high = source_bits
+        value = (value >> low * width) & bit_mask((high - low + 1) * width)
+    if target_bits is not None and target_bits[0]:
+        value <<= target_bits[0] * width
+    return value
+
+
+def format_bits(name: str, bits: Optional[BitRange]) -> str:
+    if bits is None:
+        return name
+    low, high = bits
+    return f"{name}[{low}]" if low == high else f"{name}[{low}..{high}]"
+
+
+def parse_value(text: str, width: int = 1) -> int:
+    # Accepts %B/0b binary, %D decimal and %X/0x hex; an unprefixed value is
+    # binary when it has exactly `width` 0/1 digits and decimal otherwise.
+    # Negative decimals are taken as two's complement.
+    text = text.strip()
+    if width == 1:
+        if text == "0":
+            return 0
+        if text == "1":
+            return 1
+
+    prefix = text[:2].upper()
+    if prefix in _RADIX_PREFIXES:
+        value = int(text[2:], _RADIX_PREFIXES[prefix])
+    elif width > 1 and len(text) == width and not text.strip("01"):
+        value = int(text, 2)
+    else:
+        value = int(text)
+
+    if not -(1 << max(width - 1, 0)) <= value < (1 << width):
+        raise ValueError(f"Value {text!r} does not fit in {width} bit{'s' if width > 1 else ''}")
+    return value & bit_mask(width)
+
+
+def pack_words(values: List[int], bus_width: int = 1) -> int:
+    # The inverse of unpack_words, with the per-bit work in C: the vectors,
+    # last first, become one string of fixed-width binary digits and every
+    # bus_width-th digit of it is one bit plane.
+    count = len(values)
+    if count == 0:
+        return 0
+    if bus_width == 1:
+        try:
+            return int(bytes(reversed(values)).translate(_BIT_DIGITS), 2)
+        except ValueError:
+            pass  # values other than 0 and 1
+    spec = f"0{bus_width}b"
+    mask = bit_mask(bus_width)
+    digits = "".join([format(value & mask, spec) for value in reversed(values)])
+    word = 0
+    for i in range(bus_width):
+        word |= int(digits[bus_width - 1 - i::bus_width], 2) << i * count
+    return word
+
+
+def unpack_words(word: int, bus_width: int, count: int) -> List[int]:
+    if bus_width == 1:
+        return [(word >> k) & 1 for k in range(count)]
+
+    if count == 0:
+        return []
+    # Transposes through binary strings: row j of the zipped planes (most
+    # significant bus bit first) is vector count - 1 - j, so the per-bit work
+    # stays in C instead of a Python loop over every set bit.
+    mask = bit_mask(count)
+    planes = [format((word >> i * count) & mask, f"0{count}b") for i in reversed(range(bus_width))]
+    values = [int("".join(bits), 2) for bits in zip(*planes)]
+    values.reverse()
+    return values
@@ -3,18 +3,34 @@ Data classes for representing connections and chip instances in HDL files.
 """
 
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Optional
+from .bus import BitRange, format_bits, transfer_bits
 
 
 @dataclass
 class Connection:
+    # Connections to the enclosing chip's own pins leave that side's chip
+    # name empty; bit ranges of None mean the whole pin.
     source_chip: str
     source_pin: str
     target_chip: str
     target_pin: str
+    source_bits: Optional[BitRange] = None
+    target_bits: Optional[BitRange] = None
+
+    def transfer(self, value: int, width: int = 1) -> int:
+        if self.source_bits is None and self.target_bits is None:
+            return value
+        return transfer_bits(value, self.source_bits, self.target_bits, width)
 
     def __str__(self):
-        return f"{self.source_chip}.{self.source_pin} -> {self.target_chip}.{self.target_pin}"
+        source = format_bits(self.source_pin, self.source_bits)
+        target = format_bits(self.target_pin, self.target_bits)
+        if self.source_chip:
+            source = f"{self.source_chip}.{source}"
+        if self.target_chip:
+            target = f"{self.target_chip}.{target}"
+        return f"{source} -> {target}"
 
     def __repr__(self):
         return self.__str__()
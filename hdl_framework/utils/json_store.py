@@ -0,0 +1,30 @@
+"""
+JSON entry files shared by the on-disk caches.
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict
+
+
+def write_json_atomic(path: str, entry: Dict):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write through a temporary file so concurrent workers never read a partial entry.
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(entry, file)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def clear_json_entries(directory: str):
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            os.remove(os.path.join(directory, name))
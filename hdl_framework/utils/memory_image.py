@@ -0,0 +1,53 @@
+"""
+Loading of ROM/RAM images.
+
+A ``.hack`` file holds one 16-digit binary word per line, as produced by the
+Nand2Tetris assembler. Any other file is a raw image of little-endian 16-bit
+words; it is memory-mapped and read through a word view, so a full-size image
+is available without copying or parsing it.
+"""
+
+import mmap
+import sys
+from array import array
+from typing import Sequence
+
+
+def blank_memory(size: int) -> array:
+    return array('H', bytes(2 * size))
+
+
+def load_memory_image(filename: str, size: int) -> Sequence[int]:
+    if filename.endswith(".hack"):
+        with open(filename, 'rb') as file:
+            words = file.read().split()
+        if len(words) > size:
+            raise ValueError(f"{filename} has {len(words)} words but the memory holds {size}")
+        try:
+            contents = array('H', [int(word, 2) for word in words])
+        except (ValueError, OverflowError):
+            raise ValueError(f"{filename} is not a .hack file: every line must be a binary word")
+        contents.extend(blank_memory(size - len(contents)))
+        return contents
+
+    with open(filename, 'rb') as file:
+        length = file.seek(0, 2)
+        if length % 2:
+            raise ValueError(f"{filename} is not a 16-bit image: it has an odd number of bytes")
+        if length // 2 > size:
+            raise ValueError(f"{filename} has {length // 2} words but the memory holds {size}")
+        if length == 0:
+            return blank_memory(size)
+        image = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if length // 2 == size and sys.byteorder == "little":
+        # The mapping stays alive as long as the view does.
+        return memoryview(image).cast('H')
+
+    contents = array('H')
+    contents.frombytes(image)
+    image.close()
+    if sys.byteorder != "little":
+        contents.byteswap()
+    contents.extend(blank_memory(size - len(contents)))
+    return contents
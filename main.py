@@ -1,15 +1,45 @@
 import argparse
+import io
+import json
 import sys
+import time
 import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
+from typing import Optional
 
 from hdl_framework.parser import HDLParser
-from hdl_framework.testing import TestRunner
+from hdl_framework.simulation import (flatten_chip, measure_speedup, optimize_netlist, truth_table,
+                                     check_equivalence)
+from hdl_framework.testing import (TestRunner, Profiler, SimulationServer, ChipWatcher, ResultCache,
+                                  RandomTester, run_benchmarks, compare_results, load_reference)
+from hdl_framework.testing.stimulus import parse_constraint
 
-def test_chip(hdl_file: str, test_file: str, hdl_path: str = "hdl_files"):
+# Parser and result cache shared by every chip a test-all worker process handles
+_worker_parser: Optional[HDLParser] = None
+_worker_results: Optional[ResultCache] = None
+
+
+def test_chip(hdl_file: str, test_file: str, hdl_path: str = "hdl_files", engine: str = "compiled",
+              parser: Optional[HDLParser] = None, jobs: int = 1, cache_dir: Optional[str] = None,
+              memo_size: Optional[int] = None, optimize: bool = False, profile: bool = False,
+              result_cache: Optional[ResultCache] = None):
     """Test a single chip with its test file"""
+    profiler = Profiler() if profile else None
+    chip_name = hdl_file.replace('.hdl', '')
     try:
-        parser = HDLParser(base_path=hdl_path)
+        cache_key = None
+        if result_cache is not None and profiler is None:
+            cache_key = result_cache.key(chip_name, hdl_path, test_file, engine, optimize)
+            entry = result_cache.lookup(cache_key, hdl_path)
+            if entry is not None:
+                return _print_cached_result(chip_name, test_file, entry)
+
+        if profiler is not None:
+            profiler.enable()
+        if parser is None:
+            parser = HDLParser(base_path=hdl_path, cache_dir=cache_dir)
 
         print(f"Parsing HDL file: {hdl_file}")
         chip = parser.parse_file(hdl_file)
@@ -18,14 +48,39 @@ def test_chip(hdl_file: str, test_file: str, hdl_path: str = "hdl_files"):
         print(f"Outputs: {chip.outputs}")
         print()
 
-        runner = TestRunner(chip)
+        if profiler is not None and engine != "interpreter":
+            # Only the interpreter runs the sub-chip instances the profile reports on.
+            print(f"Note: --profile runs the interpreter engine instead of {engine}")
+            print()
+            engine = "interpreter"
+        runner = TestRunner(chip, engine=engine, optimize=optimize, batch=profiler is None)
+        memos = []
+        if memo_size and runner.engine != "interpreter":
+            print(f"Note: --memo only applies to the interpreter engine, not {runner.engine}")
+            print()
+        elif memo_size:
+            memos = parser.enable_memo(memo_size)
+        if runner.optimization is not None:
+            print(runner.optimization)
+            print()
 
         print(f"Loading test file: {test_file}")
-        test_vectors = runner.parse_test_file(test_file)
-        print(f"Found {len(test_vectors)} test cases")
         print()
 
-        results = runner.run_all_tests(test_vectors)
+        results = runner.run_file(test_file, jobs=jobs or os.cpu_count() or 1)
+        if cache_key is not None:
+            failures = [f"Test {result.row + 1:2d}: {result}"
+                        for result in runner.get_failed_tests()[:TestRunner.MAX_REPORTED_FAILURES]]
+            result_cache.store(cache_key, parser, chip_name, results, failures)
+
+        for memo in memos:
+            if memo.hits or memo.misses:
+                print(f"Memo {memo.name}: {memo.hits} hits, {memo.misses} misses, "
+                      f"{memo.evictions} evictions ({memo.hit_rate():.1%} hit rate)")
+
+        if profiler is not None:
+            print(f"\nProfile of {chip.name}:")
+            print(profiler.report())
 
         return results["success_rate"] == 1.0
 
@@ -35,9 +90,49 @@ def test_chip(hdl_file: str, test_file: str, hdl_path: str = "hdl_files"):
     except Exception as e:
         print(f"Error: {e}")
         return False
-
-
-def test_all_chips(hdl_path: str = "hdl_files", test_path: str = "hdl_test_files"):
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+
+def _print_cached_result(chip_name: str, test_file: str, entry) -> bool:
+    """Replay a result stored in the result cache"""
+    summary = entry["summary"]
+    print(f"Cached result for {chip_name}: HDL files and {test_file} unchanged")
+    for failure in entry["failures"]:
+        print(failure)
+    print(f"Summary: {summary['passed']}/{summary['total']} tests passed")
+    if summary["failed"] == 0:
+        print("All tests passed!")
+    else:
+        print(f"{summary['failed']} tests failed")
+    return summary["success_rate"] == 1.0
+
+
+def _init_worker(hdl_path: str, cache_dir: Optional[str], results_dir: Optional[str]):
+    """Create the parser and result caches reused by all chips tested in this worker"""
+    global _worker_parser, _worker_results
+    _worker_parser = HDLParser(base_path=hdl_path, cache_dir=cache_dir)
+    _worker_results = ResultCache(results_dir) if results_dir else None
+
+
+def _run_chip_job(job):
+    """Test one chip in a worker process, capturing its output"""
+    chip_name, test_file, hdl_path, engine, memo_size, optimize, profile = job
+    hits = _worker_results.hits if _worker_results is not None else 0
+    output = io.StringIO()
+    with redirect_stdout(output):
+        print(f"\nTesting {chip_name}...")
+        success = test_chip(chip_name, test_file, hdl_path, engine, _worker_parser,
+                            memo_size=memo_size, optimize=optimize, profile=profile,
+                            result_cache=_worker_results)
+    cached = _worker_results is not None and _worker_results.hits > hits
+    return chip_name, success, output.getvalue(), cached
+
+
+def test_all_chips(hdl_path: str = "hdl_files", test_path: str = "hdl_test_files", engine: str = "compiled",
+                   jobs: int = 1, cache_dir: Optional[str] = None, memo_size: Optional[int] = None,
+                   optimize: bool = False, profile: bool = False, results_dir: Optional[str] = None):
     """Test all chips in the hdl_files directory"""
     hdl_dir = Path(hdl_path)
     test_dir = Path(test_path)
@@ -50,27 +145,60 @@ def test_all_chips(hdl_path: str = "hdl_files", test_path: str = "hdl_test_files
         print(f"Test directory '{test_path}' not found")
         return False
 
-    hdl_files = list(hdl_dir.glob("*.hdl"))
+    hdl_files = sorted(hdl_dir.glob("*.hdl"))
 
     if not hdl_files:
         print(f"No HDL files found in '{hdl_path}'")
         return False
 
+    jobs = jobs or os.cpu_count() or 1
+
     print(f"Found {len(hdl_files)} HDL files")
     print("=" * 60)
 
     results = []
-    for hdl_file in hdl_files:
-        chip_name = hdl_file.stem
-        test_file = test_dir / f"{chip_name}.csv"
-
-        if test_file.exists():
-            print(f"\nTesting {chip_name}...")
-            success = test_chip(chip_name, str(test_file), hdl_path)
-            results.append((chip_name, success))
-        else:
-            print(f"No test file found for {chip_name} (expected: {test_file})")
-            results.append((chip_name, None))
+    cache_hits = 0
+    result_cache = ResultCache(results_dir) if results_dir else None
+    if jobs > 1:
+        chip_jobs = []
+        for hdl_file in hdl_files:
+            test_file = test_dir / f"{hdl_file.stem}.csv"
+            if test_file.exists():
+                chip_jobs.append((hdl_file.stem, str(test_file), hdl_path, engine, memo_size, optimize, profile))
+
+        # map() yields in submission order, so output stays deterministic.
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(hdl_path, cache_dir, results_dir)) as executor:
+            job_results = executor.map(_run_chip_job, chip_jobs)
+            for hdl_file in hdl_files:
+                chip_name = hdl_file.stem
+                test_file = test_dir / f"{chip_name}.csv"
+
+                if test_file.exists():
+                    _, success, output, cached = next(job_results)
+                    cache_hits += cached
+                    print(output, end="")
+                    results.append((chip_name, success))
+                else:
+                    print(f"No test file found for {chip_name} (expected: {test_file})")
+                    results.append((chip_name, None))
+    else:
+        parser = HDLParser(base_path=hdl_path, cache_dir=cache_dir)
+        for hdl_file in hdl_files:
+            chip_name = hdl_file.stem
+            test_file = test_dir / f"{chip_name}.csv"
+
+            if test_file.exists():
+                print(f"\nTesting {chip_name}...")
+                success = test_chip(chip_name, str(test_file), hdl_path, engine, parser,
+                                    memo_size=memo_size, optimize=optimize, profile=profile,
+                                    result_cache=result_cache)
+                results.append((chip_name, success))
+            else:
+                print(f"No test file found for {chip_name} (expected: {test_file})")
+                results.append((chip_name, None))
+        if result_cache is not None:
+            cache_hits = result_cache.hits
 
     print("\n" + "=" * 60)
     print("FINAL SUMMARY")
@@ -93,6 +221,9 @@ def test_all_chips(hdl_path: str = "hdl_files", test_path: str = "hdl_test_files
     print(f"Passed: {passed}")
     print(f"Failed: {failed}")
     print(f"Skipped: {skipped}")
+    if results_dir:
+        tested = passed + failed
+        print(f"Result cache: {cache_hits} hits, {tested - cache_hits} misses")
 
     if failed == 0 and passed > 0:
         print("\nAll tested chips passed!")
@@ -105,6 +236,248 @@ def test_all_chips(hdl_path: str = "hdl_files", test_path: str = "hdl_test_files
         return False
 
 
+def optimize_chip(chip_name: str, hdl_path: str = "hdl_files", vectors: int = 10000):
+    """Optimize a chip's netlist and report gate counts and evaluation speedup"""
+    try:
+        chip = HDLParser(base_path=hdl_path).parse_file(chip_name)
+        netlist = flatten_chip(chip)
+        optimized, report = optimize_netlist(netlist)
+        print(f"Optimizing {chip.name}")
+        print(report)
+
+        original_time, optimized_time = measure_speedup(netlist, optimized, vectors)
+        unit = "cycles" if netlist.is_sequential() else "vectors"
+        print(f"\nEvaluation over {vectors} random {unit} (outputs match):")
+        print(f"  original:  {original_time:.3f}s")
+        print(f"  optimized: {optimized_time:.3f}s")
+        print(f"  speedup:   {original_time / optimized_time:.2f}x")
+        return True
+
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+        return False
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def write_truth_table(chip_name: str, hdl_path: str = "hdl_files", output: Optional[str] = None,
+                      file_format: str = "csv", max_bits: int = 24):
+    """Enumerate every input combination of a chip and write its truth table"""
+    try:
+        if file_format == "binary" and not output:
+            raise ValueError("The binary format needs --output")
+        chip = HDLParser(base_path=hdl_path).parse_file(chip_name)
+        start = time.perf_counter()
+        table = truth_table(chip, max_bits)
+        elapsed = time.perf_counter() - start
+        if not output:
+            try:
+                for line in table.csv_lines():
+                    print(line)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                # The reader (e.g. `| head`) closed the pipe; point stdout at devnull
+                # so the interpreter's final flush does not raise again.
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return True
+        if file_format == "binary":
+            table.write_binary(output)
+        else:
+            table.write_csv(output)
+        print(f"{table.rows} rows of {chip.name} ({table.input_bits} input bits) "
+              f"in {elapsed * 1000:.1f} ms written to {output}")
+        return True
+
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+        return False
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def check_equivalent(chip_name: str, other_name: Optional[str] = None, hdl_path: str = "hdl_files",
+                     reference_path: Optional[str] = None, method: str = "auto"):
+    """Prove two implementations of a chip equivalent or print a counterexample"""
+    try:
+        other_name = other_name or chip_name
+        reference_path = reference_path or hdl_path
+        if other_name == chip_name and os.path.abspath(reference_path) == os.path.abspath(hdl_path):
+            raise ValueError("Give a second chip or a --reference-path to compare against")
+        chip = HDLParser(base_path=hdl_path).parse_file(chip_name)
+        other = HDLParser(base_path=reference_path).parse_file(other_name)
+        start = time.perf_counter()
+        result = check_equivalence(chip, other, method)
+        elapsed = time.perf_counter() - start
+
+        nodes = f", {result.nodes} BDD nodes" if result.method == "bdd" else ""
+        first = os.path.join(hdl_path, chip_name)
+        second = os.path.join(reference_path, other_name)
+        if result.equivalent:
+            print(f"{first} and {second} are equivalent ({result.method}{nodes}, {elapsed * 1000:.1f} ms)")
+            return True
+        print(f"{first} and {second} differ ({result.method}{nodes}, {elapsed * 1000:.1f} ms)")
+        print(f"  Inputs:   {result.counterexample}")
+        print(f"  {chip_name}: {result.outputs_a}")
+        print(f"  {other_name}: {result.outputs_b}")
+        return False
+
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+        return False
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def random_test(chip_name: str, hdl_path: str = "hdl_files", reference: Optional[str] = None, seed: int = 0,
+                max_vectors: int = 1000000, coverage_target: float = 1.0, batch_size: int = 4096,
+                constraints: Optional[list] = None, max_failures: int = TestRunner.MAX_REPORTED_FAILURES):
+    """Test a chip on seeded random vectors until a coverage target or vector budget is reached"""
+    try:
+        chip = HDLParser(base_path=hdl_path).parse_file(chip_name)
+        model = load_reference(reference) if reference else None
+        pins = {}
+        for text in constraints or []:
+            pin, separator, value = text.partition("=")
+            if not separator or pin not in chip.inputs:
+                raise ValueError(f"Constraint '{text}' must have the form PIN=VALUE for an input pin of {chip.name}")
+            pins[pin] = parse_constraint(value, chip.pin_width(pin))
+
+        tester = RandomTester(chip, model, seed, pins, batch_size)
+        result = tester.run(max_vectors, coverage_target, max_failures)
+        rate = result.vectors / result.seconds * 60 if result.seconds else 0
+        print(f"Random testing {chip.name} (seed {seed}): {result.vectors:,} vectors in {result.seconds:.2f}s "
+              f"({rate:,.0f} vectors/min)")
+        print(f"Toggle coverage: {result.covered}/{result.wires} wires ({result.coverage:.1%})")
+        if result.uncovered:
+            shown = ", ".join(result.uncovered[:10])
+            more = f" and {len(result.uncovered) - 10} more" if len(result.uncovered) > 10 else ""
+            print(f"  Never toggled: {shown}{more}")
+        reasons = {"coverage": "coverage target reached", "budget": "vector budget spent",
+                   "failures": f"{result.failed} failures"}
+        print(f"Stopped: {reasons[result.stop_reason]}")
+
+        if model is None:
+            print("No reference model given; outputs were not checked")
+            return True
+        for failure in result.failures:
+            print(failure)
+        if result.passed:
+            print("All vectors matched the reference!")
+        else:
+            print(f"{result.failed} vectors did not match the reference")
+        return result.passed
+
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+        return False
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def benchmark(hdl_path: Optional[str] = "hdl_files", output: Optional[str] = None,
+              baseline: Optional[str] = None, threshold: float = 0.2, min_time: float = 0.2,
+              scale: int = 1, synthetic: bool = True, engines: Optional[list] = None,
+              chips: Optional[list] = None):
+    """Benchmark parsing, building and evaluation; compare with a baseline run"""
+    def report(name, result):
+        rates = "  ".join(f"{engine} {rate:,.0f}/s" for engine, rate in result["throughput"].items())
+        print(f"{name:<14} {result['gates']:>6} gates  parse {result['parse_seconds'] * 1000:7.2f} ms  "
+              f"build {result['build_seconds'] * 1000:7.2f} ms  {rates}")
+
+    try:
+        previous = None
+        if baseline:
+            with open(baseline) as file:
+                previous = json.load(file)
+
+        results = run_benchmarks(hdl_path, synthetic, scale, engines, chips, min_time, progress=report)
+        if output:
+            with open(output, 'w') as file:
+                json.dump(results, file, indent=2)
+            print(f"\nResults written to {output}")
+
+        if previous is None:
+            return True
+        regressions = compare_results(previous, results, threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions against {baseline} (threshold {threshold:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return False
+        print(f"\nNo regressions against {baseline} (threshold {threshold:.0%})")
+        return True
+
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
+        return False
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def serve(hdl_path: str = "hdl_files", socket_path: Optional[str] = None, host: str = "127.0.0.1",
+          port: int = 8765, workers: Optional[int] = None, cache_dir: Optional[str] = None,
+          preload: bool = False):
+    """Run the simulation server until it receives a shutdown request"""
+    server = SimulationServer(hdl_path, cache_dir, workers)
+    address = socket_path if socket_path else (host, port)
+    try:
+        if preload:
+            chips = server.store.preload()
+            print(f"Preloaded {len(chips)} chips from {hdl_path}")
+        where = f"unix:{socket_path}" if socket_path else f"{host}:{port}"
+        server.serve(address, on_ready=lambda: print(f"Serving {hdl_path} on {where} "
+                                                     f"({server.workers} workers)", flush=True))
+        return True
+    except KeyboardInterrupt:
+        return True
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+
+def _print_watch_results(results, seconds: float):
+    for result in results:
+        if result.error is not None:
+            print(f"  ERROR {result.chip}: {result.error}")
+            continue
+        summary = result.summary
+        status = "PASS" if result.passed else "FAIL"
+        print(f"  {status}  {result.chip}: {summary['passed']}/{summary['total']} "
+              f"({result.seconds * 1000:.1f} ms)")
+        for failure in result.failures[:5]:
+            print(f"        {failure}")
+    passed = sum(1 for result in results if result.passed)
+    print(f"{passed}/{len(results)} chips passed in {seconds * 1000:.1f} ms")
+
+
+def watch(hdl_path: str = "hdl_files", test_path: str = "hdl_test_files", engine: str = "compiled",
+          interval: float = 0.5, cache_dir: Optional[str] = None):
+    """Re-test the chips affected by each HDL or CSV edit until interrupted"""
+    watcher = ChipWatcher(hdl_path, test_path, engine, cache_dir)
+    try:
+        start = time.perf_counter()
+        results = watcher.start()
+        print(f"Testing {len(results)} chips in {hdl_path}")
+        _print_watch_results(results, time.perf_counter() - start)
+        print(f"\nWatching {hdl_path} and {test_path} (Ctrl+C to stop)")
+
+        while True:
+            start = time.perf_counter()
+            files, results = watcher.poll()
+            if files:
+                print(f"\nChanged: {', '.join(files)}")
+                _print_watch_results(results, time.perf_counter() - start)
+            time.sleep(interval)
+
+    except KeyboardInterrupt:
+        return True
+
+
 def interactive_mode():
     """Interactive mode for testing chips"""
     print("HDL Framework - Interactive Mode")
@@ -201,6 +574,13 @@ def main():
         epilog="Examples:\n"
                "  python main.py test And tests/And.tst\n"
                "  python main.py test-all\n"
+               "  python main.py optimize PC\n"
+               "  python main.py truth-table Mux --output Mux.csv\n"
+               "  python main.py equiv Mux --reference-path reference\n"
+               "  python main.py random Add16 --reference models.py:add16\n"
+               "  python main.py bench --output bench.json\n"
+               "  python main.py serve --socket /tmp/hdl.sock\n"
+               "  python main.py watch\n"
                "  python main.py interactive\n"
                "  python main.py create-examples",
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -214,6 +594,22 @@ def main():
     test_parser.add_argument("test_file", help="Path to test file")
     test_parser.add_argument("--hdl-path", default="hdl_files",
                              help="Directory containing HDL files (default: hdl_files)")
+    test_parser.add_argument("--engine", default="compiled", choices=TestRunner.ENGINES,
+                             help="Simulation engine (default: compiled)")
+    test_parser.add_argument("--jobs", "-j", type=int, default=1,
+                             help="Split the test file across worker processes, 0 for one per CPU (default: 1)")
+    test_parser.add_argument("--cache-dir", default=".hdl_cache",
+                             help="Directory for persistent caches (default: .hdl_cache)")
+    test_parser.add_argument("--no-parse-cache", action="store_true",
+                             help="Always parse HDL files from source")
+    test_parser.add_argument("--no-cache", action="store_true",
+                             help="Always simulate, ignoring stored results for unchanged chips and vector files")
+    test_parser.add_argument("--memo", type=int, metavar="SIZE",
+                             help="Memoize combinational sub-chip outputs, keeping up to SIZE entries per chip type")
+    test_parser.add_argument("--optimize", action="store_true",
+                             help="Optimize the flattened netlist before simulating it")
+    test_parser.add_argument("--profile", action="store_true",
+                             help="Print parse/build times per HDL file and compute calls and time per sub-chip")
 
     # Test all chips command
     test_all_parser = subparsers.add_parser("test-all", help="Test all chips")
@@ -221,6 +617,131 @@ def main():
                                  help="Directory containing HDL files (default: hdl_files)")
     test_all_parser.add_argument("--test-path", default="hdl_test_files",
                                  help="Directory containing test files (default: tests)")
+    test_all_parser.add_argument("--engine", default="compiled", choices=TestRunner.ENGINES,
+                                 help="Simulation engine (default: compiled)")
+    test_all_parser.add_argument("--jobs", "-j", type=int, default=1,
+                                 help="Number of worker processes, 0 for one per CPU (default: 1)")
+    test_all_parser.add_argument("--cache-dir", default=".hdl_cache",
+                                 help="Directory for persistent caches (default: .hdl_cache)")
+    test_all_parser.add_argument("--no-parse-cache", action="store_true",
+                                 help="Always parse HDL files from source")
+    test_all_parser.add_argument("--no-cache", action="store_true",
+                                 help="Always simulate, ignoring stored results for unchanged chips and vector files")
+    test_all_parser.add_argument("--memo", type=int, metavar="SIZE",
+                                 help="Memoize combinational sub-chip outputs, keeping up to SIZE entries per chip type")
+    test_all_parser.add_argument("--optimize", action="store_true",
+                                 help="Optimize the flattened netlist before simulating it")
+    test_all_parser.add_argument("--profile", action="store_true",
+                                 help="Print parse/build times per HDL file and compute calls and time per sub-chip")
+
+    # Optimize command
+    optimize_parser = subparsers.add_parser("optimize", help="Optimize a chip's netlist and report the gains")
+    optimize_parser.add_argument("chip", help="Chip name (without .hdl extension)")
+    optimize_parser.add_argument("--hdl-path", default="hdl_files",
+                                 help="Directory containing HDL files (default: hdl_files)")
+    optimize_parser.add_argument("--vectors", type=int, default=10000,
+                                 help="Random vectors (or clock cycles) used for timing (default: 10000)")
+
+    # Truth table command
+    table_parser = subparsers.add_parser("truth-table", help="Write a chip's exhaustive truth table")
+    table_parser.add_argument("chip", help="Chip name (without .hdl extension)")
+    table_parser.add_argument("--hdl-path", default="hdl_files",
+                              help="Directory containing HDL files (default: hdl_files)")
+    table_parser.add_argument("--output", "-o", metavar="FILE",
+                              help="Write the table to FILE instead of printing the CSV")
+    table_parser.add_argument("--format", default="csv", choices=["csv", "binary"], dest="file_format",
+                              help="csv (usable as a test file) or binary bit planes (default: csv)")
+    table_parser.add_argument("--max-bits", type=int, default=24,
+                              help="Refuse chips with more input bits than this (default: 24)")
+
+    # Equivalence command
+    equiv_parser = subparsers.add_parser("equiv", help="Check that two implementations of a chip are equivalent")
+    equiv_parser.add_argument("chip", help="Chip name (without .hdl extension)")
+    equiv_parser.add_argument("other", nargs="?",
+                              help="Chip to compare against (default: the same name in --reference-path)")
+    equiv_parser.add_argument("--hdl-path", default="hdl_files",
+                              help="Directory containing HDL files (default: hdl_files)")
+    equiv_parser.add_argument("--reference-path",
+                              help="Directory containing the reference chip (default: --hdl-path)")
+    equiv_parser.add_argument("--method", default="auto", choices=["auto", "bdd", "exhaustive"],
+                              help="auto enumerates up to 16 input bits and uses BDDs above (default: auto)")
+
+    # Random testing command
+    random_parser = subparsers.add_parser("random", help="Test a chip on random vectors against a Python model")
+    random_parser.add_argument("chip", help="Chip name (without .hdl extension)")
+    random_parser.add_argument("--hdl-path", default="hdl_files",
+                               help="Directory containing HDL files (default: hdl_files)")
+    random_parser.add_argument("--reference", metavar="MODULE:FUNCTION",
+                               help="Reference model, e.g. models.py:add16; without it only coverage is measured")
+    random_parser.add_argument("--seed", type=int, default=0,
+                               help="Random seed (default: 0)")
+    random_parser.add_argument("--vectors", type=int, default=1000000,
+                               help="Vector budget (default: 1000000)")
+    random_parser.add_argument("--coverage", type=float, default=1.0,
+                               help="Stop once this fraction of wires has toggled (default: 1.0)")
+    random_parser.add_argument("--batch", type=int, default=4096,
+                               help="Vectors generated and simulated per batch (default: 4096)")
+    random_parser.add_argument("--constrain", action="append", metavar="PIN=VALUE",
+                               help="Fix a pin (sel=3), limit it to a range (a=0..255) or a list (op=1,2,4); "
+                                    "repeatable")
+    random_parser.add_argument("--max-failures", type=int, default=TestRunner.MAX_REPORTED_FAILURES,
+                               help=f"Stop after this many mismatches, 0 to never stop "
+                                    f"(default: {TestRunner.MAX_REPORTED_FAILURES})")
+
+    # Benchmark command
+    bench_parser = subparsers.add_parser("bench", help="Benchmark parsing, building and simulation speed")
+    bench_parser.add_argument("--hdl-path", default="hdl_files",
+                              help="Directory containing HDL files (default: hdl_files)")
+    bench_parser.add_argument("--output", "-o", metavar="FILE",
+                              help="Write the results as JSON to FILE")
+    bench_parser.add_argument("--baseline", metavar="FILE",
+                              help="Compare with an earlier --output file and fail on regressions")
+    bench_parser.add_argument("--threshold", type=float, default=0.2,
+                              help="Relative slowdown counted as a regression (default: 0.2)")
+    bench_parser.add_argument("--min-time", type=float, default=0.2,
+                              help="Minimum seconds per throughput measurement (default: 0.2)")
+    bench_parser.add_argument("--scale", type=int, default=1,
+                              help="Size factor for the generated designs (default: 1)")
+    bench_parser.add_argument("--no-synthetic", action="store_true",
+                              help="Only benchmark the chips in --hdl-path")
+    bench_parser.add_argument("--engine", action="append", dest="engines",
+                              help="Only measure this engine (repeatable)")
+    bench_parser.add_argument("--chip", action="append", dest="chips",
+                              help="Only benchmark this chip (repeatable)")
+
+    # Server command
+    serve_parser = subparsers.add_parser("serve", help="Serve test requests from a warm process")
+    serve_parser.add_argument("--hdl-path", default="hdl_files",
+                              help="Directory containing HDL files (default: hdl_files)")
+    serve_parser.add_argument("--socket", metavar="PATH",
+                              help="Listen on a Unix socket instead of TCP")
+    serve_parser.add_argument("--host", default="127.0.0.1",
+                              help="TCP host to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765,
+                              help="TCP port to listen on (default: 8765)")
+    serve_parser.add_argument("--workers", type=int, default=0,
+                              help="Connections served at once, 0 for one per CPU (default: 0)")
+    serve_parser.add_argument("--cache-dir", default=".hdl_cache",
+                              help="Directory for persistent caches (default: .hdl_cache)")
+    serve_parser.add_argument("--no-parse-cache", action="store_true",
+                              help="Always parse HDL files from source")
+    serve_parser.add_argument("--preload", action="store_true",
+                              help="Parse every chip in --hdl-path before accepting requests")
+
+    # Watch command
+    watch_parser = subparsers.add_parser("watch", help="Re-test the chips affected by each file edit")
+    watch_parser.add_argument("--hdl-path", default="hdl_files",
+                              help="Directory containing HDL files (default: hdl_files)")
+    watch_parser.add_argument("--test-path", default="hdl_test_files",
+                              help="Directory containing test files (default: hdl_test_files)")
+    watch_parser.add_argument("--engine", default="compiled", choices=TestRunner.ENGINES,
+                              help="Simulation engine (default: compiled)")
+    watch_parser.add_argument("--interval", type=float, default=0.5,
+                              help="Seconds between directory polls (default: 0.5)")
+    watch_parser.add_argument("--cache-dir", default=".hdl_cache",
+                              help="Directory for persistent caches (default: .hdl_cache)")
+    watch_parser.add_argument("--no-parse-cache", action="store_true",
+                              help="Always parse HDL files from source")
 
     # Interactive mode command
     subparsers.add_parser("interactive", help="Run in interactive mode")
@@ -231,11 +752,51 @@ def main():
     args = parser.parse_args()
 
     if args.command == "test":
-        success = test_chip(args.chip, args.test_file, args.hdl_path)
+        cache_dir = None if args.no_parse_cache else args.cache_dir
+        result_cache = None if args.no_cache else ResultCache(args.cache_dir)
+        success = test_chip(args.chip, args.test_file, args.hdl_path, args.engine,
+                            jobs=args.jobs, cache_dir=cache_dir, memo_size=args.memo, optimize=args.optimize,
+                            profile=args.profile, result_cache=result_cache)
         sys.exit(0 if success else 1)
 
     elif args.command == "test-all":
-        success = test_all_chips(args.hdl_path, args.test_path)
+        cache_dir = None if args.no_parse_cache else args.cache_dir
+        success = test_all_chips(args.hdl_path, args.test_path, args.engine, args.jobs, cache_dir,
+                                 args.memo, args.optimize, args.profile,
+                                 None if args.no_cache else args.cache_dir)
+        sys.exit(0 if success else 1)
+
+    elif args.command == "optimize":
+        success = optimize_chip(args.chip, args.hdl_path, args.vectors)
+        sys.exit(0 if success else 1)
+
+    elif args.command == "truth-table":
+        success = write_truth_table(args.chip, args.hdl_path, args.output, args.file_format, args.max_bits)
+        sys.exit(0 if success else 1)
+
+    elif args.command == "equiv":
+        success = check_equivalent(args.chip, args.other, args.hdl_path, args.reference_path, args.method)
+        sys.exit(0 if success else 1)
+
+    elif args.command == "random":
+        success = random_test(args.chip, args.hdl_path, args.reference, args.seed, args.vectors, args.coverage,
+                              args.batch, args.constrain, args.max_failures)
+        sys.exit(0 if success else 1)
+
+    elif args.command == "bench":
+        success = benchmark(args.hdl_path, args.output, args.baseline, args.threshold, args.min_time,
+                            args.scale, not args.no_synthetic, args.engines, args.chips)
+        sys.exit(0 if success else 1)
+
+    elif args.command == "serve":
+        cache_dir = None if args.no_parse_cache else args.cache_dir
+        success = serve(args.hdl_path, args.socket, args.host, args.port, args.workers or None,
+                        cache_dir, args.preload)
+        sys.exit(0 if success else 1)
+
+    elif args.command == "watch":
+        cache_dir = None if args.no_parse_cache else args.cache_dir
+        success = watch(args.hdl_path, args.test_path, args.engine, args.interval, cache_dir)
         sys.exit(0 if success else 1)
 
     elif args.command == "interactive":
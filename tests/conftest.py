@@ -0,0 +1,28 @@
+import os
+import shutil
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HDL_PATH = os.path.join(ROOT, "hdl_files")
+TEST_PATH = os.path.join(ROOT, "hdl_test_files")
+
+
+def chip_names():
+    # Chips that have both an HDL file and a vector file.
+    return sorted(name[:-4] for name in os.listdir(HDL_PATH)
+                  if name.endswith(".hdl") and os.path.exists(os.path.join(TEST_PATH, name[:-4] + ".csv")))
+
+
+def write_hdl(directory, name: str, source: str) -> str:
+    path = os.path.join(str(directory), f"{name}.hdl")
+    with open(path, 'w') as file:
+        file.write(source)
+    return path
+
+
+@pytest.fixture
+def hdl_copy(tmp_path):
+    # A writable copy of hdl_files, so tests can edit chips.
+    directory = tmp_path / "hdl"
+    shutil.copytree(HDL_PATH, directory)
+    return directory
@@ -0,0 +1,63 @@
+import pytest
+from hdl_framework.utils.bus import format_bits, pack_words, parse_value, transfer_bits, unpack_words
+
+
+@pytest.mark.parametrize("text, width, expected", [
+    ("0", 1, 0),
+    ("1", 1, 1),
+    ("0000000000000101", 16, 5),
+    ("%B101", 16, 5),
+    ("0b101", 16, 5),
+    ("%D42", 16, 42),
+    ("42", 16, 42),
+    ("%XFF", 16, 255),
+    ("0xff", 16, 255),
+    ("%D-1", 16, 0xFFFF),
+    ("%D-32768", 16, 0x8000),
+    ("-2", 4, 0b1110),
+    ("101", 3, 5),  # exactly `width` binary digits
+    ("11", 4, 11),  # otherwise decimal
+])
+def test_parse_value(text, width, expected):
+    assert parse_value(text, width) == expected
+
+
+@pytest.mark.parametrize("text, width", [
+    ("%D65536", 16),
+    ("%D-32769", 16),
+    ("2", 1),
+    ("%B10000", 4),
+])
+def test_parse_value_out_of_range(text, width):
+    with pytest.raises(ValueError, match="does not fit"):
+        parse_value(text, width)
+
+
+@pytest.mark.parametrize("bus_width", [1, 3, 16])
+def test_pack_unpack_round_trip(bus_width):
+    values = [(k * 2654435761) & ((1 << bus_width) - 1) for k in range(37)]
+    word = pack_words(values, bus_width)
+    assert unpack_words(word, bus_width, len(values)) == values
+    # Bus bit i of vector k sits at bit i * count + k.
+    for k, value in enumerate(values):
+        for i in range(bus_width):
+            assert (word >> i * len(values) + k) & 1 == (value >> i) & 1
+
+
+def test_pack_words_masks_wide_and_negative_values():
+    assert pack_words([-1, 2, 3], 1) == 0b101
+    assert unpack_words(pack_words([-1, 17], 4), 4, 2) == [15, 1]
+
+
+def test_transfer_bits_moves_a_slice():
+    assert transfer_bits(0b110100, (2, 4), None) == 0b101
+    assert transfer_bits(0b101, None, (3, 5)) == 0b101000
+    # Two vectors per bus bit: bits 1..2 of both vectors move down to bit 0.
+    packed = pack_words([0b110, 0b010], 3)
+    assert unpack_words(transfer_bits(packed, (1, 2), None, 2), 2, 2) == [0b11, 0b01]
+
+
+def test_format_bits():
+    assert format_bits("a", None) == "a"
+    assert format_bits("a", (3, 3)) == "a[3]"
+    assert format_bits("a", (0, 7)) == "a[0..7]"
@@ -0,0 +1,80 @@
+import os
+from hdl_framework.parser import HDLParser
+from hdl_framework.testing import ResultCache, TestRunner
+from conftest import TEST_PATH
+
+
+def parse(hdl_copy, cache_dir, name: str, native_memory: bool = True) -> HDLParser:
+    parser = HDLParser(base_path=str(hdl_copy), cache_dir=str(cache_dir), native_memory=native_memory)
+    parser.parse_file(name)
+    return parser
+
+
+def test_parse_cache_hits_when_nothing_changed(hdl_copy, tmp_path):
+    first = parse(hdl_copy, tmp_path, "FullAdder")
+    assert first.parse_cache.hits == 0
+    second = parse(hdl_copy, tmp_path, "FullAdder")
+    assert second.parse_cache.misses == 0
+    assert second.chip_keys == first.chip_keys
+
+
+def test_parse_cache_invalidates_dependents_only(hdl_copy, tmp_path):
+    first = parse(hdl_copy, tmp_path, "FullAdder")
+    parse(hdl_copy, tmp_path, "Mux")
+    xor = hdl_copy / "Xor.hdl"
+    xor.write_text(xor.read_text() + "\n// edited\n")
+
+    second = parse(hdl_copy, tmp_path, "FullAdder")
+    for name in ("Xor", "HalfAdder", "FullAdder"):
+        assert second.chip_keys[name] != first.chip_keys[name]
+    assert second.parse_cache.misses == 3  # Xor, HalfAdder, FullAdder; nothing else is stale
+    assert parse(hdl_copy, tmp_path, "Mux").parse_cache.misses == 0
+
+
+def test_parse_cache_separates_native_memory(hdl_copy, tmp_path):
+    native = parse(hdl_copy, tmp_path, "RAM64")
+    assert "RAM8" not in native.dependencies["RAM64"]
+    for _ in range(2):  # built fresh, then loaded from the cache
+        gate_level = parse(hdl_copy, tmp_path, "RAM64", native_memory=False)
+        assert "RAM8" in gate_level.dependencies["RAM64"]
+        assert "RAM8" in gate_level.closure("RAM64")
+
+
+def run_cached(hdl_copy, cache: ResultCache, name: str, test_file: str):
+    key = cache.key(name, str(hdl_copy), test_file, "compiled")
+    entry = cache.lookup(key, str(hdl_copy))
+    if entry is not None:
+        return entry["summary"]
+    parser = HDLParser(base_path=str(hdl_copy))
+    runner = TestRunner(parser.parse_file(name))
+    summary = runner.run_file(test_file, verbose=False)
+    cache.store(key, parser, name, summary, [])
+    return summary
+
+
+def test_result_cache_invalidation(hdl_copy, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    test_file = tmp_path / "FullAdder.csv"
+    test_file.write_text(open(os.path.join(TEST_PATH, "FullAdder.csv")).read())
+
+    run_cached(hdl_copy, cache, "FullAdder", str(test_file))
+    run_cached(hdl_copy, cache, "FullAdder", str(test_file))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Editing a file in the dependency closure forces a re-run.
+    xor = hdl_copy / "Xor.hdl"
+    xor.write_text(xor.read_text().replace("Or(a=AandNotB", "And(a=AandNotB"))
+    summary = run_cached(hdl_copy, cache, "FullAdder", str(test_file))
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert summary["failed"] > 0
+
+    # So does editing the vector file.
+    test_file.write_text(test_file.read_text() + "\n")
+    run_cached(hdl_copy, cache, "FullAdder", str(test_file))
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    # An unrelated chip leaves the entry valid.
+    mux = hdl_copy / "Mux.hdl"
+    mux.write_text(mux.read_text() + "\n// edited\n")
+    run_cached(hdl_copy, cache, "FullAdder", str(test_file))
+    assert (cache.hits, cache.misses) == (2, 3)
@@ -0,0 +1,69 @@
+import os
+import pytest
+from hdl_framework.parser import HDLParser
+from hdl_framework.testing import TestRunner
+from conftest import HDL_PATH, TEST_PATH, chip_names
+
+
+def run_engine(name: str, engine: str):
+    chip = HDLParser(base_path=HDL_PATH).parse_file(name)
+    runner = TestRunner(chip, engine=engine)
+    vectors = runner.parse_test_file(os.path.join(TEST_PATH, f"{name}.csv"))
+    summary = runner.run_all_tests(vectors, verbose=False)
+    return runner, summary, [result.actual_outputs for result in runner.test_results]
+
+
+@pytest.mark.parametrize("name", chip_names())
+def test_engines_agree_on_vector_files(name):
+    chip = HDLParser(base_path=HDL_PATH).parse_file(name)
+    engines = ["interpreter", "compiled"] if chip.is_sequential() else ["interpreter", "compiled", "event"]
+    outputs = {}
+    for engine in engines:
+        runner, summary, actual = run_engine(name, engine)
+        assert summary["failed"] == 0, f"{name} fails on {runner.engine}"
+        outputs[runner.engine] = actual
+    reference = outputs.pop("interpreter")
+    for engine, actual in outputs.items():
+        assert actual == reference, f"{name}: {engine} differs from the interpreter"
+
+
+@pytest.mark.parametrize("name", ["Add16", "Mux8Way16", "FullAdder"])
+def test_streamed_file_run_matches_vector_count(name):
+    chip = HDLParser(base_path=HDL_PATH).parse_file(name)
+    filename = os.path.join(TEST_PATH, f"{name}.csv")
+    expected = len(TestRunner(chip).parse_test_file(filename))
+    for engine in ("compiled", "interpreter"):
+        for jobs in (1, 2):
+            summary = TestRunner(chip, engine=engine).run_file(filename, verbose=False, jobs=jobs)
+            assert (summary["total"], summary["failed"]) == (expected, 0)
+
+
+def test_failures_keep_their_file_rows(tmp_path):
+    chip = HDLParser(base_path=HDL_PATH).parse_file("Xor")
+    lines = ["a,b,out"] + ["0,0,0"] * 300 + ["1,0,0"]
+    filename = tmp_path / "Xor.csv"
+    filename.write_text("\n".join(lines))
+    for engine in ("compiled", "interpreter", "event"):
+        runner = TestRunner(chip, engine=engine)
+        summary = runner.run_file(str(filename), verbose=False)
+        assert summary["failed"] == 1
+        assert [result.row for result in runner.get_failed_tests()] == [300]
+        assert runner.get_failed_tests()[0].actual_outputs == {"out": 1}
+
+
+@pytest.mark.parametrize("rows", [
+    ["0+,1,1,0", "1,1,1,1", "2,0,1,0", "3,0,1,0"],  # "N" rows without a preceding "N+"
+    ["0,1,1,1", "1,0,0,1", "1+,0,1,1", "2,0,1,0"],
+    ["1,1,1,1", "1+,0,1,1", "1+,1,0,1", "2,1,0,1"],  # a repeated tick resamples
+])
+def test_clocked_and_interpreter_agree_on_bare_tock_rows(tmp_path, rows):
+    filename = tmp_path / "Bit.csv"
+    filename.write_text("\n".join(["time,in,load,out"] + rows))
+    chip = HDLParser(base_path=HDL_PATH).parse_file("Bit")
+    outputs = {}
+    for engine in ("compiled", "interpreter"):
+        runner = TestRunner(chip, engine=engine)
+        runner.run_all_tests(runner.parse_test_file(str(filename)), verbose=False)
+        outputs[runner.engine] = [result.actual_outputs for result in runner.test_results]
+    assert outputs["clocked"] == outputs["interpreter"]
+    assert all(result.passed for result in runner.test_results)
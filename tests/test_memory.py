@@ -0,0 +1,42 @@
+import struct
+from hdl_framework.core.builtin_gates import RAM8Gate, ROM32KGate
+
+
+def write_image(path, words):
+    path.write_bytes(struct.pack(f"<{len(words)}H", *words))
+    return str(path)
+
+
+def clock(gate, **inputs):
+    gate.input_values.update(inputs)
+    gate.tick()
+    gate.tock()
+    return gate.output_values["out"]
+
+
+def test_ram_load_is_writable_and_survives_reset(tmp_path):
+    ram = RAM8Gate()
+    image = write_image(tmp_path / "ram.bin", range(10, 18))  # full size, so memory-mapped
+    ram.load(image)
+    assert clock(ram, load=1, address=3, **{"in": 99}) == 99
+    ram.reset()
+    assert list(ram.contents) == list(range(10, 18))
+    assert ram.output_values["out"] == 10
+
+
+def test_ram_reset_without_image_clears(tmp_path):
+    ram = RAM8Gate()
+    clock(ram, load=1, address=0, **{"in": 5})
+    ram.reset()
+    assert list(ram.contents) == [0] * 8
+
+
+def test_rom_reads_hack_file(tmp_path):
+    path = tmp_path / "prog.hack"
+    path.write_text("0000000000000101\n1111111111111111\n")
+    rom = ROM32KGate()
+    rom.load(str(path))
+    rom.input_values["address"] = 1
+    assert rom.compute() == {"out": 0xFFFF}
+    rom.reset()
+    assert rom.output_values["out"] == 5
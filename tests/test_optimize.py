@@ -0,0 +1,25 @@
+import pytest
+from hdl_framework.parser import HDLParser
+from hdl_framework.simulation import flatten_chip, measure_speedup, optimize_netlist
+from hdl_framework.simulation.truth_table import netlist_truth_table
+from conftest import HDL_PATH, chip_names
+
+
+@pytest.mark.parametrize("name", chip_names())
+def test_optimized_netlist_is_equivalent(name):
+    netlist = flatten_chip(HDLParser(base_path=HDL_PATH).parse_file(name))
+    optimized, report = optimize_netlist(netlist)
+    assert report.gates_after <= report.gates_before
+    assert optimized.gate_count() == report.gates_after
+    input_bits = sum(len(wires) for wires in netlist.inputs.values())
+    if not netlist.is_sequential() and not netlist.memories and input_bits <= 16:
+        assert netlist_truth_table(optimized) == netlist_truth_table(netlist)
+    # Random vectors (clock cycles for sequential chips); raises on any mismatch.
+    measure_speedup(netlist, optimized, vectors=500)
+
+
+def test_report_separates_rewrite_rules():
+    _, report = optimize_netlist(flatten_chip(HDLParser(base_path=HDL_PATH).parse_file("PC")))
+    assert report.constants_folded > 0
+    assert report.identities_applied > 0
+    assert "identities applied" in str(report)
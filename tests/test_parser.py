@@ -0,0 +1,109 @@
+import pytest
+from hdl_framework.parser import HDLParser, HDLSyntaxError, ParseCache, parse_hdl
+from conftest import HDL_PATH, write_hdl
+
+
+def parse(tmp_path, source: str, name: str = "Top"):
+    write_hdl(tmp_path, name, source)
+    return HDLParser(base_path=str(tmp_path)).parse_file(name)
+
+
+def test_parses_buses_and_widths():
+    chip = HDLParser(base_path=HDL_PATH).parse_file("Mux4Way16")
+    assert chip.inputs == ["a", "b", "c", "d", "sel"]
+    assert chip.pin_width("a") == 16
+    assert chip.pin_width("sel") == 2
+
+
+def test_slice_width_mismatch_reports_line_and_column(tmp_path):
+    with pytest.raises(HDLSyntaxError) as error:
+        parse(tmp_path, """CHIP Top {
+    IN a[16];
+    OUT out[8];
+    PARTS:
+    Not16(in=a, out[0..3]=out);
+}""")
+    assert (error.value.line, error.value.column) == (5, 17)
+    assert "Width mismatch: out[0..3] has width 4 but out has width 8" in str(error.value)
+    assert str(error.value).startswith("Top.hdl:5:17:")
+
+
+def test_sub_bus_out_of_range(tmp_path):
+    with pytest.raises(HDLSyntaxError, match=r"out\[8\.\.16\] is out of range for 16-bit pin") as error:
+        parse(tmp_path, """CHIP Top {
+    IN a[16];
+    OUT out[9];
+    PARTS:
+    Not16(in=a, out[8..16]=out);
+}""")
+    assert error.value.line == 5
+
+
+def test_internal_wire_width_mismatch(tmp_path):
+    with pytest.raises(HDLSyntaxError, match="wire 'x' has width 16"):
+        parse(tmp_path, """CHIP Top {
+    IN a[16];
+    OUT out;
+    PARTS:
+    Not16(in=a, out=x);
+    Not(in=x, out=out);
+}""")
+
+
+def test_unknown_pin(tmp_path):
+    with pytest.raises(HDLSyntaxError, match="Not has no pin named 'input'") as error:
+        parse(tmp_path, """CHIP Top {
+    IN a;
+    OUT out;
+    PARTS:
+    Not(input=a, out=out);
+}""")
+    assert (error.value.line, error.value.column) == (5, 9)
+
+
+def test_syntax_error_position():
+    with pytest.raises(HDLSyntaxError) as error:
+        parse_hdl("CHIP Top {\n    IN a\n    OUT out;\n}", "Top.hdl")
+    assert error.value.line == 3
+
+
+def test_combinational_cycle_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Combinational cycle detected in Top"):
+        parse(tmp_path, """CHIP Top {
+    IN a;
+    OUT out;
+    PARTS:
+    Nand(a=a, b=y, out=x);
+    Not(in=x, out=y);
+    Not(in=x, out=out);
+}""")
+
+
+def test_cycle_through_dff_is_allowed(tmp_path):
+    chip = parse(tmp_path, """CHIP Top {
+    IN in;
+    OUT out;
+    PARTS:
+    Nand(a=in, b=q, out=d);
+    DFF(in=d, out=q, out=out);
+}""")
+    assert chip.is_sequential()
+
+
+def test_circular_chip_dependency(tmp_path):
+    write_hdl(tmp_path, "A", "CHIP A { IN in; OUT out; PARTS: B(in=in, out=out); }")
+    write_hdl(tmp_path, "B", "CHIP B { IN in; OUT out; PARTS: A(in=in, out=out); }")
+    with pytest.raises(ValueError, match="Circular chip dependency: A -> B -> A"):
+        HDLParser(base_path=str(tmp_path)).parse_file("A")
+
+
+def test_failed_build_leaves_no_stale_sources(hdl_copy):
+    parser = HDLParser(base_path=str(hdl_copy))
+    xor = (hdl_copy / "Xor.hdl").read_text()
+    (hdl_copy / "Xor.hdl").write_text("CHIP Xor { garbage")
+    with pytest.raises(HDLSyntaxError):
+        parser.parse_file("FullAdder")
+    (hdl_copy / "Xor.hdl").write_text(xor)
+    (hdl_copy / "FullAdder.hdl").write_text((hdl_copy / "FullAdder.hdl").read_text() + "\n// edited\n")
+    parser.parse_file("FullAdder")
+    assert parser.content_hashes["FullAdder"] == ParseCache.content_hash((hdl_copy / "FullAdder.hdl").read_text())